@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Benchmark of cleanUtt() + tokenise(): utterances per second of childes.py and of the
+rules before they were precompiled (tests/reference_cleanutt.py), on the same utterances.
+    python3 benchmarks/bench_cleanutt.py [file.cha ...] [-n 100000] [--language fra]
+Without a CHAT file, the utterances of test-snippet.cha and tests/data/utterances.txt are used.
+"""
+import argparse
+import gzip
+import os
+import re
+import sys
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [REPO, os.path.join(REPO, 'tests')]
+
+import childes
+import reference_cleanutt
+
+def read_utterances(paths):
+    found = []
+    for path in paths:
+        with gzip.open(path, 'rt', encoding='utf8') if path.endswith('.gz') else open(path, encoding='utf8') as f:
+            text = re.sub(r'\n\s+', ' ', f.read())
+        if path.endswith('.txt'):
+            found += text.splitlines()
+        else:
+            found += [m.group(1) for m in re.finditer(r'^\*[A-Z0-9]+:\s+(.*)$', text, re.M)]
+    return found
+
+def bench(name, clean, tokenise, utterances, language):
+    start = time.perf_counter()
+    for utt in utterances:
+        tokenise(clean(utt), language)
+    seconds = time.perf_counter() - start
+    print(f"{name:10} {seconds:8.2f} s {len(utterances) / seconds:12,.0f} utterances/s")
+    return seconds
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('chat_file', nargs='*', help='CHAT files (.cha, .cha.gz) or text files of utterances (.txt).')
+    parser.add_argument('-n', type=int, default=100000, help='Number of utterances (the input is repeated). Default: 100000.')
+    parser.add_argument('--language', default='fra', help='Language of the @ID header for tokenise(). Default: fra.')
+    args = parser.parse_args()
+
+    sample = read_utterances(args.chat_file or [os.path.join(REPO, 'test-snippet.cha'),
+                                                os.path.join(REPO, 'tests', 'data', 'utterances.txt')])
+    if not sample: sys.exit("No utterances found.")
+    utterances = (sample * (args.n // len(sample) + 1))[:args.n]
+    print(f"{len(utterances)} utterances ({len(sample)} different), language '{args.language}'")
+    before = bench('before', reference_cleanutt.cleanUtt, reference_cleanutt.tokenise, utterances, args.language)
+    after = bench('childes.py', childes.cleanUtt, childes.tokenise, utterances, args.language)
+    print(f"speedup    {before / after:8.2f}x")
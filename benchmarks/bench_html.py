@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the HTML export (HtmlExporter): sentences per second for n utterances.
+    python3 benchmarks/bench_html.py [file.conllu] [-n 100000] [--chunk_html 5000] [--html_jobs 1]
+The sentences of the CoNLL-U file (e.g. written by childes.py --write_conllu) are repeated
+with new item_ids. Without a file, the utterances of test-snippet.cha are used, each word
+depending on the first one. The pages are written to a temporary directory.
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+import childes
+
+def snippet_sentences():
+    with open(os.path.join(REPO, 'test-snippet.cha'), encoding='utf8') as f:
+        text = re.sub(r'\n\s+', ' ', f.read())
+    sentences = []
+    for utt in re.findall(r'^\*[A-Z0-9]+:\s+(.*)$', text, re.M):
+        words = childes.tokenise(childes.cleanUtt(utt), 'fra').split()
+        sentences.append('\n'.join(f"{i}\t{w}\t{w.lower()}\t{'PUNCT' if w in '.!?' else 'NOUN'}\t_\t_\t{0 if i == 1 else 1}\t{'root' if i == 1 else 'dep'}\t_\t_"
+                                   for i, w in enumerate(words, 1)))
+    return sentences
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('conllu_file', nargs='?', help='CoNLL-U file of parsed sentences.')
+    parser.add_argument('-n', type=int, default=100000, help='Number of utterances. Default: 100000.')
+    parser.add_argument('--chunk_html', type=int, default=5000, help='Sentences per HTML page. Default: 5000.')
+    parser.add_argument('--html_jobs', type=int, default=1, help='Processes writing the pages. Default: 1.')
+    args = parser.parse_args()
+
+    if args.conllu_file:
+        with open(args.conllu_file, encoding='utf8') as f:
+            sample = [re.sub(r'^# (item_id|sent_id) = .*\n', '', s, flags=re.M) for s in f.read().strip().split('\n\n')]
+    else:
+        sample = snippet_sentences()
+    conllu = ''.join(f"# item_id = bench_u{i}\n{sample[i % len(sample)]}\n\n" for i in range(args.n))
+
+    with tempfile.TemporaryDirectory() as html_dir:
+        exporter = childes.HtmlExporter(html_dir, 'bench', chunk_size=args.chunk_html, jobs=args.html_jobs)
+        exporter.project = 'bench'
+        start = time.perf_counter()
+        exporter.export(conllu, {})
+        exporter.close()
+        seconds = time.perf_counter() - start
+        pages = sum(name.endswith('.html') for name in os.listdir(html_dir))
+    print(f"{args.n} utterances, {pages} pages, {args.html_jobs} job(s): {seconds:.2f} s, {args.n / seconds:,.0f} utterances/s")
@@ -14,6 +14,9 @@
 #   for file in Champaud Geneva Leveille Lyon MTLN Palasis Paris Pauline VionColas Yamaguchi York; do echo "----------> $file"; childes-pipeline.sh ${file}.chha.gz; done
 # OR:
 #   for file in *.cha.gz; do echo "----------> $file"; childes-pipeline.sh ${file}; done
+# Step 1 for several files can also be run by childes.py itself (one interpreter, shared parser
+# connection, optional concatenated light table), e.g.:
+#   python3 childes.py *.cha.gz --file_jobs 2 --all_light all.light.csv [other options as below]
 
 # --- Configuration ---
 # Path to your scripts and models
@@ -131,6 +134,7 @@ if [ "$RUN_STEP_1" = true ]; then
     echo "Next steps:"
     echo "- Concatenate CSV files if needed, e.g."
     echo '    head -n 1 "$(ls *.light.csv | head -n 1)" > all.csv; tail -n +2 -q *.light.csv >> all.csv'
+    echo '  or let childes.py process all files at once: childes.py *.cha.gz --all_light all.csv ...'
 
     if [ -d "${HTML_DIR}" ]; then
       echo "---"
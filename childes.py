@@ -1,7 +1,7 @@
 #!/usr/bin/python3
 
 __author__ = "Achim Stein"
-__version__ = "5.3"
+__version__ = "5.4"
 __status__ = "27.1.26"
 __license__ = "GPL"
 
@@ -11,33 +11,54 @@ import os
 import subprocess
 import csv
 import tempfile
+import glob
 import gzip
-import io
 import time
+import hashlib
+import json
+import multiprocessing
+import queue
+import random
+import socket
+import sqlite3
+import threading
 import requests
-from conllu import parse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 #from grewpy import Corpus, GRS
 
 # Robust Grew import 
-try:
-    import grewpy
-    from grewpy import Corpus, GRS
-    # Explicit init inside the try block
-    grewpy.init() 
-except Exception as e:
-    sys.stderr.write(f"  [INFO] Initial Grew connection failed. Retrying in 1s...\n")
-    time.sleep(1)
+# v5.4: not in the worker processes of --jobs and --html_jobs (started with spawn, they run this script again as __mp_main__)
+if __name__ != '__mp_main__':
     try:
-        # Retry the import and initialization
         import grewpy
         from grewpy import Corpus, GRS
-        grewpy.init()
-    except Exception as final_e:
-        sys.stderr.write(f"  [WARNING] Grew backend failed to initialize: {final_e}\n")
-        sys.stderr.write("            Rewrite rules will not work.\n")
-        sys.stderr.write("   TRY THIS:\n")
-        sys.stderr.write("     - Check if you have a VPN running: disconnecting from the VPN might help.\n")
-        sys.stderr.write("     - Check if grew_backend is installed correctly (for your Python version), maybe re-install\n\n")
+        # Explicit init inside the try block
+        grewpy.init() 
+    except Exception as e:
+        sys.stderr.write(f"  [INFO] Initial Grew connection failed. Retrying in 1s...\n")
+        time.sleep(1)
+        try:
+            # Retry the import and initialization
+            import grewpy
+            from grewpy import Corpus, GRS
+            grewpy.init()
+        except Exception as final_e:
+            sys.stderr.write(f"  [WARNING] Grew backend failed to initialize: {final_e}\n")
+            sys.stderr.write("            Rewrite rules will not work.\n")
+            sys.stderr.write("   TRY THIS:\n")
+            sys.stderr.write("     - Check if you have a VPN running: disconnecting from the VPN might help.\n")
+            sys.stderr.write("     - Check if grew_backend is installed correctly (for your Python version), maybe re-install\n\n")
+
+LINDAT_API_URL = "https://lindat.mff.cuni.cz/services/udpipe/api/process"
+TRANSIENT_STATUS = (429, 500, 502, 503, 504)  # HTTP errors worth a retry
+
+class UDPipeError(Exception):
+    """The parser API rejected a chunk (status None: no response, e.g. timeout)."""
+    def __init__(self, status, text):
+        super().__init__(f"status {status}: {text[:500]}")
+        self.status = status
+        self.text = text
 
 #-------------------------------------------------------
 # Helper functions
@@ -53,32 +74,282 @@ def parseAge(age_str):
     age_days = int(int(year) * 365 + int(months) * 30.4 + int(days))
     return age_str, age_days
 
+# cleanUtt rules (v5.4: compiled once; rules with the same replacement are merged where the order does not matter)
+CLEAN_RULES = [(re.compile(pattern), repl) for pattern, repl in [
+    (r' 0([\S+])', r' \1'),                 # 0word -> word
+    (r'0(faire|ne) ', '\1 '),                # Specific fix for 0faire, 0ne (inserts chr(1), kept for identical output)
+    (r'&=li ', ' '),                         # Remove non-canonical liaison markers (mostly in Lyon project)
+    (r'<[^>]+> \[//?\] ', ''),                # Remove retracings <...> [//]
+    (r'\[\!\] ?', ' '),                       # Remove stressing [!]
+    (r' ?\(\.+\) ', ' '),                    # Pauses (.) (..) -> remove
+    (r'<([^>]+)>\s+\[%[^\]]+\]', r'\1'),      # Keep text before comment <text> [% comment]
+    (r'<(0|www|xxx|yyy)[^>]+> ?', ''),       # Remove unintelligible marked with <>
+    (r'\+[<,]? ?', ''),                      # Remove +< and +,
+    (r'(0|www|xxx|yyy)\s', ''),              # Remove unintelligible words
+    (r'\[.*?\] ?', ''),                      # Remove all other bracketed content [...]
+    (r'\(([A-Za-z]+)\)', r'\1'),             # Keep text inside parentheses (word) -> word
+    (r' \+/+|[_=]', ' '),                    # Remove +/, replace _ and = with space
+    # added v4.4
+    (r'@[a-z:0-9]+', ''),                    # Remove special CHAT suffixes like @c, @s:eng
+    (r'&[\S]+|[<>]', ''),                    # Remove phonological fragments like &mm, remaining angle brackets
+]]
+CLEAN_MARKUP = re.compile(r'[0&<>\[\]()+_=@]|www|xxx|yyy')  # no rule applies without one of these
+
 def cleanUtt(s):
     """
     cleans standard CHAT markup from utterances to prepare them for NLP tools
     revised v4.4
+    v5.4: precompiled rules (CLEAN_RULES), utterances without markup only get their spaces normalised
     """
-    s = re.sub(r' 0([\S+])', r' \1', s)           # 0word -> word
-    s = re.sub(r'0(faire|ne) ', '\1 ', s)           # Specific fix for 0faire, 0ne
-    s = re.sub(r'&=li ', ' ', s)                   # Remove non-canonical liaison markers (mostly in Lyon project)
-    s = re.sub(r'<[^>]+> \[//?\] ', '', s)        # Remove retracings <...> [//]
-    s = re.sub(r'\[\!\] ?', ' ', s)               # Remove stressing [!]
-    s = re.sub(r' ?\(\.+\) ', ' ', s)            # Pauses (.) (..) -> remove
-    s = re.sub(r'<([^>]+)>\s+\[%[^\]]+\]', r'\1', s) # Keep text before comment <text> [% comment]
-    s = re.sub(r'<(0|www|xxx|yyy)[^>]+> ?', '', s)   # Remove unintelligible marked with <>
-    s = re.sub(r'\+[<,]? ?', '', s)               # Remove +< and +,
-    s = re.sub(r'(0|www|xxx|yyy)\s', '', s)          # Remove unintelligible words
-    s = re.sub(r'\[.*?\] ?', '', s)               # Remove all other bracketed content [...]
-    s = re.sub(r'\(([A-Za-z]+)\)', r'\1', s)      # Keep text inside parentheses (word) -> word
-    s = re.sub(r' \+/+', ' ', s)                  # Remove +/
-    s = re.sub(r'[_=]', ' ', s)                   # Replace _ and = with space
-    # added v4.4
-    s = re.sub(r'@[a-z:0-9]+', '', s)             # Remove special CHAT suffixes like @c, @s:eng
-    s = re.sub(r'&[\S]+', '', s)                  # Remove phonological fragments like &mm
-    # final cleanups
-    s = re.sub(r'[<>]', '', s)                    # Remove remaining angle brackets
-    s = re.sub(r'\s+', ' ', s)                    # Normalize spaces
-    return(s.strip())
+    if CLEAN_MARKUP.search(s):
+        for pattern, repl in CLEAN_RULES:
+            s = pattern.sub(repl, s)
+    return ' '.join(s.split())                # Normalize spaces
+
+# tokenise rules per language (v5.4: compiled once)
+TOKENISE_RULES = {lang: [(re.compile(pattern), repl) for pattern, repl in rules] for lang, rules in {
+    'fra': [
+        (r'([dcjlmnstDCJLNMST]\'|[Qq]u\'|[Jj]usqu\'|[Ll]orsqu\')', r'\1 '),   # BeginString
+        (r'([\|\{\(\/\´\`"»«°<])', r'\1 '),                                # BeginChar
+        (r'([\]\|\}\/\`\"\),\;\:\!\?\.\%»«>])(?=\s|$)', r' \1'),        # EndChar, also if followed by end of line
+        (r'(-(?:t-elles?|t-ils?|t-on|ce|elles?|ils?|je|la|les?|leur|lui|mêmes?|m\'|moi|nous|on|toi|tu|t\'|vous|en|y|ci|là))', r' \1'),  # EndString
+        (r'\s+', ' '),
+    ],
+    'ita': [
+        # Punctuation and delimiters like French
+        (r'([\|\{\(\/\´\`"»«°<])', r'\1 '),
+        (r'([\]\|\}\/\`\"\),\;\:\!\?\.\%»«>])(?=\s|$)', r' \1'),
+        # Split apostrophe preceding a letter: l', un', c', d', gl', dell', quest', etc.
+        #   but NOT split apocope like "po' " (followed by space)
+        (r"([a-zA-Z]+')(?=[a-zA-Zà-úÀ-Ú])", r"\1 "),
+        (r'\s+', ' '),
+    ],
+    'eng': [
+        (r'n\'t', r" n't"),                          # haven't -> have n't
+        (r"I'm", r"I 'm"),                           # it's -> it 's, I've -> I 've
+        (r'(\S)\'(s|ve|ll|d|re)', r"\1 '\2"),        # it's -> it 's, I've -> I 've etc.
+    ],
+    'deu': [],
+    # Default simple tokenization if no language is matched
+    None: [
+        (r'([,;?.!])(?=\s|$)', r' \1'),
+        (r'\s+', ' '),
+    ],
+    # Add other languages here, and in tokenise_language()
+}.items()}
+
+def tokenise_language(language):
+    """Returns the key of TOKENISE_RULES for the language of an @ID header (e.g. 'fra')."""
+    for key, regex in (('fra', r'fra|french'), ('ita', r'ita|italian'), ('eng', r'eng|english'), ('deu', r'deu|german')):
+        if language and re.search(regex, language):
+            return key
+    return None
+
+TOKENISE_BY_LANGUAGE = {}  # language of the @ID header -> rules
+
+def tokenise(s, language):
+    """
+    Tokenises a string, with language-specific rules.
+    Normally, in CHAT format punctuation should be separated by spaces already. (BeginChar/EndChar)
+    German clitics can't be handled: habs, gehts, etc.
+    v5.4: the rules are compiled once per language, see TOKENISE_RULES
+    """
+    if (rules := TOKENISE_BY_LANGUAGE.get(language)) is None:
+        rules = TOKENISE_BY_LANGUAGE[language] = TOKENISE_RULES[tokenise_language(language)]
+    for pattern, repl in rules:
+        s = pattern.sub(repl, s)
+    return s
+
+def header_language(header_block):
+    """Language of a session: the first field of the first @ID line (as in ChatProcessor.parse_header)."""
+    m = re.search(r'@ID:\s+(.*?)\|(.*?)\|', header_block)
+    return m.group(1) if m else ''
+
+def prepare_utterance(block, language):
+    """
+    Cleans and tokenises an utterance block (v5.4, split from ChatProcessor.process_utterance_block).
+    Returns (speaker, raw utterance, time code, cleaned utterance, tokenised utterance),
+    or None if the block is not an utterance.
+    """
+    block = re.sub(r'\n\s+', ' ', block, flags=re.DOTALL)
+    timeCode = (m.group(1) if (m := re.search(r'\x15(\d+_\d+)\x15', block)) else '')
+    block_no_time = re.sub(r'\s*\x15.*?\x15', '', block) # remove including spaces
+
+    if not (m := re.search(r'^\*([A-Z0-9]+):\s+(.*)', block_no_time.strip())):
+        return None
+
+    speaker, utt = m.groups()
+    splitUtt = cleanUtt(utt)
+    return speaker, utt.strip(), timeCode, splitUtt, tokenise(splitUtt, language)
+
+def prepare_session(language, blocks):
+    """
+    Worker function of --jobs: prepares the utterance blocks of one session.
+    language: the language the serial run would use for the session, given by the main process.
+    """
+    return [prepare_utterance(block, language) for block in blocks]
+
+def iter_chat_blocks(lines):
+    """
+    Line-oriented CHAT reader (v5.4), replaces reading and splitting the whole file.
+    Yields ('header', block) once per session and ('utterance', block) for each utterance.
+    Sessions are split after @End (as in v5.1), so the @PID preamble belongs to the next session.
+    Header = leading lines starting with @ or tab; utterance = a line starting with *
+    plus the following lines (%mor etc.) up to the next * or @ line.
+    Only the current block is kept in memory.
+    """
+    in_session = False  # current session has some (possibly blank) content
+    state = 'pre'       # 'pre' (leading whitespace), 'header', 'body'
+    header, block = [], []
+    for line in lines:
+        while line:
+            end = line.find('@End')
+            if end < 0:
+                piece, line = line, ''
+            else:
+                piece, line = line[:end + 4], line[end + 4:]
+            in_session = True
+            if state == 'pre':
+                piece = piece.lstrip()
+                if piece:
+                    state = 'header'
+            if state == 'header' and piece:
+                if piece[0] in '@\t' and piece.endswith('\n'):
+                    header.append(piece)
+                    piece = ''
+                else:
+                    yield 'header', ''.join(header)
+                    header = []
+                    state = 'body'
+            if state == 'body' and piece:
+                if block and piece[0] not in '*@':
+                    block.append(piece)  # continuation line (%mor, tab-indented, ...)
+                else:
+                    if block:
+                        yield 'utterance', ''.join(block)[:-1]  # without the final newline
+                        block = []
+                    start = piece.find('*')
+                    if start >= 0:
+                        block = [piece[start:]]
+            if end >= 0:
+                # session ends after @End
+                if state != 'body':
+                    yield 'header', ''.join(header)
+                elif block:
+                    yield 'utterance', ''.join(block)
+                in_session, state, header, block = False, 'pre', [], []
+    if in_session:
+        if state != 'body':
+            yield 'header', ''.join(header)
+        elif block:
+            yield 'utterance', ''.join(block)
+
+def iter_chat_sessions(lines):
+    """Groups the blocks of iter_chat_blocks() by session: yields (header, [utterance blocks])."""
+    header, blocks = None, []
+    for kind, block in iter_chat_blocks(lines):
+        if kind == 'header':
+            if header is not None:
+                yield header, blocks
+            header, blocks = block, []
+        else:
+            blocks.append(block)
+    if header is not None:
+        yield header, blocks
+
+TSV_FIELD_CLEAN = str.maketrans({'\t': ' ', '\n': ' ', '\r': ' ', '\x1e': None})
+
+def tsv_field(value):
+    """
+    A cell of the parsed and light tables (v5.4): None -> '', other values as str().
+    Tabs and line breaks would break the row, they become spaces.
+    (\x1e was the dummy escape character of the csv module in earlier versions, it is still removed.)
+    """
+    return '' if value is None else str(value).translate(TSV_FIELD_CLEAN)
+
+CONLLU_ITEM_ID = re.compile(r"#\s*item_id\s*=\s*(.*)")
+
+def iter_conllu_sentences(conllu_str):
+    """
+    Yields (item_id, tokens) for the sentences of a CoNLL-U string (v5.4), item_id None if the
+    sentence has no item_id comment. tokens[n-1] holds the columns of word n (None if there is
+    no such ID); multiword tokens and empty nodes are left out.
+    """
+    item_id, tokens, started = None, [], False
+    for line in conllu_str.splitlines():
+        if not line.strip():
+            if started: yield item_id, tokens
+            item_id, tokens, started = None, [], False
+            continue
+        if line.startswith('#'):
+            if match := CONLLU_ITEM_ID.match(line):
+                if tokens: yield item_id, tokens  # no empty line before
+                item_id, tokens = match.group(1).strip(), []
+        else:
+            cols = line.split('\t')
+            if len(cols) >= 2 and cols[0].isdecimal():
+                n = int(cols[0])
+                if n > len(tokens): tokens.extend([None] * (n - len(tokens)))
+                tokens[n - 1] = cols
+        started = True
+    if started: yield item_id, tokens
+
+def join_conllu_sentences(conllu_str, utt_ids):
+    """
+    Yields the CoNLL-U tokens (see iter_conllu_sentences) for each id of the list utt_ids, [] if it was not parsed.
+    v5.4: the parser output is in the order of the utterances, so both are walked in lockstep
+          instead of indexing every token by "{item_id}_w{n}". Sentences of other utterances are skipped.
+          A sentence found before its utterance comes up is kept until then, so one sentence out of
+          order does not lose the following ones. An id given n times takes its next n sentences.
+    """
+    wanted = set(utt_ids)
+    ahead = {}  # item_id -> sentences read before their utterance
+    sentences = iter_conllu_sentences(conllu_str)
+    for utt_id in utt_ids:
+        if ahead.get(utt_id):
+            yield ahead[utt_id].popleft()
+            continue
+        for item_id, tokens in sentences:
+            if item_id == utt_id:
+                yield tokens
+                break
+            if item_id in wanted:
+                ahead.setdefault(item_id, deque()).append(tokens)
+        else:
+            yield []
+
+UPOS_VERB = re.compile(r'VER[A-Z]+')  # TreeTagger verb tags, highlighted in the trees
+
+def format_tree_html(tokens):
+    """
+    Renders a dependency tree for the HTML pages (v5.4: from the heads, formerly from the output
+    of conllu's print_tree()). One line per word in ID order, indented by 4 dots per level:
+      ID.... form lemma upos  deprel->head
+    tokens as yielded by iter_conllu_sentences(). Words without a numeric head and words not
+    connected to the root are left out, several roots hang below a dummy word 0.
+    Returns '' if there is no root.
+    """
+    children = {}
+    for cols in tokens:
+        if cols is None or len(cols) < 8 or not cols[6].isdecimal(): continue
+        children.setdefault(int(cols[6]), []).append(cols)
+    roots = children.get(0)
+    if not roots:
+        return ''
+
+    lines = {}
+    if len(roots) > 1:
+        lines[0] = '00 <b>_</b>  <span class=d>root</span>&#8594;0'
+    stack = [(cols, 1 if len(roots) > 1 else 0) for cols in roots]
+    while stack:
+        cols, depth = stack.pop()
+        wID = int(cols[0])
+        _, form, lemma, upos, _, _, head, deprel = cols[:8]
+        upos_class = 'v' if UPOS_VERB.fullmatch(upos) else 'u'
+        lines[wID] = (f"{wID:02d}{'.' * 4 * depth} <b>{form}</b> <span class=l>{lemma}</span> "
+                      f"<span class={upos_class}>{upos}</span>  <span class=d>{deprel}</span>&#8594;{int(head)}")
+        stack.extend((child, depth + 1) for child in children.get(wID, []))
+    return '\n'.join(lines[wID] for wID in sorted(lines))
 
 def process_tagged_data(tagged):
     lines = tagged.strip().split('\n')
@@ -90,17 +361,145 @@ def process_tagged_data(tagged):
         processed_lines.append('\t'.join(columns))
     return '\n'.join(processed_lines)
     
+class TreeTagger:
+    """
+    TreeTagger co-processes (v5.4), replacing one blocking run on a temporary file after reading.
+    Sentences are written to the tagger while the corpus is read, reader threads collect the output.
+    With n > 1 processes, blocks of block_size sentences go to the taggers in turn and the outputs
+    are put back in input order. The first tokens of a block may then get other tags than with one
+    tagger, which sees the end of the preceding sentence as context.
+    """
+    def __init__(self, cmd, n=1, block_size=1000):
+        self.procs, self.readers, self.outputs = [], [], []
+        for _ in range(max(1, n)):
+            proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+            output = []
+            reader = threading.Thread(target=self._read, args=(proc, output), daemon=True)
+            reader.start()
+            self.procs.append(proc); self.readers.append(reader); self.outputs.append(output)
+        self.block_size = block_size
+        self.block = []   # sentences not yet sent
+        self.blocks = []  # (tagger, number of sentences) of the blocks sent
+
+    @staticmethod
+    def _read(proc, output):
+        for data in iter(lambda: proc.stdout.read(65536), b''):
+            output.append(data)
+
+    def write(self, sentence):
+        """Adds a sentence line '<s_ID> token token ...' (one token per line for the tagger)."""
+        self.block.append(re.sub(' +', '\n', sentence))
+        if len(self.block) >= self.block_size:
+            self._send()
+
+    def _send(self):
+        if not self.block: return
+        i = len(self.blocks) % len(self.procs)
+        try:
+            self.procs[i].stdin.write(''.join(self.block).encode('utf8'))
+        except BrokenPipeError:
+            pass  # the tagger died, its exit status is reported by finish()
+        self.blocks.append((i, len(self.block)))
+        self.block = []
+
+    def finish(self):
+        """Ends the input and returns the complete output, in input order."""
+        self._send()
+        for proc in self.procs:
+            try:
+                proc.stdin.close()
+            except BrokenPipeError:
+                pass
+        for reader in self.readers: reader.join()
+        for proc in self.procs:
+            if proc.wait(): raise subprocess.CalledProcessError(proc.returncode, proc.args)
+        outputs = [b''.join(output).decode('utf8') for output in self.outputs]
+        if len(outputs) == 1:
+            return outputs[0]
+        lines = [output.splitlines(keepends=True) for output in outputs]
+        pos = [0] * len(lines)
+        tagged = []
+        for i, n_sentences in self.blocks:
+            start = end = pos[i]
+            markers = 0
+            while end < len(lines[i]):
+                if lines[i][end].startswith('<s_'):
+                    if markers == n_sentences: break
+                    markers += 1
+                end += 1
+            tagged.extend(lines[i][start:end])
+            pos[i] = end
+        return ''.join(tagged)
+
+    def kill(self):
+        for proc in self.procs:
+            proc.kill(); proc.wait()
+
 #-------------------------------------------------------
 # HTML export class for UD parsed data
 #-------------------------------------------------------
+def format_sentence_html(utt_id, child_project, speaker, age, raw_utterance, tokens):
+    """The HTML of a sentence of a page (anchor, header, utterance, tree), '' if it has no tree."""
+    formatted_tree = format_tree_html(tokens)
+    if not formatted_tree:
+        return ''
+    html = f'\n<a name="{utt_id}"></a><hr>\n'  # anchor
+    if speaker == "CHI":
+        html += f"<h3>ID: {utt_id} | {child_project} | <span class=r>{speaker} | {age}</span></h3>\n"
+    else:
+        html += f"<h3>ID: {utt_id} | {child_project} | {speaker}</h3>\n"
+    escaped_utt = raw_utterance.replace('<', '&lt').replace('>', '&gt')
+    html += f'<p class="coding">{escaped_utt}</p>\n'
+    html += f'<div class="parse"><p>{formatted_tree}</p></div>\n'
+    return html
+
+def write_html_page(html_filepath, html_head, nav_header, html_foot, sentences):
+    """
+    Renders the sentences (argument tuples of format_sentence_html) and writes an HTML page.
+    v5.4: a module function, so that pages can be written in worker processes (--html_jobs).
+          The page replaces the old one when it is complete (several files may be processed at once).
+    Returns the IDs of the sentences without a tree.
+    """
+    no_tree = []
+    temp_path = f"{html_filepath}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, 'w', encoding='utf8') as f:
+        f.write(html_head)
+        f.write(nav_header)
+        for sentence in sentences:
+            html = format_sentence_html(*sentence)
+            if html: f.write(html)
+            else: no_tree.append(sentence[0])
+        # copy header to footer
+        f.write('<div class="nav-footer">' + nav_header + '</div>')
+        f.write(html_foot)
+    os.replace(temp_path, html_filepath)
+    return no_tree
+
 class HtmlExporter:
     """Generates a chunked, styled HTML corpus with dependency trees."""
-    def __init__(self, output_dir, file_basename, chunk_size=1000):
+    def __init__(self, output_dir, file_basename, chunk_size=1000, jobs=1):
         self.output_dir = output_dir
         self.file_basename = file_basename
         self.project = ''  # rather than file_basename, for html filenames
         self.chunk_size = chunk_size
+        self.page_project = None  # project name used for the html filenames, fixed by the first export()
+        self.n_sentences = 0      # sentences exported so far (across batches)
+        self.page_nr = -1         # current page (chunk_id) ...
+        self.page = None          # ... and its sentences, written by _write_page()
+        self.jobs = jobs          # v5.4: pages written by a process pool if > 1 (--html_jobs)
+        self.pool = None
+        self.pending = deque()    # (html_filename, digest, future) of the pages being written by the pool
         os.makedirs(self.output_dir, exist_ok=True)
+        # v5.4: hashes of the pages written before, see _write_page()
+        self.hashes_path = os.path.join(self.output_dir, f".{file_basename}.pages.json")
+        self.page_hashes = {}     # html_filename -> [digest, size, mtime_ns]
+        if os.path.exists(self.hashes_path):
+            try:
+                with open(self.hashes_path, encoding='utf8') as f:
+                    self.page_hashes = json.load(f)
+            except (OSError, ValueError):
+                pass
+        self.n_written = self.n_unchanged = 0
         self.html_head = '''<!DOCTYPE html>
 <html>
   <meta http-equiv="Content-type" content="text/html; charset=utf-8" />
@@ -133,132 +532,542 @@ class HtmlExporter:
 '''
         self.html_foot = '</body></html>'
 
-    def _format_tree_as_html(self, tree_str, tokenlist):
-        deps = {token["id"]: token["head"] for token in tokenlist}
-        lines = sorted(tree_str.strip().split("\n"), key=lambda line: int(re.search(r'\[(\d+)\]', line).group(1)))
-        
-        rebuilt_lines = []
-        for line in lines:
-            match = re.search(r'\[(\d+)\]$', line)
-            if match:
-                wID = int(match.group(1))
-                headID = deps.get(wID, 0)
-                line = line.replace(f"[{wID}]", f"[{wID}:{headID}]")
-            
-            leading_spaces = len(line) - len(line.lstrip(' '))
-            indented_line = '.' * leading_spaces + line.lstrip()
-            rebuilt_lines.append(indented_line)
-
-        html_tree = "\n".join(rebuilt_lines)
-        
-        html_tree = re.sub(
-            r'(\.*)\(deprel:(.*?)\)(.*?)\[(\d+):(\d+)\]',
-            lambda m: f"{int(m.group(4)):02d}{m.group(1)}{m.group(3)} <span class=d>{m.group(2)}</span>&#8594;{m.group(5)}",
-            html_tree,
-            flags=re.MULTILINE
-        )
-        html_tree = re.sub(r'lemma:(.*?) ', r'<span class=l>\1</span> ', html_tree)
-        html_tree = re.sub(r'upos:(VER[A-Z]+) ', r'<span class=v>\1</span> ', html_tree)
-        html_tree = re.sub(r'upos:(.*?) ', r'<span class=u>\1</span> ', html_tree)
-        html_tree = re.sub(r'xpos:(.*?) ', r'<span class=x>\1</span> ', html_tree)
-        html_tree = re.sub(r'form:(.*?) ', r'<b>\1</b> ', html_tree)
-        return html_tree
-
-    def export(self, parsed_conllu_str, original_rows):
-        sentences = parse(parsed_conllu_str)
-        
-        header_info_map = {}
-        for row in original_rows:
-            utt_id_base = re.match(r'(.*)_w\d+', row['utt_id']).group(1)
-            if utt_id_base not in header_info_map:
-                header_info_map[utt_id_base] = {
-                    'child_project': row['child_project'],
-                    'speaker': row['speaker'],
-                    'age': row['age'] if row['age'] else '_',
-                    'utterance': row['utterance']
-                }
+    def export(self, parsed_conllu_str, utterances):
+        """
+        Renders the parsed sentences into HTML pages of chunk_size sentences.
+        utterances: the index utt_id -> Utterances of the batch (Batch.index, v5.4), for the headers of the sentences;
+        the n-th sentence with an utt_id gets the n-th Utterance (a PID that comes back repeats the ids).
+        Returns the links {utt_id: [{'local': path, 'file': filename}, ...]} of these sentences, in the same order.
+        v5.4: may be called once per batch (--stream). Pages are filled across calls and a page
+              is written as soon as it is known whether a next page follows. Call close() at the end.
+              The sentences are read one by one and their trees rendered when the page is written.
+        """
+        if self.page_project is None:
+            self.page_project = self.project  # file names must not change between batches
 
         html_links = {}
-        total_chunks = (len(sentences) + self.chunk_size - 1) // self.chunk_size
-        for chunk_id in range(total_chunks):
-            sys.stderr.write(f"\rWriting HTML files to {self.output_dir} for chunk {chunk_id+1}/{total_chunks}")
-            sys.stderr.flush()
-            start_index = chunk_id * self.chunk_size
-            end_index = start_index + self.chunk_size
-            chunk_sentences = sentences[start_index:end_index]
+        seen = {}  # utt_id -> sentences with this id so far
+        for utt_id, tokens in iter_conllu_sentences(parsed_conllu_str):
+            chunk_id = self.n_sentences // self.chunk_size
+            self.n_sentences += 1
+            if chunk_id != self.page_nr:
+                if self.page is not None:
+                    self._write_page(has_next=True)
+                self.page_nr, self.page = chunk_id, []
+
+            if utt_id is None: continue
             
-            html_filename = f"{self.project[:3]}{chunk_id}.html" # keep as short as possible
+            html_filename = f"{self.page_project[:3]}{chunk_id}.html" # keep as short as possible
             html_filepath = os.path.join(self.output_dir, html_filename)
+            occurrence = seen[utt_id] = seen.get(utt_id, -1) + 1
+            utts = utterances.get(utt_id, [])
+            utt = utts[occurrence] if occurrence < len(utts) else None
+            if utt:
+                child_project, speaker, age, raw_utterance = utt.child_project, utt.speaker, utt.age or '_', utt.utterance
+            else:
+                child_project, speaker, age, raw_utterance = 'N/A', 'N/A', '_', '[Utterance not found]'
+            
+            html_links.setdefault(utt_id, []).append({'local': html_filepath, 'file': html_filename})
+            self.page.append((utt_id, child_project, speaker, age, raw_utterance, tokens))
 
-            with open(html_filepath, 'w', encoding='utf8') as f:
-                # HTML header
-                f.write(self.html_head % self.file_basename)
-                # Navigation header
-                nav_header = ''
-                if chunk_id > 0:
-                    prev_file = f"{self.project[:3]}{chunk_id - 1}.html"
-                    nav_header += f'<a href="{prev_file}">&laquo; Previous Page</a>'
-                if chunk_id > 0 and chunk_id < total_chunks - 1:
-                    nav_header += ' | '
-                nav_header += f" <b> CHILDES project {self.project}</b> | "
-                if chunk_id < total_chunks - 1:
-                    next_file = f"{self.project[:3]}{chunk_id + 1}.html"
-                    nav_header += f'<a href="{next_file}">Next Page &raquo;</a>'
-                nav_header = '<div class="nav-header">' + nav_header + '</div>'
-                f.write(nav_header)
-
-
-                for sentence in chunk_sentences:
-                    if 'item_id' not in sentence.metadata: continue
-                    utt_id = sentence.metadata['item_id']
-                    
-                    info = header_info_map.get(utt_id, {})
-                    child_project = info.get('child_project', 'N/A')
-                    html_filename = f"{self.project[:3]}{chunk_id}.html"
-                    speaker = info.get('speaker', 'N/A')
-                    age = info.get('age', '_')
-                    raw_utterance = info.get('utterance', '[Utterance not found]')
-                    
-                    html_links[utt_id] = {'local': html_filepath, 'file': html_filename}
-                    
-                    for token in sentence:
-                        if token['lemma'] is None:
-                            token['lemma'] = '_'
-                        if token['xpos'] is None:
-                            token['xpos'] = '_'
+        return html_links
 
-                    old_stdout = sys.stdout; sys.stdout = captured_output = io.StringIO()
-                    try:
-                        sentence.to_tree().print_tree()
-                    except Exception as e:
-                        sys.stderr.write(f"Could not generate tree for {utt_id}: {e}\n")
-                    sys.stdout = old_stdout; tree_str = captured_output.getvalue()
-                    
-                    if not tree_str: continue
-                    formatted_tree = self._format_tree_as_html(tree_str, sentence)
+    def close(self):
+        """Writes the last page (without a link to a next page) and waits for the pages being written."""
+        if self.page is not None:
+            self._write_page(has_next=False)
+            self.page = None
+            self._collect(0)
+            sys.stderr.write(f"\nHTML pages: {self.n_written} written, {self.n_unchanged} unchanged\n")
+            with open(self.hashes_path + '.tmp', 'w', encoding='utf8') as f:
+                json.dump(self.page_hashes, f)
+            os.replace(self.hashes_path + '.tmp', self.hashes_path)
+        if self.pool:
+            self.pool.shutdown()
+            self.pool = None
+
+    def _write_page(self, has_next):
+        chunk_id = self.page_nr
+        sys.stderr.write(f"\rWriting HTML files to {self.output_dir} for chunk {chunk_id+1}")
+        sys.stderr.flush()
+        html_filename = f"{self.page_project[:3]}{chunk_id}.html"
+        html_filepath = os.path.join(self.output_dir, html_filename)
+
+        # Navigation header
+        nav_header = ''
+        if chunk_id > 0:
+            prev_file = f"{self.page_project[:3]}{chunk_id - 1}.html"
+            nav_header += f'<a href="{prev_file}">&laquo; Previous Page</a>'
+        if chunk_id > 0 and has_next:
+            nav_header += ' | '
+        nav_header += f" <b> CHILDES project {self.page_project}</b> | "
+        if has_next:
+            next_file = f"{self.page_project[:3]}{chunk_id + 1}.html"
+            nav_header += f'<a href="{next_file}">Next Page &raquo;</a>'
+        nav_header = '<div class="nav-header">' + nav_header + '</div>'
+
+        page_args = (html_filepath, self.html_head % self.file_basename, nav_header, self.html_foot, self.page)
+        # v5.4: a page is not written again if its inputs are those of the last run and the file was
+        # not changed since (same size and mtime), so that its mtime is kept (e.g. for rsync)
+        digest = hashlib.sha256(json.dumps([__version__, page_args[1:]], ensure_ascii=False).encode('utf8')).hexdigest()
+        if self._is_unchanged(html_filename, html_filepath, digest):
+            self.n_unchanged += 1
+            return
+        self.page_hashes.pop(html_filename, None)
+        if self.jobs > 1:
+            if self.pool is None:
+                # spawn: forking would copy the locks of the pipeline and parser threads in any state
+                self.pool = ProcessPoolExecutor(max_workers=self.jobs, mp_context=multiprocessing.get_context('spawn'))
+            self.pending.append((html_filename, digest, self.pool.submit(write_html_page, *page_args)))
+            self._collect(2 * self.jobs)  # bounded: the sentences of waiting pages are kept in memory
+        else:
+            self._page_written(html_filename, digest, write_html_page(*page_args))
 
-                    f.write(f'\n<a name="{utt_id}"></a><hr>\n')  # anchor
-                    if speaker == "CHI":
-                        f.write(f"<h3>ID: {utt_id} | {child_project} | <span class=r>{speaker} | {age}</span></h3>\n")
-                    else:
-                        f.write(f"<h3>ID: {utt_id} | {child_project} | {speaker}</h3>\n")
-                    escaped_utt = raw_utterance.replace('<', '&lt').replace('>', '&gt')
-                    f.write(f'<p class="coding">{escaped_utt}</p>\n')
-                    f.write(f'<div class="parse"><p>{formatted_tree}</p></div>\n')
+    def _is_unchanged(self, html_filename, html_filepath, digest):
+        saved = self.page_hashes.get(html_filename)
+        if not saved or saved[0] != digest:
+            return False
+        try:
+            st = os.stat(html_filepath)
+        except OSError:
+            return False
+        return [st.st_size, st.st_mtime_ns] == saved[1:]
+
+    def _collect(self, max_pending):
+        """Waits for the oldest pages written by the pool until at most max_pending are left."""
+        while len(self.pending) > max_pending:
+            html_filename, digest, future = self.pending.popleft()
+            self._page_written(html_filename, digest, future.result())
+
+    def _page_written(self, html_filename, digest, no_tree):
+        st = os.stat(os.path.join(self.output_dir, html_filename))
+        self.page_hashes[html_filename] = [digest, st.st_size, st.st_mtime_ns]
+        self.n_written += 1
+        self._report_no_tree(no_tree)
+
+    def _report_no_tree(self, utt_ids):
+        for utt_id in utt_ids:
+            sys.stderr.write(f"Could not generate tree for {utt_id}: no root\n")
 
-                # copy header to footer
-                nav_footer = '<div class="nav-footer">' + nav_header + '</div>'
-                f.write(nav_footer)
-                f.write(self.html_foot)
-        sys.stderr.write("\n")
+#-------------------------------------------------------
+# Cache for parsed sentences
+#-------------------------------------------------------
+class ParseCache:
+    """
+    On-disk cache of UDPipe results (v5.4), one SQLite file in cache_dir.
+    The key is the parser (URL + model) and the token lines of a CoNLL-U input sentence.
+    Comment lines (# item_id) are not part of the key, they are copied from the input,
+    so that repeated utterances ("oui .") are parsed only once.
+    Least recently used entries are evicted when the cache exceeds max_mb.
+    """
+    def __init__(self, cache_dir, max_mb=1000):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, 'udpipe-cache.sqlite')
+        self.max_bytes = max_mb * 1024 * 1024
+        self.hits = self.misses = 0
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(self.path, timeout=60, check_same_thread=False)
+        self.db.execute('CREATE TABLE IF NOT EXISTS parses (key TEXT PRIMARY KEY, tokens TEXT NOT NULL, size INTEGER NOT NULL, used REAL NOT NULL)')
+        self.db.execute('CREATE INDEX IF NOT EXISTS parses_used ON parses (used)')
+        self.size = self.db.execute('SELECT COALESCE(SUM(size), 0) FROM parses').fetchone()[0]
+
+    @staticmethod
+    def split_sentence(sentence):
+        """Returns (comment lines, token lines) of one CoNLL-U sentence."""
+        lines = sentence.strip('\n').split('\n')
+        comments = '\n'.join(line for line in lines if line.startswith('#'))
+        tokens = '\n'.join(line for line in lines if not line.startswith('#'))
+        return comments, tokens
+
+    @staticmethod
+    def key(parser_id, tokens):
+        return hashlib.sha256(f"{parser_id}\n{tokens}".encode('utf8')).hexdigest()
+
+    def get_many(self, keys):
+        """Returns {key: token lines} for the keys found, and marks them as used."""
+        found = {}
+        unique = list(set(keys))
+        with self.lock:
+            for i in range(0, len(unique), 500):
+                part = unique[i:i + 500]
+                query = f"SELECT key, tokens FROM parses WHERE key IN ({','.join('?' * len(part))})"
+                found.update(self.db.execute(query, part))
+            self.db.executemany('UPDATE parses SET used = ? WHERE key = ?', [(time.time(), k) for k in found])
+            self.db.commit()
+        self.hits += sum(1 for k in keys if k in found)
+        self.misses += sum(1 for k in keys if k not in found)
+        return found
+
+    def put_many(self, items):
+        """Stores (key, token lines) pairs, then evicts old entries if the cache is too large."""
+        now = time.time()
+        with self.lock:
+            rows = [(k, tokens, len(tokens.encode('utf8')), now) for k, tokens in items]
+            self.db.executemany('INSERT OR REPLACE INTO parses VALUES (?, ?, ?, ?)', rows)
+            self.size += sum(row[2] for row in rows)
+            while self.size > self.max_bytes:
+                old = self.db.execute('SELECT key, size FROM parses ORDER BY used LIMIT 1000').fetchall()
+                if not old: break
+                self.db.executemany('DELETE FROM parses WHERE key = ?', [(k,) for k, _ in old])
+                self.size -= sum(size for _, size in old)
+            self.db.commit()
+
+    def close(self):
+        self.db.close()
 
-        return html_links
+#-------------------------------------------------------
+# Checkpoints for --resume
+#-------------------------------------------------------
+class RunCheckpoint:
+    """
+    Run directory of an unfinished run (v5.4). Tagger output (per batch) and parsed chunks
+    are saved as soon as they are complete and listed in manifest.json with the hash of their input.
+    A run with --resume repeats the cheap steps and takes the saved results whose input is unchanged,
+    so its output files are the same as those of an uninterrupted run.
+    The directory is removed when the run is complete (unless --keep_run_dir).
+    """
+    def __init__(self, run_dir, chat_file, resume=False):
+        self.dir = run_dir
+        self.manifest_path = os.path.join(run_dir, 'manifest.json')
+        self.reused = 0
+        self.lock = threading.Lock()  # tagger and parser results are saved by different threads (--stream)
+        manifest = None
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, encoding='utf8') as f:
+                manifest = json.load(f)
+            if resume:
+                sys.stderr.write(f"Resuming the run in {run_dir} ({len(manifest['results'])} saved results).\n")
+            else:
+                sys.stderr.write(f"Discarding the unfinished run in {run_dir} (use --resume to continue it).\n")
+                self._remove_files(manifest)
+                manifest = None
+        elif resume:
+            sys.stderr.write(f"No unfinished run in {run_dir}, starting from the beginning.\n")
+        os.makedirs(run_dir, exist_ok=True)
+        self.manifest = manifest or {'chat_file': chat_file, 'version': __version__, 'results': {}}
+        self._save_manifest()
+
+    @staticmethod
+    def key(kind, content):
+        return hashlib.sha256(f"{kind}\n{content}".encode('utf8')).hexdigest()
+
+    def get(self, kind, content):
+        """Returns the saved result for this input, or None."""
+        with self.lock:
+            entry = self.manifest['results'].get(self.key(kind, content))
+        if not entry: return None
+        try:
+            with open(os.path.join(self.dir, entry['file']), encoding='utf8', newline='') as f:
+                result = f.read()
+        except OSError:
+            return None
+        self.reused += 1
+        return result
+
+    def put(self, kind, content, result):
+        """Saves a result, then adds it to the manifest (a result listed there is always complete)."""
+        with self.lock:
+            name = f"{kind}-{len(self.manifest['results']) + 1:05d}.txt"
+            path = os.path.join(self.dir, name)
+            with open(path + '.tmp', 'w', encoding='utf8', newline='') as f:
+                f.write(result)
+            os.replace(path + '.tmp', path)
+            self.manifest['results'][self.key(kind, content)] = {'kind': kind, 'file': name}
+            self._save_manifest()
+
+    def _save_manifest(self):
+        with open(self.manifest_path + '.tmp', 'w', encoding='utf8') as f:
+            json.dump(self.manifest, f, indent=1)
+        os.replace(self.manifest_path + '.tmp', self.manifest_path)
+
+    def _remove_files(self, manifest):
+        for entry in manifest['results'].values():
+            path = os.path.join(self.dir, entry['file'])
+            if os.path.exists(path): os.unlink(path)
+        os.unlink(self.manifest_path)
+
+    def remove(self):
+        """Deletes the saved results of the finished run, and the directory if it is empty."""
+        self._remove_files(self.manifest)
+        try:
+            os.rmdir(self.dir)
+        except OSError:
+            pass
+
+#-------------------------------------------------------
+# Parser backends (--parser_backend)
+#-------------------------------------------------------
+class UDPipeRestBackend:
+    """
+    UDPipe REST server (v5.4): the Lindat API (default) or a server of your own (--api_url).
+    post() sends one chunk of CoNLL-U sentences and returns the HTTP response.
+    One keep-alive session is shared by the parser threads (--parse_workers), and by the files
+    processed at the same time (--file_jobs): at most --parse_workers requests are in flight.
+    """
+    def __init__(self, url, args):
+        self.url = url
+        self.args = args
+        self.slots = threading.BoundedSemaphore(max(1, args.parse_workers))
+        self.model_versions = {}  # model -> model version reported by the server, see model_version()
+        self.versions_lock = threading.Lock()
+        self.http = requests.Session()
+        pool_size = max(10, args.parse_workers)
+        self.http.mount('https://', requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size))
+        self.http.mount('http://', requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size))
+
+    def describe(self, model):
+        if self.url == LINDAT_API_URL:
+            return f"Lindat API with UDPipe model '{model}'"
+        return f"UDPipe server {self.url} with model '{model}'"
+
+    def parser_id(self, model):
+        """Identifies parser and model in the parse cache and in the run directory."""
+        return f"{self.url} {model}"
+
+    def model_version(self, model):
+        """
+        The model the server uses for the model name (e.g. 'french-gsd-ud-2.12-230717' for 'french'),
+        asked once with a one-word sentence. Part of the parse cache key, so that a model updated on
+        the server is not served from the cache. The model name if the server does not report it.
+        """
+        with self.versions_lock:
+            if model not in self.model_versions:
+                version = model
+                try:
+                    response = self.post("1\tx\t_\t_\t_\t_\t_\t_\t_\t_\n\n", model)
+                    if response.status_code == 200:
+                        version = response.json().get('model') or model
+                except (requests.RequestException, ValueError):
+                    pass
+                self.model_versions[model] = version
+            return self.model_versions[model]
+
+    def post(self, chunk_content, model):
+        """
+        Sends one chunk of CoNLL-U sentences to the server and returns the response.
+        Transient errors (429, 5xx, timeouts, connection errors) are retried with
+        exponential backoff (--api_retries, --api_backoff), honouring Retry-After.
+        The last response is returned, or the last exception raised.
+        """
+        params = {'model': model, 'input': 'conllu', 'tagger': '', 'parser': ''}
+        retries = max(0, self.args.api_retries)
+        for attempt in range(retries + 1):
+            retry_after = None
+            try:
+                with self.slots:
+                    response = self.http.post(self.url, data=params, files={'data': chunk_content}, timeout=self.args.api_timeout)
+                if response.status_code not in TRANSIENT_STATUS or attempt == retries:
+                    return response
+                reason = f"status {response.status_code}"
+                retry_after = response.headers.get('Retry-After')
+            except (requests.Timeout, requests.ConnectionError) as e:
+                if attempt == retries:
+                    raise
+                reason = type(e).__name__
+            delay = min(self.args.api_backoff * 2 ** attempt, 300)
+            if retry_after and retry_after.isdigit():
+                delay = max(delay, int(retry_after))
+            delay *= random.uniform(1, 1.25)  # don't let all workers retry at the same moment
+            sys.stderr.write(f"\n  API {reason}, retry {attempt + 1}/{retries} in {delay:.0f}s...")
+            sys.stderr.flush()
+            time.sleep(delay)
+
+    def close(self):
+        self.http.close()
+
+class UDPipeProcessBackend(UDPipeRestBackend):
+    """
+    Local UDPipe (v5.4): udpipe_server (part of UDPipe 1) is started once with the model file
+    given as --api_model, listens on a free local port for the whole run and is stopped at the end.
+    No rate limits: use --parse_workers to keep your cores busy.
+    """
+    def __init__(self, binary, model_file, args):
+        if not os.path.exists(model_file): sys.exit(f"UDPipe model file not found: {model_file}")
+        with socket.socket() as s:
+            s.bind(('127.0.0.1', 0))
+            port = s.getsockname()[1]
+        super().__init__(f"http://127.0.0.1:{port}/process", args)
+        self.binary = binary
+        self.model_file = model_file
+        self.model_name = os.path.basename(model_file)
+        sys.stderr.write(f"Starting {binary} on port {port}, loading model {model_file}...\n")
+        try:
+            self.proc = subprocess.Popen([binary, str(port), self.model_name, self.model_name, model_file, ''], stdout=subprocess.DEVNULL)
+        except OSError as e:
+            sys.exit(f"Cannot start UDPipe server '{binary}': {e}")
+        deadline = time.time() + 300
+        while True:
+            if self.proc.poll() is not None:
+                sys.exit(f"UDPipe server '{binary}' exited with status {self.proc.returncode}.")
+            try:
+                if self.http.get(f"http://127.0.0.1:{port}/models", timeout=5).status_code == 200: break
+            except requests.RequestException:
+                pass
+            if time.time() > deadline:
+                self.close()
+                sys.exit(f"UDPipe server '{binary}' did not start within 300s.")
+            time.sleep(0.5)
+
+    def describe(self, model):
+        return f"local UDPipe server ({self.binary}) with model '{self.model_file}'"
+
+    def parser_id(self, model):
+        return f"udpipe {os.path.abspath(self.model_file)}"
+
+    def model_version(self, model):
+        stat = os.stat(self.model_file)  # a replaced model file is a new version
+        return f"{stat.st_size} {stat.st_mtime_ns}"
+
+    def post(self, chunk_content, model):
+        return super().post(chunk_content, self.model_name)
+
+    def close(self):
+        super().close()
+        self.proc.terminate()
+        try:
+            self.proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+
+def make_parser_backend(args):
+    """The parser backend chosen by --parser_backend (v5.4), None without --api_model."""
+    if not args.api_model:
+        return None
+    if args.parser_backend == 'udpipe':
+        return UDPipeProcessBackend(args.udpipe_bin, args.api_model, args)
+    if args.parser_backend == 'rest' and not args.api_url:
+        sys.exit("--parser_backend rest requires --api_url (e.g. http://localhost:8001/process)")
+    return UDPipeRestBackend(args.api_url or LINDAT_API_URL, args)
+
+#-------------------------------------------------------
+# Batches and pipeline for --stream
+#-------------------------------------------------------
+class Utterance:
+    """
+    An utterance of the output tables (v5.4). The utterance-level fields are stored once and the
+    words as the tokenised string: the rows (one dict per word) are only built by rows() when
+    they are written, instead of being kept for the whole batch.
+    """
+    __slots__ = ('utt_id', 'utt_nr', 'speaker', 'child_project', 'language', 'child_other',
+                 'age', 'age_days', 'time_code', 'tokens', 'utterance', 'utt_clean')
+
+    def __init__(self, utt_id, utt_nr, speaker, child_project, language, child_other, age, age_days, time_code, tokens, utterance, utt_clean):
+        self.utt_id, self.utt_nr, self.speaker = utt_id, utt_nr, speaker
+        self.child_project, self.language, self.child_other = child_project, language, child_other
+        self.age, self.age_days, self.time_code = age, age_days, time_code
+        self.tokens, self.utterance, self.utt_clean = tokens, utterance, utt_clean
+
+    def words(self):
+        """Yields (w_nr, word), numbered as in the tagger input (empty words are skipped)."""
+        for wNr, w in enumerate(self.tokens.split(' '), 1):
+            if w: yield wNr, w
+
+    def rows(self):
+        """Yields one new row dict per word (the columns of the plain table)."""
+        for wNr, w in self.words():
+            yield {
+                'utt_id': f"{self.utt_id}_w{wNr}",
+                'utt_nr': self.utt_nr,
+                'w_nr': wNr,
+                'speaker': self.speaker,
+                'child_project': self.child_project,
+                'language': self.language,
+                'child_other': self.child_other,
+                'age': self.age,
+                'age_days': self.age_days,
+                'time_code': self.time_code,
+                'word': w,
+                'utterance': self.utterance,
+                'utt_clean': self.utt_clean
+            }
+
+class Batch:
+    """
+    The utterances read since the last batch (v5.4), with everything the stages of
+    finalize_output() need, so that reading can go on while the batch is processed.
+    """
+    def __init__(self, utterances, tagger_input, tagger, html_project):
+        self.utterances = utterances      # Utterance list, in the order of reading
+        self.index = {}                   # utt_id -> Utterances with this id, in order (for the HTML headers)
+        for utt in utterances: self.index.setdefault(utt.utt_id, []).append(utt)
+        self.tagger_input = tagger_input  # '<s_ID> tokens' lines
+        self.tagger = tagger              # TreeTagger fed with tagger_input, or None
+        self.html_project = html_project
+        self.itemPOS, self.itemLemmas, self.itemTagged = {}, {}, {}
+        self.conllu_input_file = None
+        self.parsed_conllu_str = None
+
+    def cleanup(self):
+        if self.tagger:
+            self.tagger.kill()
+            self.tagger = None
+        if self.conllu_input_file:
+            if os.path.exists(self.conllu_input_file): os.unlink(self.conllu_input_file)
+            self.conllu_input_file = None
+
+class Pipeline:
+    """
+    Runs stages on a sequence of items in threads connected by bounded queues (v5.4):
+    in --stream mode, batch k is written while batch k+1 is parsed and batch k+2 is tagged.
+    Each stage takes the items in order; put() blocks while the first queue is full (depth items).
+    done(item) is called after the last stage, or when the item is dropped after an error.
+    The first error of a stage (also SystemExit) is raised again by put() or close().
+    """
+    def __init__(self, stages, depth=2, done=None):
+        self.queues = [queue.Queue(maxsize=max(1, depth)) for _ in stages]
+        self.done = done
+        self.error = None
+        self.error_lock = threading.Lock()  # the first error wins
+        self.closed = False                 # the end of the items was put
+        self.threads = [threading.Thread(target=self._run_stage, args=(i, stage), daemon=True) for i, stage in enumerate(stages)]
+        for thread in self.threads: thread.start()
+
+    def _run_stage(self, i, stage):
+        last = i == len(self.queues) - 1
+        while (item := self.queues[i].get()) is not None:
+            if self.error is None:
+                try:
+                    stage(item)
+                except BaseException as e:
+                    self._fail(e)
+            if last or self.error is not None:
+                if self.done: self.done(item)
+            else:
+                self.queues[i + 1].put(item)
+        if not last:
+            self.queues[i + 1].put(None)
+
+    def _fail(self, e):
+        with self.error_lock:
+            if self.error is None: self.error = e
+
+    def put(self, item):
+        if self.error is not None: raise self.error
+        self.queues[0].put(item)
+
+    def close(self):
+        """Waits until all items have passed all stages."""
+        self.closed = True
+        self.queues[0].put(None)
+        for thread in self.threads: thread.join()
+        if self.error is not None: raise self.error
+
+    def abort(self):
+        """
+        Makes the stages drop the remaining items and waits for the threads to end
+        (a stage already running is finished first), so the backends can be closed after it.
+        """
+        self._fail(RuntimeError("pipeline aborted"))
+        if not self.closed:
+            self.closed = True
+            self.queues[0].put(None)
+        for thread in self.threads: thread.join()
 
 #-------------------------------------------------------
 # Main processing class
 #-------------------------------------------------------
 class ChatProcessor:
-    def __init__(self, args):
+    def __init__(self, args, parser=None):
         self.args = args
         self.pid = ''
         self.child = ''
@@ -266,81 +1075,55 @@ class ChatProcessor:
         self.age_days = 0
         self.sNr = 0 # This is now a global utterance counter
         self.childData = {}
-        self.outRows = []
+        self.utterances = []  # Utterances of the current batch, in the order of reading (see finalize_output)
+        self.pid_utt_nr = {}  # PID -> highest utterance number read, to detect ids used twice (whole run)
+        self.duplicate_pids = set()  # PIDs already reported for that
+        self.batch_utts = 0   # utterances in the current batch
+        self.output_files = {}
+        self.out_base = re.sub(r'\.cha(\.gz)?$', '', args.chat_file)
+        self.n_rejected = 0      # utterances rejected by the parser, see _reject_sentence()
+        self.chunk_limit = None  # maximum chunk size accepted by the API, see _parse_udpipe_chunk()
+        self.chunk_limit_lock = threading.Lock()  # chunk_limit is lowered by the parser threads
+        self.parse_cache = None
+        if args.api_model and args.parse_cache and not args.no_parse_cache:
+            self.parse_cache = ParseCache(args.parse_cache, args.parse_cache_size)
+        # v5.4: results are saved in a run directory, see --resume
+        self.checkpoint = None
+        if args.parameters or args.api_model:
+            self.checkpoint = RunCheckpoint(args.run_dir or self.out_base + '.run', args.chat_file, args.resume)
+        # v5.4: parser backend (--parser_backend), started last: the local server is stopped in run()
+        #       unless it was given by run_chat_files() for several files
+        self.own_parser = parser is None
+        self.parser = make_parser_backend(args) if parser is None else parser
         self.tagger_input_file = None
-        self.tagged_temp_file = None
-        self.conllu_input_file = None
+        self.tagger = None  # TreeTagger of the current batch, see add_utterance()
+        self.html_project = ''
+        self.pipeline = None  # --stream: stages of finalize_output() in threads, see run()
         self.html_exporter = None
         if args.html_dir:
             file_basename = os.path.basename(args.chat_file)
             file_basename = os.path.splitext(file_basename)[0]
-            self.html_exporter = HtmlExporter(args.html_dir, file_basename, chunk_size=args.chunk_html)
+            self.html_exporter = HtmlExporter(args.html_dir, file_basename, chunk_size=args.chunk_html, jobs=args.html_jobs)
 
-    def tokenise(self, s):
-        """
-        Tokenises a string, with language-specific rules.
-        Normally, in CHAT format punctuation should be separated by spaces already. (BeginChar/EndChar)
-        German clitics can't be handled: habs, gehts, etc.
-        """
-        if hasattr(self, 'language') and re.search(r'fra|french', self.language):
-            reBeginChar = re.compile(r'([\|\{\(\/\´\`"»«°<])') 
-            reEndChar = re.compile(r'([\]\|\}\/\`\"\),\;\:\!\?\.\%»«>])(?=\s|$)')   # also if followed by end of line
-            reBeginString = re.compile(r'([dcjlmnstDCJLNMST]\'|[Qq]u\'|[Jj]usqu\'|[Ll]orsqu\')') 
-            reEndString = re.compile(r'(-t-elles?|-t-ils?|-t-on|-ce|-elles?|-ils?|-je|-la|-les?|-leur|-lui|-mêmes?|-m\'|-moi|-nous|-on|-toi|-tu|-t\'|-vous|-en|-y|-ci|-là)') 
-            s = re.sub(reBeginString, r'\1 ', s)
-            s = re.sub(reBeginChar, r'\1 ', s)
-            s = re.sub(reEndChar, r' \1', s)
-            s = re.sub(reEndString, r' \1', s)
-            s = re.sub(r'\s+', ' ', s)
-        # Add other languages here with 'elif self.args.language == "other_language":'
-        elif hasattr(self, 'language') and re.search(r'ita|italian', self.language):
-            # Punctuation and delimiters like French
-            s = re.sub(r'([\|\{\(\/\´\`"»«°<])', r'\1 ', s)
-            s = re.sub(r'([\]\|\}\/\`\"\),\;\:\!\?\.\%»«>])(?=\s|$)', r' \1', s)
-            # Split apostrophe preceding a letter: l', un', c', d', gl', dell', quest', etc.
-            #   but NOT split apocope like "po' " (followed by space)
-            s = re.sub(r"([a-zA-Z]+')(?=[a-zA-Zà-úÀ-Ú])", r"\1 ", s)
-            s = re.sub(r'\s+', ' ', s)
-        elif hasattr(self, 'language') and re.search(r'eng|english', self.language):
-            s = re.sub(r'n\'t', r" n't", s)  # haven't -> have n't
-            s = re.sub(r"I'm", r"I 'm", s)  # it's -> it 's, I've -> I 've
-            s = re.sub(r'(\S)\'(s|ve|ll|d|re)', r"\1 '\2", s)  # it's -> it 's, I've -> I 've etc.
-        elif hasattr(self, 'language') and re.search(r'deu|german', self.language):
-            pass
-        else:
-            # Default simple tokenization if no language is matched
-            s = re.sub(r'([,;?.!])(?=\s|$)', r' \1', s)
-            s = re.sub(r'\s+', ' ', s)
-        return s
-
-    def tokens2conllu(self):
+    def tokens2conllu(self, batch):
         """Creates a basic CoNLL-U file from tokens when TreeTagger is not used."""
         sys.stderr.write("Creating temporary CoNLL-U file from tokens for parsing...\n")
         
         with tempfile.NamedTemporaryFile(mode='w', encoding='utf8', delete=False, suffix=".conllu.in") as temp_f:
-            self.conllu_input_file = temp_f.name
-
-        # Group words by utterance ID to reconstruct sentences
-        utterances = {}
-        for row in self.outRows:
-            utt_id_base = re.match(r'(.*)_w\d+', row['utt_id']).group(1)
-            if utt_id_base not in utterances:
-                utterances[utt_id_base] = []
-            # The word is at index 10 in the row dictionary
-            utterances[utt_id_base].append(row['word'])
-
-        with open(self.conllu_input_file, 'w', encoding='utf8') as f:
-            for utt_id, tokens in utterances.items():
-                f.write(f"# item_id = {utt_id}\n")
-                for idx, token in enumerate(tokens, 1):
+            batch.conllu_input_file = temp_f.name
+
+        with open(batch.conllu_input_file, 'w', encoding='utf8') as f:
+            for utt in batch.utterances:
+                f.write(f"# item_id = {utt.utt_id}\n")
+                for idx, (_, token) in enumerate(utt.words(), 1):
                     # Basic CoNLL-U: ID, FORM, and underscores for the rest
                     line = f"{idx}\t{token}\t_\t_\t_\t_\t_\t_\t_\t_\n"
                     f.write(line)
                 f.write("\n")
 
-    def correct_tagger_output(self, tagged):
+    def correct_tagger_output(self, tagged, language):
         """Corrects known tagger errors for a specific language."""
-        if hasattr(self, 'language') and re.search(r'fra|french', self.language):
+        if language and re.search(r'fra|french', language):
             tagged = re.sub(r'([,\?])_NAM=<unknown>', r'\1_PON=,', tagged)
             tagged, count = re.subn('Marie_VER:pres=marier', 'Marie_NAM=Marie', tagged)
             tagged, count = re.subn(r'( allez[^_ ]*)_([^= ]+)=<unknown>', r' \1_VER:impe=NEWLEM:aller', tagged)
@@ -356,7 +1139,7 @@ class ChatProcessor:
             tagged, count = re.subn(r'( vu[^_ ]*)_([^= ]+)=<unknown>', r' \1_VER=NEWLEM:voir', tagged)
             tagged, count = re.subn(r'( ![^_ ]*)_([^= ]+)=<unknown>', r' !_PON=!', tagged)
             tagged, count = re.subn('NEWLEM:', '', tagged)
-        elif hasattr(self, 'language') and re.search(r'deu|german', self.language):
+        elif language and re.search(r'deu|german', language):
             pass
         else:
             pass
@@ -367,6 +1150,7 @@ class ChatProcessor:
         Main entry point using a session-aware streaming parser. 
         v5.1. revised to handle headers correctly, using split after @End (instead of before @Begin).
               This includes @PID in the preamble before the first @Begin.
+        v5.4. line-oriented reader (iter_chat_blocks): memory is bounded by the largest block.
         """
         try:
             self.tagger_input_file = tempfile.NamedTemporaryFile(mode='w+', encoding='utf8', delete=False, suffix=".txt")
@@ -374,95 +1158,125 @@ class ChatProcessor:
             opener = gzip.open if self.args.chat_file.endswith('.gz') else open
             encoding = 'utf8'
 
+            # v5.4: stream the file block by block instead of reading and splitting it as a whole
+            # a batch holds one API chunk per parser thread
+            batch_size = self.args.chunk_parse * max(1, self.args.parse_workers) if self.args.stream else 0
+            if self.args.stream and self.args.queue_depth > 0:
+                # v5.4: tag, parse and write batches in parallel threads while reading on
+                self.pipeline = Pipeline([self._tag_batch, self._parse_batch, self._write_batch],
+                                         depth=self.args.queue_depth, done=Batch.cleanup)
             with opener(self.args.chat_file, 'rt', encoding=encoding) as f:
-                full_content = f.read()
-
-            session_blocks = filter(None, re.split(r'(?<=@End)', full_content))    # FIX v5.1: Split after @End 
-            
-            # Simple counter for logging (optional)
-            total_sessions = len(re.findall(r'@Begin', full_content)) 
-            if total_sessions == 0: total_sessions = 1 
-            sys.stderr.write(f"Found {total_sessions} session(s) to process.\n")
-            
-            session_blocks_list = list(session_blocks)
-            if not session_blocks_list:
-                 session_blocks_list = [full_content]
-
-            for i, session_content in enumerate(session_blocks_list):
-                sys.stderr.write(f"\rProcessing session {i}/{total_sessions}...")
-                sys.stderr.flush()
-
-                # 1. Parse headers
-                # Now that we split after @End, 'session_content' starts with the PID/ID headers
-                header_match = re.match(r'((?:(?:@|\t)[^\n]*\n)*)', session_content.lstrip())
-                if not header_match:
-                    # Skip empty blocks or blocks with only whitespace
-                    if not session_content.strip(): continue
-                    # Fallback: try to find header if it's not at the very top
-                    header_match = re.search(r'((?:(?:@|\t)[^\n]*\n)+)', session_content)
-                
-                if header_match:
-                    header_block = header_match.group(1)
-                    self.parse_header(header_block)
-                    
-                    # 2. Process Utterances using the self.pid set by parse_header
-                    # We start processing after the header block
-                    utterance_content = session_content[session_content.find(header_block) + len(header_block):]
-                    utterance_blocks = re.findall(r'(\*[^\n]*(?:\n(?![*@])[^\n]*)*)', utterance_content)
-
-                    for block in utterance_blocks:
-                        self.process_utterance_block(block)
-
-            sys.stderr.write("\nInitial parsing complete.\n")
+                if self.args.jobs > 1:
+                    n_sessions = self._run_sessions_parallel(f, batch_size)
+                else:
+                    session_nr, n_sessions = -1, 0
+                    for kind, block in iter_chat_blocks(f):
+                        if kind == 'header':
+                            session_nr += 1
+                            n_sessions += '@Begin' in block
+                            sys.stderr.write(f"\rProcessing session {session_nr}...")
+                            sys.stderr.flush()
+                            # 1. Parse headers (sets self.pid etc.)
+                            self.parse_header(block)
+                        else:
+                            # 2. Process utterances using the self.pid set by parse_header
+                            self.process_utterance_block(block)
+                            # v5.4: --stream processes and writes each batch before reading on
+                            if batch_size and self.batch_utts >= batch_size:
+                                sys.stderr.write("\n")
+                                self.finalize_output()
+
+            # v5.4: the sessions (@Begin) are counted while reading, the file is read once
+            sys.stderr.write(f"\nInitial parsing complete: {n_sessions} session(s).\n")
             self.finalize_output()
+            if self.pipeline:
+                self.pipeline.close()
+                self.pipeline = None
+            self.close_output()
+            if self.checkpoint:
+                if self.checkpoint.reused:
+                    sys.stderr.write(f"Resumed run: {self.checkpoint.reused} saved result(s) reused.\n")
+                if not self.args.keep_run_dir:
+                    self.checkpoint.remove()
 
         finally:
+            if self.pipeline: self.pipeline.abort()
+            for f in self.output_files.values(): f.close()
+            self._reset_batch()
             if self.tagger_input_file: self.tagger_input_file.close(); os.unlink(self.tagger_input_file.name)
-            if self.tagged_temp_file: self.tagged_temp_file.close(); os.unlink(self.tagged_temp_file.name)
-            if self.conllu_input_file and os.path.exists(self.conllu_input_file): os.unlink(self.conllu_input_file)
+            if self.parse_cache: self.parse_cache.close()
+            if self.parser and self.own_parser: self.parser.close()
+
+    def _run_sessions_parallel(self, chat_lines, batch_size):
+        """
+        --jobs N (v5.4): the utterances of each session are cleaned and tokenised by N worker processes.
+        Headers, utterance numbers (sNr per PID) and rows are added here in the order of the file,
+        so the output is the same as that of the serial run. The language of each session is
+        decided here by the rule of parse_header(): the @ID language of its header, '' without
+        @ID lines (the language of the previous session is not kept, in the serial run neither).
+        Returns the number of sessions.
+        """
+        def add_session(session_nr, header, future):
+            sys.stderr.write(f"\rProcessing session {session_nr}...")
+            sys.stderr.flush()
+            self.parse_header(header)
+            for prepared in future.result():
+                self.add_utterance(prepared)
+                if batch_size and self.batch_utts >= batch_size:
+                    sys.stderr.write("\n")
+                    self.finalize_output()
+
+        pending, n_sessions = deque(), 0
+        # spawn: forking would copy the locks of the pipeline and parser threads in any state
+        with ProcessPoolExecutor(max_workers=self.args.jobs, mp_context=multiprocessing.get_context('spawn')) as pool:
+            for session_nr, (header, blocks) in enumerate(iter_chat_sessions(chat_lines)):
+                pending.append((session_nr, header, pool.submit(prepare_session, header_language(header), blocks)))
+                n_sessions += '@Begin' in header
+                if len(pending) > 4 * self.args.jobs:  # bounded read-ahead
+                    add_session(*pending.popleft())
+            while pending:
+                add_session(*pending.popleft())
+        return n_sessions
 
     def process_utterance_block(self, block):
-        block = re.sub(r'\n\s+', ' ', block, flags=re.DOTALL)
-        timeCode = (m.group(1) if (m := re.search(r'\x15(\d+_\d+)\x15', block)) else '')
-        block_no_time = re.sub(r'\s*\x15.*?\x15', '', block) # remove including spaces
-        
-        if not (m := re.search(r'^\*([A-Z0-9]+):\s+(.*)', block_no_time.strip())):
+        self.add_utterance(prepare_utterance(block, getattr(self, 'language', None)))
+
+    def add_utterance(self, prepared):
+        """Numbers an utterance prepared by prepare_utterance() and adds its rows and tagger input."""
+        if prepared is None:
             return
-        
-        speaker, utt = m.groups()
+        speaker, raw_utt, timeCode, splitUtt, tokens = prepared
         self.sNr += 1
+        self.batch_utts += 1
         uttID = f"{self.pid}_u{self.sNr}"
         
-        splitUtt = cleanUtt(utt)
         if self.args.parameters is not None:
-            self.tagger_input_file.write(f"<s_{uttID}> {self.tokenise(splitUtt)}\n")
+            line = f"<s_{uttID}> {tokens}\n"
+            self.tagger_input_file.write(line)
+            # v5.4: tag while reading
+            if self.tagger is None:
+                tagger_bin, param_file = './tree-tagger', self.args.parameters
+                if not all(map(os.path.exists, [tagger_bin, param_file])): sys.exit(f"Tagger binary or param file not found. Checked: {tagger_bin}, {param_file}")
+                self.tagger = TreeTagger([tagger_bin, param_file, '-token', '-lemma', '-sgml'], self.args.tagger_jobs)
+            self.tagger.write(line)
         
-        self.generate_rows_from_tagger(splitUtt, utt.strip(), speaker, uttID, timeCode)
+        self.generate_rows_from_tagger(splitUtt, raw_utt, speaker, uttID, timeCode, tokens)
 
-    def generate_rows_from_tagger(self, splitUtt, raw_utt, speaker, uttID, timeCode):
+    def generate_rows_from_tagger(self, splitUtt, raw_utt, speaker, uttID, timeCode, tokens):
         clean_val = splitUtt if self.args.utt_clean else ''
-        words = self.tokenise(splitUtt).split(' ')
         
+        if not tokens.strip(' '): return  # no words, hence no rows
+
         age, age_days, child_other, child_project_id = self.get_speaker_age(speaker)
-        
-        for wNr, w in enumerate(words, 1):
-            if not w: continue
-            
-            self.outRows.append({
-                'utt_id': f"{uttID}_w{wNr}", 
-                'utt_nr': self.sNr, 
-                'w_nr': wNr, 
-                'speaker': speaker, 
-                'child_project': child_project_id,
-                'language': self.language,
-                'child_other': child_other, 
-                'age': age, 
-                'age_days': age_days, 
-                'time_code': timeCode, 
-                'word': w, 
-                'utterance': raw_utt, 
-                'utt_clean': clean_val
-            })
+        # v5.4: one record per utterance, the rows of its words are built when they are written.
+        # A PID that comes back after another one starts again at u1: the ids repeat, the rows are kept.
+        if self.sNr <= self.pid_utt_nr.get(self.pid, 0) and self.pid not in self.duplicate_pids:
+            self.duplicate_pids.add(self.pid)
+            sys.stderr.write(f"Warning: utterance id {uttID} is used more than once (PID {self.pid} was read before).\n"
+                             f"         The rows of all utterances are kept, but their utt_id values are not unique.\n")
+        self.pid_utt_nr[self.pid] = max(self.sNr, self.pid_utt_nr.get(self.pid, 0))
+        self.utterances.append(Utterance(uttID, self.sNr, speaker, child_project_id, self.language, child_other,
+                                          age, age_days, timeCode, tokens, raw_utt, clean_val))
     
     def parse_header(self, header_block):
         self.childData = {}
@@ -479,8 +1293,7 @@ class ChatProcessor:
         # 2. Extract Project and Language from the first @ID line found
         if m_id_gen := re.search(r'@ID:\s+(.*?)\|(.*?)\|', header_block):
             self.language, self.project = m_id_gen.groups()
-            if self.html_exporter:
-                self.html_exporter.project = self.project
+            self.html_project = self.project  # for the html file names, passed on with the batch
         # 3. Build a map of Speaker Code -> Real Name from @Participants
         code_to_name = {}
         clean_header = re.sub(r'\n\t', ' ', header_block)
@@ -593,200 +1406,216 @@ class ChatProcessor:
             # sys.exit(1)
 
     def finalize_output(self, *args, **kwargs):
-        """Final processing: run tagger and/or parser, write output files"""
-        if not self.outRows:
-            sys.stderr.write("\nNo data rows were generated. Exiting.\n")
+        """
+        Final processing: run tagger and/or parser, write output files
+        v5.4: processes the rows read so far (one batch in --stream mode, else the whole corpus)
+              and appends them to the output files, which stay open until close_output().
+              The stages (_tag_batch, _parse_batch, _write_batch) run in the pipeline threads if
+              there is one (--stream), else right here.
+        """
+        if not self.utterances:
+            self._reset_batch()
             return
 
-        itemPOS, itemLemmas, itemTagged = {}, {}, {}
-        parsed_conllu_str = None
-        
+        tagger_input = ''
         if self.args.parameters:
             self.tagger_input_file.seek(0)
-            taggerInput = self.tagger_input_file.read()
-            if taggerInput:
-                _, itemPOS, itemLemmas, itemTagged = self.run_treetagger(taggerInput)
+            tagger_input = self.tagger_input_file.read()
+        batch = Batch(self.utterances, tagger_input, self.tagger, self.html_project)
+        self.tagger = None
+        self._reset_batch()
+        if self.pipeline:
+            self.pipeline.put(batch)
+            return
+        try:
+            self._tag_batch(batch)
+            self._parse_batch(batch)
+            self._write_batch(batch)
+        finally:
+            batch.cleanup()
 
+    def _tag_batch(self, batch):
+        if self.args.parameters and batch.tagger_input:
+            _, batch.itemPOS, batch.itemLemmas, batch.itemTagged = self.run_treetagger(batch)
+
+    def _parse_batch(self, batch):
         if self.args.api_model:
-            if not self.conllu_input_file or not os.path.exists(self.conllu_input_file):
-                self.tokens2conllu()
+            if not batch.conllu_input_file or not os.path.exists(batch.conllu_input_file):
+                self.tokens2conllu(batch)
             
-            if self.conllu_input_file and os.path.exists(self.conllu_input_file):
-                parsed_conllu_str = self.run_udpipe_api(self.conllu_input_file, self.args.api_model, chunk_size=self.args.chunk_parse)
+            if batch.conllu_input_file and os.path.exists(batch.conllu_input_file):
+                batch.parsed_conllu_str = self.run_udpipe_api(batch.conllu_input_file, self.args.api_model, chunk_size=self.args.chunk_parse)
 
+    def _write_batch(self, batch):
+        """Appends the rows of the batch to the output files (tables, CoNLL-U, HTML)."""
         if not self.args.parameters and not self.args.api_model:
-            final_csv_path = re.sub(r'\.cha(\.gz)?$', '', self.args.chat_file) + '.csv'
-            header = ['utt_id', 'utt_nr', 'w_nr', 'speaker', 'child_project', 'language', 'child_other', 'age', 'age_days', 'time_code', 'word', 'utterance', 'utt_clean']
-            with open(final_csv_path, 'w', newline='', encoding='utf8') as f:
-                writer = csv.DictWriter(f, delimiter='\t', fieldnames=header, extrasaction='ignore', quoting=csv.QUOTE_NONE, escapechar='\\', quotechar='|')
-                writer.writeheader()
-                writer.writerows(self.outRows)
-            sys.stderr.write(f"\n  OUTPUT: {final_csv_path}\n")
+            if 'csv' not in self.output_files:
+                final_csv_path = self.out_base + '.csv'
+                header = ['utt_id', 'utt_nr', 'w_nr', 'speaker', 'child_project', 'language', 'child_other', 'age', 'age_days', 'time_code', 'word', 'utterance', 'utt_clean']
+                f = self.output_files['csv'] = open(final_csv_path, 'w', newline='', encoding='utf8')
+                self.csv_writer = csv.DictWriter(f, delimiter='\t', fieldnames=header, extrasaction='ignore', quoting=csv.QUOTE_NONE, escapechar='\\', quotechar='|')
+                self.csv_writer.writeheader()
+            self.csv_writer.writerows(row for utt in batch.utterances for row in utt.rows())
             return
             
-        html_links, conllu_data = {}, {}
+        itemPOS, itemLemmas, itemTagged = batch.itemPOS, batch.itemLemmas, batch.itemTagged
+        parsed_conllu_str = batch.parsed_conllu_str
+        html_links = {}
         if parsed_conllu_str:
-            conllu_data = self._parse_conllu_output(parsed_conllu_str)
             if self.html_exporter:
-                html_links = self.html_exporter.export(parsed_conllu_str, self.outRows)
+                self.html_exporter.project = batch.html_project
+                html_links = self.html_exporter.export(parsed_conllu_str, batch.index)
             if self.args.write_conllu:
-                conllu_output_path = re.sub(r'\.cha(\.gz)?$', '', self.args.chat_file) + '.conllu'
-                with open(conllu_output_path, 'w', encoding='utf8') as f_conllu:
-                    f_conllu.write(parsed_conllu_str)
-                sys.stderr.write(f"Generated standalone CoNLL-U file: {conllu_output_path}\n")
-
+                conllu_output_path = self.out_base + '.conllu'
+                if 'conllu' not in self.output_files:
+                    self.output_files['conllu'] = open(conllu_output_path, 'w', encoding='utf8')
                 # version 5.2: Apply Grew Rewrite if requested
                 if self.args.rewrite:
-                    self.apply_grew_rewrite(conllu_output_path, self.args.rewrite)
-                    # reload the data so that CSV/HTML below use the corrected version
-                    with open(conllu_output_path, 'r', encoding='utf8') as f:
-                        parsed_conllu_str = f.read()
-                    conllu_data = self._parse_conllu_output(parsed_conllu_str)
-
-        # Process rows and write initial FULL parsed CSV
+                    # v5.4: rewrite the current batch in a temporary file, then append it
+                    with tempfile.NamedTemporaryFile(mode='w', encoding='utf8', delete=False, suffix=".conllu") as temp_f:
+                        temp_f.write(parsed_conllu_str)
+                    try:
+                        self.apply_grew_rewrite(temp_f.name, self.args.rewrite)
+                        # reload the data so that CSV/HTML below use the corrected version
+                        with open(temp_f.name, 'r', encoding='utf8') as f:
+                            parsed_conllu_str = f.read()
+                    finally:
+                        os.unlink(temp_f.name)
+                self.output_files['conllu'].write(parsed_conllu_str)
+
+        # Process rows and write the FULL and the light table
         sys.stderr.write("Output tables:\n")
-        sys.stderr.write("- Processing rows and writing initial parsed CSV...\n")
-        parsed_csv_path = re.sub(r'\.cha(\.gz)?$', '', self.args.chat_file) + '.parsed.csv'
-        light_csv_path = re.sub(r'\.cha(\.gz)?$', '', self.args.chat_file) + '.light.csv' # Define light path here
+        sys.stderr.write("- Processing rows and writing parsed and light tables...\n")
+        parsed_csv_path = self.out_base + '.parsed.csv'
+        light_csv_path = self.out_base + '.light.csv' # Define light path here
 
         header_parsed = ['utt_id', 'utt_nr', 'w_nr', 'URLwww', 'URLloc', 'speaker', 'child_project', 'language', 'child_other', 'age', 'age_days', 'time_code', 'word', 'lemma', 'pos', 'utterance', 'utt_clean', 'utt_tagged']
         header_parsed.extend([f'conll_{i}' for i in range(1, 11)])
         header_light = ['utt_id', 'utt_nr', 'w_nr', 'URLwww', 'URLloc', 'speaker', 'child_project', 'language', 'child_other', 'age', 'age_days', 'word', 'lemma', 'pos', 'utterance', 'utt_clean', 'utt_tagged'] # Define light header
 
-        processed_rows_for_initial_write = [] # Store processed rows temporarily
-
-        for row_orig in self.outRows:
-            row = row_orig.copy()
-            uID, wID_str = re.match(r'(.*)_w(\d+)', row['utt_id']).groups()
-            wID = int(wID_str)
-
-            # Add tagger info safely
-            try:
-                if itemPOS: row['pos'] = itemPOS.get(uID, ['_'] * wID)[wID - 1]
-                if itemLemmas: row['lemma'] = itemLemmas.get(uID, ['_'] * wID)[wID - 1]
-            except IndexError:
-                row['pos'] = '_'
-                row['lemma'] = '_'
-
-            if self.args.utt_tagged and itemTagged: row['utt_tagged'] = itemTagged.get(uID, '')
-
-            # Add CoNLL-U data
-            conll_row = conllu_data.get(row['utt_id'], [])
-            for i, col_val in enumerate(conll_row): row[f'conll_{i+1}'] = col_val
-
-            # Use CoNLL-U pos/lemma if tagger wasn't used
-            if not self.args.parameters and self.args.api_model and len(conll_row) > 3:
-                row['pos'] = conll_row[3] if len(conll_row) > 3 and conll_row[3] else '_'
-                row['lemma'] = conll_row[2] if len(conll_row) > 2 and conll_row[2] else '_'
-
-            # Utterance filtering logic (applied again later for light version)
-            if self.args.pos_utterance and not re.search(self.args.pos_utterance, row.get('pos', '')):
-                 row['utterance'] = row['utt_clean'] = row['utt_tagged'] = ''
-
-            # Construct Hyperlink Strings (with doubled quotes inside)
-            local_url_formula = ''
-            server_url_formula = ''
-            link_info = html_links.get(uID)
-            if link_info:
-                rel_local_path = os.path.relpath(link_info['local']).replace(os.path.sep, '/')
-                local_url = f"http://localhost/{rel_local_path}#{uID}"
-                local_url_formula = f'=HYPERLINK("{local_url}"; "LOC")'
-                if self.args.server_url:
-                    server_url = f"{self.args.server_url.rstrip('/')}/{link_info['file']}#{uID}"
-                    server_url_formula = f'=HYPERLINK("{server_url}"; "WWW")'
-
-            row['URLloc'] = local_url_formula
-            row['URLwww'] = server_url_formula
-
-            processed_rows_for_initial_write.append(row)
-
-        # DictWriter messes up the =HYPERLINK() formulas by quoting them.
-        # - Step 1 write without quotes, use dummy escapechar (required by csv module)
-        tmp_file = parsed_csv_path + ".tmp"
-        sys.stderr.write(f"- Writing temporary tabular output to {tmp_file}\n")
-        with open(tmp_file, 'w', newline='', encoding='utf8') as f_parsed:
-            writer_parsed = csv.DictWriter(f_parsed, delimiter='\t', fieldnames=header_parsed,
-                                           extrasaction='ignore', quoting=csv.QUOTE_NONE, escapechar='\x1e')
-            writer_parsed.writeheader()
-            writer_parsed.writerows(processed_rows_for_initial_write)
-
         """
-        "Manual" export step to final CSV files (workaround to preserve valid URLs) 
-        (DictWriter unwantedly quotes URLs and makes them uninterpretable in Spreadsheet)
-        In this step, we also apply utterance filtering for light version.
-        This is not elegant, but avoids the csv module.
+        The tables are written "manually" (v5.4: in one pass, instead of csv.DictWriter to a temporary
+        file that was read back): the csv module unwantedly quotes the =HYPERLINK() formulas and makes
+        them uninterpretable in a spreadsheet. Cells are cleaned by tsv_field().
         """
-        # - Step 2 read temp file and delete escapechar
-        sys.stderr.write("- Reading back temporary CSV and writing final files manually...\n")
-
-        light_csv_path = parsed_csv_path.replace("parsed", "light")  # *.light.csv
-
-        def clean_val(x: str) -> str:
-            # Remove the dummy escape char that we inserted with csv module
-            return x.replace("\x1e", "") if isinstance(x, str) else ""
-
-        # filter light version for pos_output constraint
-        def keep_light(row: dict) -> bool:
-            pos_val = row.get('pos', '')
-            if re.search(re.compile(self.args.pos_output), pos_val):
-                return True  # print row
-            else:
-                return False # skip row
-
-        with open(tmp_file, mode='r', encoding='utf-8', newline='') as infile, \
-            open(parsed_csv_path, mode='w', encoding='utf-8', newline='') as f_parsed, \
-            open(light_csv_path, mode='w', encoding='utf-8', newline='') as f_light:
-
-            # Parse the temp file as TSV; no quoting, same escapechar you used in Step 1
-            reader = csv.DictReader(infile, delimiter='\t', quoting=csv.QUOTE_NONE, escapechar='\x1e')
-
+        if 'parsed' not in self.output_files:
             # Write headers manually (no quoting)
-            f_parsed.write('\t'.join(header_parsed) + '\n')
-            f_light.write('\t'.join(header_light) + '\n')
-
-            for row in reader:
-                # Clean values for the full file
-                full_vals = [clean_val(row.get(col, "")) for col in header_parsed]
+            self.output_files['parsed'] = open(parsed_csv_path, mode='w', encoding='utf-8', newline='')
+            self.output_files['light'] = open(light_csv_path, mode='w', encoding='utf-8', newline='')
+            self.output_files['parsed'].write('\t'.join(header_parsed) + '\n')
+            self.output_files['light'].write('\t'.join(header_light) + '\n')
+        f_parsed, f_light = self.output_files['parsed'], self.output_files['light']
+        re_pos_output = re.compile(self.args.pos_output)  # filter of the light version
+        pos_col = header_parsed.index('pos')
+        light_cols = [header_parsed.index(col) for col in header_light]
+
+        conllu_sentences = join_conllu_sentences(parsed_conllu_str, [utt.utt_id for utt in batch.utterances]) if parsed_conllu_str else None
+        occurrences = {}  # utt_id -> utterances with this id so far (their HTML links are in the same order)
+        for utt in batch.utterances:  # v5.4: the rows are built here and completed in place
+            conllu_tokens = next(conllu_sentences) if conllu_sentences else []
+            occurrence = occurrences[utt.utt_id] = occurrences.get(utt.utt_id, -1) + 1
+            links = html_links.get(utt.utt_id, [])
+            link_info = links[occurrence] if occurrence < len(links) else None
+            for row in utt.rows():
+                uID, wID = utt.utt_id, row['w_nr']
+
+                # Add tagger info safely
+                try:
+                    if itemPOS: row['pos'] = itemPOS.get(uID, ['_'] * wID)[wID - 1]
+                    if itemLemmas: row['lemma'] = itemLemmas.get(uID, ['_'] * wID)[wID - 1]
+                except IndexError:
+                    row['pos'] = '_'
+                    row['lemma'] = '_'
+
+                if self.args.utt_tagged and itemTagged: row['utt_tagged'] = itemTagged.get(uID, '')
+
+                # Add CoNLL-U data
+                conll_row = (conllu_tokens[wID - 1] if wID <= len(conllu_tokens) else None) or []
+                for i, col_val in enumerate(conll_row): row[f'conll_{i+1}'] = col_val
+
+                # Use CoNLL-U pos/lemma if tagger wasn't used
+                if not self.args.parameters and self.args.api_model and len(conll_row) > 3:
+                    row['pos'] = conll_row[3] if len(conll_row) > 3 and conll_row[3] else '_'
+                    row['lemma'] = conll_row[2] if len(conll_row) > 2 and conll_row[2] else '_'
+
+                # Utterance filtering logic (applied again later for light version)
+                if self.args.pos_utterance and not re.search(self.args.pos_utterance, row.get('pos', '')):
+                     row['utterance'] = row['utt_clean'] = row['utt_tagged'] = ''
+
+                # Construct Hyperlink Strings (with doubled quotes inside)
+                local_url_formula = ''
+                server_url_formula = ''
+                if link_info:
+                    rel_local_path = os.path.relpath(link_info['local']).replace(os.path.sep, '/')
+                    local_url = f"http://localhost/{rel_local_path}#{uID}"
+                    local_url_formula = f'=HYPERLINK("{local_url}"; "LOC")'
+                    if self.args.server_url:
+                        server_url = f"{self.args.server_url.rstrip('/')}/{link_info['file']}#{uID}"
+                        server_url_formula = f'=HYPERLINK("{server_url}"; "WWW")'
+
+                row['URLloc'] = local_url_formula
+                row['URLwww'] = server_url_formula
+
+                full_vals = [tsv_field(row.get(col)) for col in header_parsed]
                 f_parsed.write('\t'.join(full_vals) + '\n')
-
-                # Build + optionally filter light rows
-                if keep_light(row):
-                    light_vals = [clean_val(row.get(col, "")) for col in header_light]
-                    f_light.write('\t'.join(light_vals) + '\n')
-
-        sys.stderr.write(f"- Full table (one row per token): {parsed_csv_path}\n")
-        sys.stderr.write(f"- Light table (selected columns and filtered tokens): {light_csv_path}\n")
-        os.unlink(tmp_file)  # delete temp file after writing
-
-    def _parse_conllu_output(self, conllu_str):
-        conllu_data = {}
-        current_item_id = None
-        for line in conllu_str.splitlines():
-            if line.startswith('#'):
-                if match := re.match(r"#\s*item_id\s*=\s*(.*)", line):
-                    current_item_id = match.group(1).strip()
-                continue
-            if current_item_id and line:
-                cols = line.split('\t')
-                if len(cols) >= 2 and cols[0].isdigit():
-                    unique_id = f"{current_item_id}_w{cols[0]}"
-                    conllu_data[unique_id] = cols
-        return conllu_data
-
-    def run_treetagger(self, tagger_input):
+                if re_pos_output.search(full_vals[pos_col]):
+                    f_light.write('\t'.join([full_vals[i] for i in light_cols]) + '\n')
+
+    def _reset_batch(self):
+        """Forgets the rows and the tagger input read since the last batch."""
+        self.utterances = []
+        self.batch_utts = 0
+        if self.tagger_input_file:
+            self.tagger_input_file.seek(0); self.tagger_input_file.truncate()
+        if self.tagger:
+            self.tagger.kill()
+            self.tagger = None
+
+    def close_output(self):
+        """Closes the output files opened by finalize_output() and reports them."""
+        if self.html_exporter:
+            self.html_exporter.close()
+        if self.parse_cache:
+            cache = self.parse_cache
+            sys.stderr.write(f"Parse cache {cache.path}: {cache.hits} hits, {cache.misses} misses, {cache.size / 1024 / 1024:.1f} MB\n")
+        if not self.output_files:
+            sys.stderr.write("\nNo data rows were generated. Exiting.\n")
+            return
+        for f in self.output_files.values():
+            f.close()
+        if 'csv' in self.output_files:
+            sys.stderr.write(f"\n  OUTPUT: {self.output_files['csv'].name}\n")
+        if 'conllu' in self.output_files:
+            sys.stderr.write(f"Generated standalone CoNLL-U file: {self.output_files['conllu'].name}\n")
+        if 'parsed' in self.output_files:
+            sys.stderr.write(f"- Full table (one row per token): {self.output_files['parsed'].name}\n")
+            sys.stderr.write(f"- Light table (selected columns and filtered tokens): {self.output_files['light'].name}\n")
+        if 'rejected' in self.output_files:
+            sys.stderr.write(f"WARNING: {self.n_rejected} utterance(s) rejected by the parser, without CoNLL-U columns: {self.output_files['rejected'].name}\n")
+        self.output_files = {}
+
+    def run_treetagger(self, batch):
+        """
+        Returns the tagger output for the sentences of the batch (batch.tagger_input).
+        v5.4: the sentences were written to the tagger by add_utterance(), here its output is collected.
+        """
         sys.stderr.write("Calling TreeTagger...\n")
-        tagger_bin, param_file = './tree-tagger', self.args.parameters
-        if not all(map(os.path.exists, [tagger_bin, param_file])): sys.exit(f"Tagger binary or param file not found. Checked: {tagger_bin}, {param_file}")
-        self.tagged_temp_file = tempfile.NamedTemporaryFile(mode='w+', encoding='utf8', delete=False, suffix=".txt")
-        self.tagged_temp_file.write(re.sub(' +', '\n', tagger_input)); self.tagged_temp_file.flush()
-        with open(self.tagged_temp_file.name, 'r') as f_in:
-            tagged = subprocess.check_output([tagger_bin, param_file, '-token', '-lemma', '-sgml'], stdin=f_in).decode('utf8')
+        checkpoint_id = f"{os.path.abspath(self.args.parameters)}\n{batch.tagger_input}"
+        tagged = self.checkpoint.get('tagger', checkpoint_id) if self.checkpoint else None
+        if tagged is not None:
+            sys.stderr.write("  Resuming: tagger output of this batch was saved before.\n")
+            batch.tagger.kill()
+        else:
+            tagged = batch.tagger.finish()
+            if self.checkpoint: self.checkpoint.put('tagger', checkpoint_id, tagged)
+        batch.tagger = None
         tagged = process_tagged_data(tagged)
         if self.args.api_model:
             with tempfile.NamedTemporaryFile(mode='w', encoding='utf8', delete=False, suffix=".conllu.in") as temp_f:
-                self.conllu_input_file = temp_f.name
-            self.tagged2conllu(tagged, self.conllu_input_file)
+                batch.conllu_input_file = temp_f.name
+            self.tagged2conllu(tagged, batch.conllu_input_file)
         words, pos, lemmas, tagged_sents = {}, {}, {}, {}
+        languages = {utt.utt_id: utt.language for utt in batch.utterances}   # a batch can span sessions
         sentences = re.split(r'(<s_([^>]+)>)', tagged)
         for i in range(1, len(sentences), 3):
             key = sentences[i+1]
@@ -797,7 +1626,7 @@ class ChatProcessor:
             lemmas[key] = [parts[2] for parts in lines]
             content_oneline = re.sub(r'\t([A-Za-z:]+)\t', r'_\1=', content_multiline)
             content_oneline = re.sub(r'\n', ' ', content_oneline)
-            content_oneline = self.correct_tagger_output(content_oneline)
+            content_oneline = self.correct_tagger_output(content_oneline, languages.get(key, ''))
             tagged_sents[key] = content_oneline.strip()
         return words, pos, lemmas, tagged_sents
 
@@ -821,95 +1650,302 @@ class ChatProcessor:
                 f.write("\n")
 
     def run_udpipe_api(self, input_file, model, chunk_size):
-        API_URL = "https://lindat.mff.cuni.cz/services/udpipe/api/process"
-        sys.stderr.write(f"Calling Lindat API with UDPipe model '{model}'...\n")
+        """
+        Sends the CoNLL-U input file to the UDPipe API in chunks of chunk_size sentences.
+        v5.4: up to --parse_workers chunks are in flight at the same time (shared keep-alive session),
+              results are reassembled in the original order.
+              Sentences found in the parse cache (--parse_cache) are not sent.
+        """
+        workers = max(1, self.args.parse_workers)
+        sys.stderr.write(f"Calling {self.parser.describe(model)}...\n")
         with open(input_file, 'r', encoding='utf8') as f:
             full_content = f.read()
         sentences = full_content.strip().split('\n\n')
-        total_chunks = (len(sentences) + chunk_size - 1) // chunk_size
+        del full_content
+
+        # Look up the parse cache, send only the missing sentences
+        sentence_out = None
+        todo = range(len(sentences))
+        if self.parse_cache:
+            parser_id = f"{self.parser.parser_id(model)} {self.parser.model_version(model)}"
+            split = [self.parse_cache.split_sentence(sent) for sent in sentences]
+            keys = [self.parse_cache.key(parser_id, tokens) for _, tokens in split]
+            found = self.parse_cache.get_many(keys)  # key -> token lines, extended by parsed chunks
+            sentence_out = [None] * len(sentences)
+            # repeated utterances are sent only once, see below
+            first, todo = {}, []
+            for n, k in enumerate(keys):
+                if k not in found and k not in first:
+                    first[k] = n
+                    todo.append(n)
+            n_found = sum(1 for k in keys if k in found)
+            sys.stderr.write(f"  Parse cache: {n_found} of {len(sentences)} utterances found, {len(todo)} different utterances to parse.\n")
+
+        chunk_ids = [todo[i:i + chunk_size] for i in range(0, len(todo), chunk_size)]
+        chunks = ["\n\n".join(sentences[n] for n in ids) for ids in chunk_ids]
+        total_chunks = len(chunks)
         parsed_results = []
-        for i in range(0, len(sentences), chunk_size):
-            chunk = sentences[i:i + chunk_size]
-            chunk_content = "\n\n".join(chunk)
-            current_chunk_num = i//chunk_size + 1
-            eta = round(len(chunk) / 330)
-            progress_msg = f"\r  Sending chunk {current_chunk_num}/{total_chunks} ({len(chunk)} utterances) to API. Processing time ~{eta}s..."
-            sys.stderr.write(progress_msg)
-            sys.stderr.flush()
-            params = {'model': model, 'input': 'conllu', 'tagger': '', 'parser': ''}
-            response = requests.post(API_URL, data=params, files={'data': chunk_content})
-            if response.status_code == 200:
-                result = response.json().get('result')
+        if total_chunks:
+            eta = round(len(todo) / 330 / min(workers, total_chunks))
+            sys.stderr.write(f"  Sending {total_chunks} chunk(s) to API, {min(workers, total_chunks)} at a time. Processing time ~{eta}s...\n")
+        # v5.4: chunks parsed by an interrupted run are taken from the run directory (--resume).
+        # With the parse cache, the cache does this job (the chunks of a resumed run differ).
+        saved = [None] * total_chunks
+        if self.checkpoint and not self.parse_cache:
+            checkpoint_ids = [f"{self.parser.parser_id(model)}\n{chunk_content}" for chunk_content in chunks]
+            saved = [self.checkpoint.get('parse', cid) for cid in checkpoint_ids]
+            n_saved = sum(1 for result in saved if result is not None)
+            if n_saved:
+                sys.stderr.write(f"  Resuming: {n_saved} of {total_chunks} chunk(s) were parsed before.\n")
+        pool = ThreadPoolExecutor(max_workers=workers)
+        try:
+            futures = [pool.submit(self._parse_udpipe_chunk, chunk_content, model) if saved[i] is None else None
+                       for i, chunk_content in enumerate(chunks)]
+            failed = []
+            for i, future in enumerate(futures):
+                current_chunk_num = i + 1
+                ids = chunk_ids[i]
+                try:
+                    result = future.result() if future else saved[i]
+                except UDPipeError as e:
+                    if e.status is None or e.status in TRANSIENT_STATUS:
+                        # v5.4: keep going, so that the other chunks are parsed (and saved)
+                        sys.stderr.write(f"\nError: API call for chunk {current_chunk_num} failed with {e}\n")
+                        failed.append(i)
+                        continue
+                    # v5.4: the chunk was rejected: find and set aside the offending sentences, parse the others
+                    sys.stderr.write(f"\n  Chunk {current_chunk_num} rejected by the API ({e}), isolating the offending utterances...\n")
+                    try:
+                        result, positions = self._bisect_udpipe_chunk(chunks[i].split('\n\n'), model, error=e)
+                    except UDPipeError as e2:
+                        sys.stderr.write(f"\nError: API call for chunk {current_chunk_num} failed with {e2}\n")
+                        failed.append(i)
+                        continue
+                    ids = [ids[p] for p in positions]
+                    future = None  # not saved in the run directory: a resumed run must write the rejected utterances again
+                sys.stderr.write(f"\r  Received chunk {current_chunk_num}/{total_chunks} ({len(ids)} utterances)...")
+                sys.stderr.flush()
+                if future and self.checkpoint and not self.parse_cache:
+                    self.checkpoint.put('parse', checkpoint_ids[i], result)
                 if result:
                     parsed_results.append(result)
-                else:
+                    if self.parse_cache:
+                        found.update(self._store_parsed_chunk(result, ids, keys, sentence_out, sentences, model))
+                elif ids:
                     sys.stderr.write(f"\nWarning: API call for chunk {current_chunk_num} succeeded but returned no result.\n")
-            else:
-                sys.stderr.write(f"\nError: API call for chunk {current_chunk_num} failed with status {response.status_code}: {response.text}\n")
-                self._debug_udpipe_chunk(chunk_content, model, small_chunk_size=10, out_path='error_chunk.conllu')
-                return None
+                chunks[i] = None  # free memory of chunks already parsed
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+        if failed:
+            with open('error_chunk.conllu', 'w', encoding='utf8') as ef:
+                ef.write(chunks[failed[0]])
+            kept = "parse cache" if self.parse_cache else "run directory"
+            sys.exit(f"\nFATAL: {len(failed)} of {total_chunks} chunk(s) could not be parsed (network or server errors), see above.\n"
+                     f"       The first one is saved to 'error_chunk.conllu'. The other chunks are kept in the {kept},\n"
+                     f"       re-run with --resume later.")
         sys.stderr.write("\nAPI processing complete.\n")
+        if sentence_out is not None:
+            # comment lines of the input + parsed token lines, the same for cached, parsed and repeated utterances
+            # (so the output does not depend on the cache contents; the API's # generator lines are dropped)
+            for n, (comments, _) in enumerate(split):
+                if sentence_out[n] is None and keys[n] in found:
+                    sentence_out[n] = (comments + '\n' if comments else '') + found[keys[n]] + '\n\n'
+            parsed_results = [out for out in sentence_out if out]
         return "".join(parsed_results) if parsed_results else None
 
-    def _debug_udpipe_chunk(self, chunk_content, model, small_chunk_size=10, out_path='error_chunk.conllu'):
+    def _store_parsed_chunk(self, result, ids, keys, sentence_out, sentences, model):
         """
-        Split a failing CoNLL-U chunk into smaller chunks (default: 10 sentences),
-        send each to the UDPipe API; on error write content and exit.
-        We check for some of the HTTP status codes returned by UDPipe/Lindat:
-        200=OK, 400=Bad Request (malformed CoNLL-U), 403=Forbidden, 413=Payload Too Large, 429=Too Many Requests, 500=Server Error, 502–504=Gateway/Timeout issues.
+        Splits a parsed chunk into sentences and puts them into the parse cache.
+        Returns {key: token lines} of the new sentences.
+        If the number of sentences differs from the number of utterances, they cannot be aligned:
+        the utterances are parsed again one by one. A single utterance that still does not give
+        one sentence is not cached, its result is kept at its own position in sentence_out.
         """
-        API_URL = "https://lindat.mff.cuni.cz/services/udpipe/api/process"
-        sentences = [s for s in chunk_content.strip().split('\n\n') if s.strip()]
-
-        total_small = (len(sentences) + small_chunk_size - 1) // small_chunk_size
-        sys.stderr.write(f"\nDEBUG: Entering fine-grained UDPipe check ({total_small} mini-chunks of {small_chunk_size} sentences)...\n")
+        blocks = result.strip('\n').split('\n\n')
+        if len(blocks) == len(ids):
+            items = [(keys[n], self.parse_cache.split_sentence(block)[1]) for n, block in zip(ids, blocks)]
+        else:
+            sys.stderr.write(f"\nWarning: API returned {len(blocks)} sentences for {len(ids)} utterances, parsing them one by one.\n")
+            items = []
+            for n in ids:
+                single, _ = self._bisect_udpipe_chunk([sentences[n]], model)  # rejected: written to the reject file
+                if not single.strip():
+                    continue
+                single_blocks = single.strip('\n').split('\n\n')
+                if len(single_blocks) == 1:
+                    items.append((keys[n], self.parse_cache.split_sentence(single_blocks[0])[1]))
+                else:
+                    sys.stderr.write(f"\nWarning: API returned {len(single_blocks)} sentences for one utterance, not cached.\n")
+                    sentence_out[n] = single.strip('\n') + '\n\n'
+        self.parse_cache.put_many(items)
+        return dict(items)
 
-        for j in range(0, len(sentences), small_chunk_size):
-            mini = sentences[j:j + small_chunk_size]
-            mini_content = "\n\n".join(mini)
-            mini_idx = j // small_chunk_size + 1
-            sys.stderr.write(f"\r  -> Testing mini-chunk {mini_idx}/{total_small} ({len(mini)} sentences)...")
-            sys.stderr.flush()
+    def _parse_udpipe_chunk(self, chunk_content, model):
+        """
+        Returns the parsed chunk ('' if the API returned no result), called from the worker threads.
+        v5.4: a chunk that is too large (HTTP 413) is halved and both halves are parsed.
+              Later chunks are split to the accepted size right away.
+        Raises UDPipeError for all other errors, also for a response that is not the JSON of the API.
+        """
+        sentences = chunk_content.split('\n\n')
+        with self.chunk_limit_lock:
+            limit = self.chunk_limit
+        if limit and len(sentences) > limit:
+            return "".join(self._parse_udpipe_chunk("\n\n".join(sentences[i:i + limit]), model)
+                           for i in range(0, len(sentences), limit))
+        try:
+            response = self.parser.post(chunk_content, model)
+        except requests.RequestException as e:
+            raise UDPipeError(None, f"{type(e).__name__} {e}")
+        if response.status_code == 413 and len(sentences) > 1:
+            with self.chunk_limit_lock:
+                # another thread may have lowered the limit further in the meantime
+                self.chunk_limit = limit = min(self.chunk_limit or len(sentences), len(sentences) // 2)
+            sys.stderr.write(f"\n  Chunk of {len(sentences)} utterances too large for the API (413), sending chunks of {limit}...\n")
+            return self._parse_udpipe_chunk(chunk_content, model)
+        if response.status_code != 200:
+            raise UDPipeError(response.status_code, response.text)
+        try:
+            return response.json().get('result') or ''
+        except (ValueError, AttributeError):   # e.g. the HTML page of a proxy
+            raise UDPipeError(response.status_code, f"response is not the JSON of the API: {response.text}")
 
+    def _bisect_udpipe_chunk(self, sentences, model, error=None):
+        """
+        Parses a list of sentences that contains sentences rejected by the API (v5.4, replaces the
+        sequential check of 10-sentence mini-chunks, which stopped the run).
+        The list is halved until the offending sentences are isolated: ~2*log2(n) requests per sentence.
+        These are written to <input>.rejected.conllu (their rows get no CoNLL-U columns), the others are parsed.
+        error: the error of the list as a whole, if it was sent already.
+        Returns (parsed text, positions of the parsed sentences in the list).
+        Network and server errors are not bisected, UDPipeError is raised.
+        """
+        if error is None:
             try:
-                params = {'model': model, 'input': 'conllu', 'tagger': '', 'parser': ''}
-                resp = requests.post(API_URL, data=params, files={'data': mini_content})
-            except Exception as e:
-                # Network/transport error: save and exit
-                with open(out_path, 'w', encoding='utf8') as ef:
-                    ef.write(mini_content)
-                sys.exit(f"\nFATAL: UDPipe request raised an exception on a mini-chunk: {e}\n"
-                        f"       Offending content saved to '{out_path}'. Please inspect/fix and re-run.")
-
-            # Same error logic as the main call:
-            bad_status = resp.status_code != 200
-            no_result = False
-            if not bad_status:
-                # Be defensive in JSON parsing
+                return self._parse_udpipe_chunk("\n\n".join(sentences), model), list(range(len(sentences)))
+            except UDPipeError as e:
+                error = e
+        if error.status is None or error.status in TRANSIENT_STATUS:
+            raise error
+        if len(sentences) == 1:
+            self._reject_sentence(sentences[0], error)
+            return '', []
+        half = len(sentences) // 2
+        left, left_positions = self._bisect_udpipe_chunk(sentences[:half], model)
+        right, right_positions = self._bisect_udpipe_chunk(sentences[half:], model)
+        return left + right, left_positions + [half + p for p in right_positions]
+
+    def _reject_sentence(self, sentence, error):
+        """Appends a sentence rejected by the API to the reject file, stops after --max_rejected sentences."""
+        if 'rejected' not in self.output_files:
+            self.output_files['rejected'] = open(self.out_base + '.rejected.conllu', 'w', encoding='utf8')
+        self.n_rejected += 1
+        reason = re.sub(r'\s+', ' ', str(error))
+        item_id = re.search(r'# item_id = (\S+)', sentence)
+        sys.stderr.write(f"\n  Rejected utterance {item_id.group(1) if item_id else '?'}: {reason[:200]}\n")
+        self.output_files['rejected'].write(f"# udpipe_error = {reason}\n{sentence.strip()}\n\n")
+        self.output_files['rejected'].flush()
+        if self.n_rejected > self.args.max_rejected:
+            sys.exit(f"\nFATAL: more than {self.args.max_rejected} utterances rejected by the API (--max_rejected), see {self.output_files['rejected'].name}.\n"
+                     f"       Check the model name and the input data.")
+
+#-------------------------------------------------------
+# Several CHAT files in one run
+#-------------------------------------------------------
+def expand_chat_files(paths):
+    """The input files: shell patterns (e.g. quoted '*.cha.gz') are expanded here (v5.4)."""
+    files = []
+    for path in paths:
+        matches = sorted(glob.glob(path)) if not os.path.exists(path) and glob.has_magic(path) else []
+        files.extend(matches or [path])
+    return files
+
+def concat_light_tables(chat_files, output_path):
+    """Writes the light tables of the CHAT files into one table, with the header of the first one (v5.4)."""
+    header = None
+    with open(output_path, 'w', encoding='utf-8', newline='') as out:
+        for chat_file in chat_files:
+            light_path = re.sub(r'\.cha(\.gz)?$', '', chat_file) + '.light.csv'
+            if not os.path.exists(light_path):
+                sys.stderr.write(f"  No light table for {chat_file}, skipped.\n")
+                continue
+            with open(light_path, encoding='utf-8', newline='') as f:
+                file_header = f.readline()
+                if header is None:
+                    header = file_header
+                    out.write(header)
+                elif file_header != header:
+                    sys.stderr.write(f"  Warning: the columns of {light_path} differ from the first table.\n")
+                for line in f:
+                    out.write(line)
+    sys.stderr.write(f"Light tables concatenated in {output_path}\n")
+
+def run_chat_files(args):
+    """
+    Processes several CHAT files in one run (v5.4), --file_jobs of them at the same time (threads).
+    The parser backend (HTTP session or local UDPipe server, and the limit of --parse_workers requests
+    in flight) and the Grew initialisation are shared by all files. Each file gets its own output
+    files; with --all_light, the light tables are concatenated in the order of the input files.
+    A file that fails is reported and the others go on. Returns the list of failed files.
+    """
+    if args.run_dir:
+        sys.exit("--run_dir cannot be used with several CHAT files (each file gets its own <input>.run).")
+    parser_backend = make_parser_backend(args)
+
+    def run_file(chat_file):
+        file_args = argparse.Namespace(**vars(args))
+        file_args.chat_file = chat_file
+        ChatProcessor(file_args, parser=parser_backend).run()
+
+    failed = []
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, args.file_jobs)) as pool:
+            futures = [(chat_file, pool.submit(run_file, chat_file)) for chat_file in args.chat_file]
+            for chat_file, future in futures:
                 try:
-                    no_result = resp.json().get('result') in (None, '')
-                except Exception as e:
-                    no_result = True
-
-            if bad_status or no_result:
-                with open(out_path, 'w', encoding='utf8') as ef:
-                    ef.write(mini_content)
-                detail = f"status {resp.status_code}: {resp.text[:500]}..." if bad_status else "200 but empty/invalid result"
-                sys.exit(f"\nFATAL: UDPipe failed on a mini-chunk ({len(mini)} sentences): {detail}\n"
-                        f"       Offending content saved to '{out_path}'.")
-        # If we get here, all mini-chunks succeeded, so the failure is intermittent or due to size/timeout.
-        sys.exit("\nDEBUG RESULT: All mini-chunks succeeded in isolation. Consider reducing --chunk_parse.")
+                    future.result()
+                    sys.stderr.write(f"\n----------> {chat_file}: done\n")
+                except (Exception, SystemExit) as e:
+                    failed.append(chat_file)
+                    sys.stderr.write(f"\n----------> {chat_file}: FAILED ({e})\n")
+    finally:
+        if parser_backend: parser_backend.close()
+
+    if args.all_light:
+        concat_light_tables([f for f in args.chat_file if f not in failed], args.all_light)
+    return failed
 
 if __name__ == "__main__":
-    parser = argparse.ArgumentParser(formatter_class=argparse.RawTextHelpFormatter)
-    parser.add_argument('chat_file', type=str,  help='The input CHAT file (e.g., french-sample.cha or a .gz file)')
+    parser = argparse.ArgumentParser(formatter_class=argparse.RawTextHelpFormatter, fromfile_prefix_chars='@')
+    parser.add_argument('chat_file', type=str, nargs='+', help='The input CHAT file (e.g., french-sample.cha or a .gz file).\nv5.4: several files or patterns (*.cha.gz) can be given, or @list.txt\nfor a list of files (one per line), see --file_jobs and --all_light.')
     parser.add_argument('-p', '--parameters', type=str, help='(Optional) TreeTagger parameter file. Requires TreeTagger binary in ./tree-tagger.')
     parser.add_argument('--api_model', type=str, help='(Optional) Name of the UDPipe model for the Lindat API (e.g., french).')
     parser.add_argument('--html_dir', type=str, help='(Optional) Directory to save HTML dependency parse files (keep the name short!). Requires --api_model.')
     parser.add_argument('--server_url', type=str, help='(Optional) Base URL for server links in the final CSV.')
     parser.add_argument('--write_conllu', action='store_true', help='(Optional) Write the final parsed CoNLL-U data to a standalone file. Requires --api_model.')
+    parser.add_argument('--jobs', type=int, default=1, help='Number of processes cleaning and tokenising the utterances (one session at a time). Default: 1.')
+    parser.add_argument('--file_jobs', type=int, default=1, help='With several CHAT files: number of files processed at the same time. Default: 1.')
+    parser.add_argument('--all_light', type=str, nargs='?', const='all.light.csv', help='With several CHAT files: concatenate their light tables into this file. Default: all.light.csv')
+    parser.add_argument('--tagger_jobs', type=int, default=1, help='Number of TreeTagger processes (blocks of 1000 utterances in turn). Default: 1.\nWith more than one, the first words of a block may be tagged differently.')
     parser.add_argument('--chunk_parse', type=int, default=10000, help='Number of utterances per API parsing chunk. Default: 10000.')
+    parser.add_argument('--parse_workers', type=int, default=1, help='Number of API parsing chunks sent concurrently (maximum requests in flight). Default: 1.\nKeep this low for the public Lindat API to avoid rate limiting (HTTP 429).')
+    parser.add_argument('--max_rejected', type=int, default=100, help='Utterances rejected by the parser are written to <input>.rejected.conllu and the run goes on.\nStop when more than this number are rejected. Default: 100.')
+    parser.add_argument('--api_retries', type=int, default=5, help='Number of retries for transient API errors (429, 5xx, timeouts). Default: 5.')
+    parser.add_argument('--api_backoff', type=float, default=2.0, help='Seconds to wait before the first retry, doubled for each further retry. Default: 2.')
+    parser.add_argument('--api_timeout', type=float, default=600, help='Timeout in seconds for one API request. Default: 600.')
+    parser.add_argument('--parse_cache', type=str, help='(Optional) Directory of a cache for parsed utterances, e.g. ~/.cache/childes-parse.\nOnly utterances not found in the cache are sent to the API. The key includes the model\nversion reported by the server. The # generator lines of the API are not written.')
+    parser.add_argument('--parse_cache_size', type=int, default=1000, help='Maximum size of the parse cache in MB (least recently used entries are removed). Default: 1000.')
+    parser.add_argument('--no_parse_cache', action='store_true', help='Do not use the parse cache (even if --parse_cache is given).')
+    parser.add_argument('--parser_backend', choices=['lindat', 'rest', 'udpipe'], default='lindat', help='Parser used with --api_model. Default: lindat.\n  lindat: the public Lindat UDPipe API\n  rest:   a UDPipe REST server of your own (--api_url)\n  udpipe: a local udpipe_server process started for the run (--udpipe_bin),\n          --api_model is the path of the .udpipe model file')
+    parser.add_argument('--api_url', type=str, help=f'URL of the UDPipe REST "process" endpoint, e.g. http://localhost:8001/process. Default: {LINDAT_API_URL}')
+    parser.add_argument('--udpipe_bin', type=str, default='udpipe_server', help='UDPipe server binary for --parser_backend udpipe. Default: udpipe_server')
+    parser.add_argument('--run_dir', type=str, help='Directory for the results of tagger and parser saved during the run (see --resume).\nDefault: the input file name with .run instead of .cha')
+    parser.add_argument('--resume', action='store_true', help='Continue an interrupted run: saved tagger and parser results are reused,\nthe output files are rewritten. Without --resume, saved results are discarded.')
+    parser.add_argument('--keep_run_dir', action='store_true', help='Do not delete the run directory when the run is complete.')
+    parser.add_argument('--stream', action='store_true', help='(Optional) Tag, parse and write the corpus in batches of --chunk_parse utterances\nwhile reading it. Memory is bounded by one batch instead of the whole corpus.\nHTML file names use the project of the first batch.')
+    parser.add_argument('--queue_depth', type=int, default=2, help='With --stream: batches waiting between reading, tagging, parsing and writing,\nwhich run at the same time. 0: one batch after the other. Default: 2.')
     parser.add_argument('--chunk_html', type=int, default=5000, help='Number of utterances per HTML output file. Default: 5000.')
+    parser.add_argument('--html_jobs', type=int, default=1, help='Number of processes writing the HTML files (one page at a time). Default: 1.')
     parser.add_argument('--pos_output', default=".*", type=str, help='Regex to match POS tags. The reduced "light" table will only contain matching rows.')
     parser.add_argument('--pos_utterance', type=str, help='Regex to match POS tags. The full utterance text will only be printed on matching rows.')
     parser.add_argument('--rewrite', type=str, help='Path to a Grew rule file (.grs) to correct the parsed CoNLL-U output.')
@@ -917,5 +1953,12 @@ if __name__ == "__main__":
     parser.add_argument('--utt_tagged', action='store_true', help='Populate the utt_tagged column.')
     
     args = parser.parse_args()
-    processor = ChatProcessor(args)
-    processor.run()
\ No newline at end of file
+    args.chat_file = expand_chat_files(args.chat_file)
+    if len(args.chat_file) == 1 and not args.all_light:
+        args.chat_file = args.chat_file[0]
+        processor = ChatProcessor(args)
+        processor.run()
+    else:
+        failed = run_chat_files(args)
+        if failed:
+            sys.exit(f"{len(failed)} of {len(args.chat_file)} file(s) failed: {' '.join(failed)}")
\ No newline at end of file
@@ -2,7 +2,7 @@
 # -*- coding: utf-8 -*-
 
 __author__ = "Anonymous"
-__version__ = "1.4"
+__version__ = "1.5"
 __status__ = "27.1.2026"
 __license__ = "GPL"
 
@@ -11,7 +11,14 @@ import re
 import argparse
 import csv
 import os
+import io
 import tempfile
+import contextlib
+import json
+import time
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, List, Iterable, Tuple, Optional
 from grewpy import Corpus, Request, CorpusDraft, Graph
 
@@ -94,51 +101,336 @@ def parse_grew_query(query_text):
             sys.stderr.write(f"  Malformed coding line: {coding_line}\n")
     return codings, patterns
 
+# --------------------------
+# Prefilter (version 1.5)
+# --------------------------
+# A pattern can only match sentences that contain the node values and edge labels it requires,
+# so each pattern is searched only in the sentences that meet its requirements.
+# The analysis is conservative: whatever is not understood (without{}, negations, lexicons,
+# unknown label syntax) gives no requirement, so the candidates are a superset of the matches.
+
+PREFILTER_SUBCORPUS_SHARE = 0.25   # search a sub-corpus if at most this share of the graphs are candidates
+INDEXED_COLUMNS = (('form', 1), ('lemma', 2), ('upos', 3), ('xpos', 4), ('deprel', 7))
+
+FEATURE_ITEM = re.compile(r"""\s*(?P<neg>!)?\s*(?P<name>[\w.-]+)\s*
+    (?:(?P<op><>|!=|=)\s*
+       (?P<val>/(?:[^/\\]|\\.)*/i? | re"(?:[^"\\]|\\.)*" | "(?:[^"\\]|\\.)*"(?:\s*\|\s*"(?:[^"\\]|\\.)*")* | [^,\]]*?)
+    )?\s*(?:,|$)""", re.X)
+EDGE_CLAUSE = re.compile(r'(?:\w+\s*:\s*)?\w+\s*-\[(.*)\]->\s*\w+', re.S)
+NODE_CLAUSE = re.compile(r'\w+\s*\[(.*)\]', re.S)
+DEPREL_LABEL = re.compile(r'(?:1=)?([a-z][\w-]*(?::[\w-]+)*)')
+
+def pattern_blocks(pattern: str) -> List[str]:
+    """Contents of the pattern{} blocks of a Grew request (without{} and global{} are ignored)."""
+    blocks = []
+    for m in re.finditer(r'\b(pattern|PATTERN|without|WITHOUT|global|GLOBAL)\s*{', pattern):
+        depth, i = 1, m.end()
+        while i < len(pattern) and depth:
+            depth += {'{': 1, '}': -1}.get(pattern[i], 0)
+            i += 1
+        if m.group(1).lower() == 'pattern':
+            blocks.append(pattern[m.end():i - 1])
+    return blocks
+
+def value_test(val: str):
+    """Set of values or regex (re.search, a superset of Grew's full match) for a Grew feature value; None if unknown."""
+    val = val.strip()
+    m = re.fullmatch(r'/(.*)/(i?)', val, re.S) or re.fullmatch(r're"(.*)"()', val, re.S)
+    if m:
+        try:
+            return re.compile(m.group(1), re.I if m.group(2) else 0)
+        except re.error:
+            return None
+    alternatives = [a.strip() for a in val.split('|')]
+    if all(re.fullmatch(r'"(?:[^"\\]|\\.)*"', a) for a in alternatives):
+        return frozenset(a[1:-1].replace('\\"', '"') for a in alternatives)
+    if all(re.fullmatch(r'[\w-]+', a) for a in alternatives):
+        return frozenset(alternatives)
+    return None   # e.g. lexicon lex.field
+
+def pattern_requirements(pattern: str) -> List[Tuple[str, object]]:
+    """
+    Requirements (field, test) that every sentence matching the pattern meets;
+    test is a set of values or a compiled regex, see SentenceIndex.
+    Fields are form, lemma, upos, xpos, features (capitalised names as in FEATS and MISC) and deprel.
+    """
+    requirements = []
+    for block in pattern_blocks(pattern):
+        block = re.sub(r'%.*', '', block)
+        for clause in re.split(r'[;\n]', block):
+            clause = clause.strip()
+            m = EDGE_CLAUSE.fullmatch(clause)
+            if m:
+                labels = [DEPREL_LABEL.fullmatch(a.strip()) for a in m.group(1).split('|')]
+                if all(labels):   # label X or 1=X: deprel X or subtype X:...
+                    alternatives = '|'.join(re.escape(l.group(1)) for l in labels)
+                    requirements.append(('deprel', re.compile(f'^(?:{alternatives})(?:[:@]|$)')))
+                continue
+            m = NODE_CLAUSE.fullmatch(clause)
+            if not m:
+                continue
+            items, pos, features = [], 0, m.group(1)
+            while pos < len(features):
+                item = FEATURE_ITEM.match(features, pos)
+                if not item or item.end() == pos:
+                    items = []   # not understood (e.g. disjunction of feature structures)
+                    break
+                items.append(item)
+                pos = item.end()
+            for item in items:
+                name = item.group('name')
+                if item.group('neg') or item.group('op') in ('<>', '!='):
+                    continue
+                if name not in ('form', 'lemma', 'upos', 'xpos') and not name[0].isupper():
+                    continue   # Grew's own features (textform, wordform...) are not indexed
+                test = value_test(item.group('val')) if item.group('op') else re.compile('')
+                if test is not None:
+                    requirements.append((name, test))
+    return requirements
+
+class SentenceIndex:
+    """
+    Inverted index of a (chunk of a) CoNLL-U file, built while reading its sentences:
+    field -> value -> set of sentence positions (form, lemma, upos, xpos, deprel, FEATS and MISC features).
+    """
+    def __init__(self, sentences: Iterable[str]):
+        self.postings = {}
+        self.meta_ids = []     # '# sent_id' (else '# item_id') of each position, None if missing
+        self.sent_ids = None   # Grew's sent_id of each position, see bind()
+        self._cache = {}
+        for pos, sentence in enumerate(sentences):
+            meta = {}
+            for line in sentence.splitlines():
+                if line.startswith('#'):
+                    m = re.match(r'#\s*(sent_id|item_id)\s*=\s*(.*?)\s*$', line)
+                    if m:
+                        meta[m.group(1)] = m.group(2)
+                    continue
+                cols = line.split('\t')
+                if len(cols) != 10 or '-' in cols[0]:
+                    continue
+                for field, col in INDEXED_COLUMNS:
+                    self.postings.setdefault(field, {}).setdefault(cols[col], set()).add(pos)
+                for column in (cols[5], cols[9]):
+                    if column == '_':
+                        continue
+                    for feature in column.split('|'):
+                        name, _, value = feature.partition('=')
+                        self.postings.setdefault(name, {}).setdefault(value, set()).add(pos)
+            self.meta_ids.append(meta.get('sent_id', meta.get('item_id')))
+
+    def bind(self, draft: CorpusDraft) -> bool:
+        """
+        Map positions to the sent_ids of the Grew corpus: each graph is paired with the sentence of
+        the same sent_id (else item_id), never by position. False if a sentence or graph has no id,
+        an id is not unique, or sentences and graphs differ (the prefilter is then not used).
+        """
+        positions = {}
+        for pos, meta_id in enumerate(self.meta_ids):
+            if meta_id is None or meta_id in positions:
+                return False
+            positions[meta_id] = pos
+        if len(draft) != len(positions):
+            return False
+        sent_ids = [None] * len(positions)
+        for sent_id, graph in draft.items():
+            meta_id = graph.meta.get('sent_id', graph.meta.get('item_id', sent_id))
+            pos = positions.get(meta_id)
+            if pos is None or sent_ids[pos] is not None:
+                return False
+            sent_ids[pos] = sent_id
+        self.sent_ids = sent_ids
+        return True
+
+    def _lookup(self, field: str, test) -> set:
+        key = (field, test)
+        if key not in self._cache:
+            vocab = self.postings.get(field, {})
+            if isinstance(test, frozenset):
+                values = [v for v in test if v in vocab]
+            else:
+                values = [v for v in vocab if test.search(v)]
+            positions = set()
+            for v in values:
+                positions |= vocab[v]
+            self._cache[key] = positions
+        return self._cache[key]
+
+    def candidates(self, requirements: List[Tuple[str, object]]) -> Optional[List[str]]:
+        """sent_ids of the sentences meeting all requirements, in corpus order (None: no requirements)."""
+        if not requirements:
+            return None
+        positions = None
+        for field, test in requirements:
+            found = self._lookup(field, test)
+            positions = set(found) if positions is None else positions & found
+            if not positions:
+                break
+        return [self.sent_ids[pos] for pos in sorted(positions)]
+
 # --------------------------
 # Matching (optimized)
 # --------------------------
 
-#def find_matches_by_sent_id(corpus: Corpus, patterns: Dict[int,str]) -> Dict[int, Dict[str, List[dict]], codings: Dict[int, dict]) -> Dict[int, Dict[str, List[dict]]}:
-def find_matches_by_sent_id(corpus: Corpus, patterns: Dict[int,str], codings: Dict[int, dict]) -> Dict[int, Dict[str, List[dict]]]:
+class QueryPlan:
+    """
+    Compiled Grew query (version 1.5): codings, patterns and Requests are built once per run
+    and reused for all chunks (each --jobs worker builds its own plan once, see init_worker()).
+    Invalid patterns are all reported before any corpus is loaded.
     """
-    For each pattern number, map sent_id -> list of matches. (codings is just for stderr output)
+    def __init__(self, query_text: str):
+        self.query_text = query_text
+        self.codings, self.patterns = parse_grew_query(query_text)
+        self.requests = {}
+        self.requirements = {nr: pattern_requirements(pat) for nr, pat in self.patterns.items()}   # for the prefilter
+        errors = []
+        # grewpy prints its parse errors to stdout, which is our output
+        with contextlib.redirect_stdout(sys.stderr):
+            for nr, pat in self.patterns.items():
+                try:
+                    req = Request(pat)
+                except Exception as e:
+                    errors.append((nr, pat, e))
+                    continue
+                self.requests[nr] = req
+        if errors:
+            for nr, pat, e in errors:
+                sys.stderr.write(f"\nERROR: Invalid Grew syntax in pattern #{nr}{self.info(nr)}:\n{pat}\n")
+                if isinstance(e, TypeError) and "'NoneType' object is not iterable" in str(e):
+                    sys.stderr.write("The `grewpy` library failed to parse this pattern.\n")
+                sys.stderr.write(f"(Original Error: {e})\n")
+            sys.stderr.write(f"\nFATAL ERROR: {len(errors)} of {len(self.patterns)} patterns are invalid. "
+                             "Please check the Grew syntax carefully, especially brackets, feature names, and edge labels.\n")
+            sys.exit(1)
+        if not self.patterns:
+            sys.stderr.write("  WARNING: No coding patterns found in the query.\n")
+
+    def info(self, nr: int) -> str:
+        """Info string for stderr, e.g. ' (subj=clit)'."""
+        c = self.codings.get(nr, {})
+        return f" ({c.get('att', '?')}={c.get('val', '?')})" if c else ""
+
+_worker_plan = None   # QueryPlan of a --jobs worker process
+
+def init_worker(query_text: str):
+    """Initializer of --jobs worker processes: build the query plan once per worker."""
+    global _worker_plan
+    _worker_plan = QueryPlan(query_text)
+
+class Profile:
+    """
+    --profile (version 1.5): wall time, matches, candidates and graphs searched per pattern, and the time
+    of the phases of process_one_corpus_file(), summed over all chunks (workers return theirs, see add()).
+    """
+    PHASES = ('corpus load', 'prefilter index', 'search', 'add_coding_to_graph', 'output')
+
+    def __init__(self):
+        self.chunks = 0
+        self.phases = dict.fromkeys(self.PHASES, 0.0)
+        self.patterns = {}   # nr -> [seconds, matches, candidates, graphs searched]
+
+    def phase(self, name: str, start: float) -> float:
+        """Add the time since start to the phase, return the current time (start of the next phase)."""
+        now = time.perf_counter()
+        self.phases[name] += now - start
+        return now
+
+    def pattern(self, nr: int, seconds: float, matches: int, candidates: int, graphs: int):
+        stats = self.patterns.setdefault(nr, [0.0, 0, 0, 0])
+        for i, v in enumerate((seconds, matches, candidates, graphs)):
+            stats[i] += v
+
+    def add(self, other: "Profile"):
+        self.chunks += other.chunks
+        for name, seconds in other.phases.items():
+            self.phases[name] += seconds
+        for nr, stats in other.patterns.items():
+            self.pattern(nr, *stats)
+
+    def write(self, path: str, plan: QueryPlan):
+        """Write the report, slowest patterns first: TSV, or JSON if path ends with .json."""
+        rows = []
+        for nr, (seconds, matches, candidates, graphs) in sorted(self.patterns.items(), key=lambda x: -x[1][0]):
+            c = plan.codings.get(nr, {})
+            rows.append({'pattern': nr, 'attribute': c.get('att'), 'value': c.get('val'),
+                         'seconds': round(seconds, 4), 'matches': matches, 'candidates': candidates, 'graphs': graphs,
+                         'ms_per_1000_graphs': round(seconds * 1e6 / graphs, 3) if graphs else 0})
+        with open(path, 'w', encoding='utf-8') as f:
+            if path.endswith('.json'):
+                json.dump({'version': __version__, 'chunks': self.chunks,
+                           'phases': {k: round(v, 4) for k, v in self.phases.items()}, 'patterns': rows},
+                          f, indent=1)
+                f.write('\n')
+            else:
+                # one row per pattern, then one per phase (kind = pattern|phase, the other columns empty)
+                fields = ['kind', 'pattern', 'phase', 'attribute', 'value', 'seconds', 'matches', 'candidates',
+                          'graphs', 'ms_per_1000_graphs']
+                f.write('\t'.join(fields) + '\n')
+                for row in rows:
+                    row = dict(row, kind='pattern')
+                    f.write('\t'.join('' if row.get(k) is None else str(row[k]) for k in fields) + '\n')
+                for name, seconds in self.phases.items():
+                    row = {'kind': 'phase', 'phase': name, 'seconds': round(seconds, 4)}
+                    f.write('\t'.join(str(row.get(k, '')) for k in fields) + '\n')
+        sys.stderr.write(f"\nProfile (chunks: {self.chunks}) written to {path}\n")
+        for name, seconds in self.phases.items():
+            sys.stderr.write(f"  {name}: {seconds:.2f}s\n")
+        sys.stderr.write("  Slowest patterns:\n")
+        for row in rows[:5]:
+            sys.stderr.write(f"    query {row['pattern']} ({row['attribute']}={row['value']}): {row['seconds']:.2f}s, "
+                             f"{row['matches']} matches in {row['graphs']} graphs\n")
+
+def find_matches_by_sent_id(corpus: Corpus, plan: QueryPlan, draft: Optional[CorpusDraft] = None,
+                            index: Optional[SentenceIndex] = None,
+                            profile: Optional[Profile] = None) -> Dict[int, Dict[str, List[dict]]]:
+    """
+    For each pattern number, map sent_id -> list of matches.
     To speed things up touch only graphs that matched.
     version >1.2 with error handling for invalid Grew patterns.
+    version 1.5: the Requests are built once in the QueryPlan (syntax errors are reported there).
+    With an index (and the draft of the corpus), a pattern is only searched in its candidate graphs:
+    not at all if there are none, in a sub-corpus if they are few.
+    With a profile, the time, matches and graphs searched of each pattern are added to it.
     """
     result = {}
-    for nr, pat in patterns.items():
-        # --- DEBUGGING ADDED ---
-        #sys.stderr.write(f"\n--- Processing pattern #{nr} ---\n")
-        #sys.stderr.write(f"--- Pattern content start ---\n{pat}\n--- Pattern content end ---\n")
-        # --- END DEBUGGING ---
-
-        c = codings.get(nr, {})    #  info string for stderr
-        info_str = f" ({c.get('att', '?')}={c.get('val', '?')})" if c else ""
-        sys.stderr.write(f"  Searching corpus query {nr}{info_str}...")
-        try:
-            # This is where the error occurs if 'pat' has invalid syntax
-            req = Request(pat)
-            mlist = corpus.search(req)
-            sys.stderr.write(f" {len(mlist)} matches\n")
-            by_sid = {}
-            for m in mlist:
-                sid = m['sent_id']
-                by_sid.setdefault(sid, []).append(m)
-            result[nr] = by_sid
-        # --- CATCH THE SPECIFIC ERROR ---
-        except TypeError as e:
-            if "'NoneType' object is not iterable" in str(e):
-                sys.stderr.write(f"\n\nFATAL ERROR: Invalid Grew syntax detected in pattern #{nr} above.\n")
-                sys.stderr.write("The `grewpy` library failed to parse this pattern.\n")
-                sys.stderr.write("Please check the Grew syntax carefully, especially brackets, feature names, and edge labels.\n")
-                sys.stderr.write(f"(Original Error: {e})\n")
-            else:
-                # Re-raise unexpected TypeErrors
-                sys.stderr.write(f"\n\nUNEXPECTED TypeError processing pattern #{nr}:\n{pat}\nError: {e}\n")
-            sys.exit(1) # Stop execution after identifying the bad pattern
-        except Exception as e: # Catch other potential errors during Request creation or search
-             sys.stderr.write(f"\n\nERROR processing pattern #{nr}:\n{pat}\nError: {e}\n")
-             sys.exit(1) # Stop execution
+    subcorpora = {}   # candidates -> sub-corpus, shared by patterns with the same candidates, cleaned at the end
+    total = len(draft) if draft is not None else len(corpus)
+    try:
+        for nr, req in plan.requests.items():
+            sys.stderr.write(f"  Searching corpus query {nr}{plan.info(nr)}...")
+            start = time.perf_counter()
+            candidates = index.candidates(plan.requirements[nr]) if index else None
+            search_corpus, graphs, note = corpus, total, ""
+            if candidates is not None:
+                note = f" ({len(candidates)} candidates)"
+                if not candidates:
+                    sys.stderr.write(f" 0 matches{note}\n")
+                    result[nr] = {}
+                    if profile:
+                        profile.pattern(nr, time.perf_counter() - start, 0, 0, 0)
+                    continue
+                if len(candidates) <= PREFILTER_SUBCORPUS_SHARE * len(index.sent_ids):
+                    key = tuple(candidates)
+                    if key not in subcorpora:
+                        subcorpora[key] = Corpus({sid: draft[sid] for sid in candidates})
+                    search_corpus, graphs = subcorpora[key], len(candidates)
+            try:
+                mlist = search_corpus.search(req)
+                if profile:
+                    profile.pattern(nr, time.perf_counter() - start, len(mlist),
+                                    total if candidates is None else len(candidates), graphs)
+                sys.stderr.write(f" {len(mlist)} matches{note}\n")
+                by_sid = {}
+                for m in mlist:
+                    sid = m['sent_id']
+                    by_sid.setdefault(sid, []).append(m)
+                result[nr] = by_sid
+            except Exception as e: # e.g. errors reported by the Grew backend
+                 sys.stderr.write(f"\n\nERROR processing pattern #{nr}:\n{plan.patterns[nr]}\nError: {e}\n")
+                 sys.exit(1) # Stop execution
+    finally:
+        for sub in subcorpora.values():
+            sub.clean()  # grewpy frees a corpus in the backend only when asked to
 
     return result
 
@@ -337,11 +629,16 @@ def conllu_to_sentence_with_coding(conllu_string):
 # Core pipelines
 # --------------------------
 
-def process_one_corpus_file(conllu_path: str, query_text: str, args) -> int:
+def process_one_corpus_file(conllu_path: str, plan: QueryPlan, args, out=None,
+                            profile: Optional[Profile] = None) -> int:
     """
     Process a (possibly small) CoNLL-U file fully and print output.
     Returns number of graphs printed. TODO: Doesn't seem to work, yet.
+    version 1.5: output goes to the stream out (default: sys.stdout), see process_chunk();
+    the query is compiled once per run (QueryPlan); patterns are searched only in candidate graphs (SentenceIndex);
+    with --profile the times are added to profile
     """
+    out = out or sys.stdout
     if getattr(args, "estimate", False):
         try:
             est = sum(1 for _ in iter_conllu_sentences(conllu_path))
@@ -352,11 +649,24 @@ def process_one_corpus_file(conllu_path: str, query_text: str, args) -> int:
         except Exception:
             pass
 
+    start = time.perf_counter()
     corpus = Corpus(conllu_path)
-    codings, patterns = parse_grew_query(query_text)
-    matched = find_matches_by_sent_id(corpus, patterns, codings)   # codings added only for stderr output
-
     draft = CorpusDraft(corpus) if not isinstance(corpus, CorpusDraft) else corpus
+    if profile:
+        profile.chunks += 1
+        start = profile.phase('corpus load', start)
+
+    index = None
+    if not args.no_prefilter and any(plan.requirements.values()):
+        index = SentenceIndex(iter_conllu_sentences(conllu_path))
+        if not index.bind(draft):
+            sys.stderr.write("  WARNING: sentences without unique sent_id or item_id, or index and corpus differ: prefilter not used.\n")
+            index = None
+        if profile:
+            start = profile.phase('prefilter index', start)
+    matched = find_matches_by_sent_id(corpus, plan, draft, index, profile)
+    if profile:
+        start = profile.phase('search', start)
 
     printed = 0
     # For each pattern, modify only the graphs that matched it
@@ -370,7 +680,9 @@ def process_one_corpus_file(conllu_path: str, query_text: str, args) -> int:
                 # Some corpora use item_id rather than sent_id; try item_id too
                 # If not present, skip silently but warn once.
                 continue
-            add_coding_to_graph(graph, mlist, codings[nr], args)
+            add_coding_to_graph(graph, mlist, plan.codings[nr], args)
+    if profile:
+        start = profile.phase('add_coding_to_graph', start)
 
     # Output
     out_matches = 0
@@ -381,11 +693,13 @@ def process_one_corpus_file(conllu_path: str, query_text: str, args) -> int:
         out_matches += 1
         if args.print_text:
             if args.mark_coding:
-                print(conllu_to_sentence_with_coding(conll_str))
+                print(conllu_to_sentence_with_coding(conll_str), file=out)
             else:
-                print(conllu_to_sentence(conll_str))
+                print(conllu_to_sentence(conll_str), file=out)
         else:
-            print(conll_str)
+            print(conll_str, file=out)
+    if profile:
+        profile.phase('output', start)
 
     # stats
     total = len(draft)
@@ -395,7 +709,7 @@ def process_one_corpus_file(conllu_path: str, query_text: str, args) -> int:
         sys.stderr.write(f"{total} graphs printed ({out_matches} matches)\n")
     return out_matches
 
-def process_in_chunks(conllu_file: str, query_text: str, chunk_size: int, args):
+def process_in_chunks(conllu_file: str, plan: QueryPlan, chunk_size: int, args, profile: Optional[Profile] = None):
     """
     Stream the big CoNLL-U file in chunks (bounded memory).
     Each chunk is processed independently and printed immediately.
@@ -427,7 +741,7 @@ def process_in_chunks(conllu_file: str, query_text: str, chunk_size: int, args):
         chunk_idx += 1
         sys.stderr.write(f"\n=== Processing chunk {chunk_idx} ({written} graphs) ===\n")
         try:
-            total_printed += process_one_corpus_file(tmp_path, query_text, args)
+            total_printed += process_one_corpus_file(tmp_path, plan, args, profile=profile)
         finally:
             try:
                 os.remove(tmp_path)
@@ -436,53 +750,162 @@ def process_in_chunks(conllu_file: str, query_text: str, chunk_size: int, args):
 
     sys.stderr.write(f"\nDone. Total printed: {total_printed}\n")
 
+def iter_chunks(conllu_file: str, chunk_size: int) -> Iterable[List[str]]:
+    """Yield lists of up to chunk_size sentences of the CoNLL-U file."""
+    chunk = []
+    for s in iter_conllu_sentences(conllu_file):
+        chunk.append(s)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def process_chunk(chunk_idx: int, sentences: List[str], args) -> Tuple[int, str, Optional[Profile]]:
+    """
+    Worker of --jobs: process one chunk in a worker process (with its own Grew backend
+    and the query plan built by init_worker()).
+    Returns (number of graphs printed, output text, profile of the chunk if --profile),
+    the output is printed by the main process.
+    """
+    profile = Profile() if args.profile else None
+    with tempfile.NamedTemporaryFile(mode='w', suffix=".conllu", delete=False, encoding='utf-8') as tmp:
+        for s in sentences:
+            tmp.write(s); tmp.write("\n")
+    out = io.StringIO()
+    sys.stderr.write(f"\n=== Processing chunk {chunk_idx} ({len(sentences)} graphs) ===\n")
+    try:
+        printed = process_one_corpus_file(tmp.name, _worker_plan, args, out, profile)
+    finally:
+        try:
+            os.remove(tmp.name)
+        except OSError:
+            pass
+    return printed, out.getvalue(), profile
+
+def process_in_chunks_parallel(conllu_file: str, plan: QueryPlan, chunk_size: int, args,
+                               profile: Optional[Profile] = None):
+    """
+    Like process_in_chunks(), with args.jobs worker processes (version 1.5).
+    Workers are started with 'spawn', so that each one starts its own Grew backend on import.
+    The output is printed in the order of the chunks; at most 2 * jobs chunks are in flight,
+    so memory stays bounded by a few chunks per worker.
+    """
+    total_printed = 0
+    pending = deque()
+
+    def print_oldest():
+        printed, text, chunk_profile = pending.popleft().result()
+        sys.stdout.write(text)
+        sys.stdout.flush()
+        if profile and chunk_profile:
+            profile.add(chunk_profile)
+        return printed
+
+    with ProcessPoolExecutor(max_workers=args.jobs, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=init_worker, initargs=(plan.query_text,)) as pool:
+        for chunk_idx, sentences in enumerate(iter_chunks(conllu_file, chunk_size), 1):
+            pending.append(pool.submit(process_chunk, chunk_idx, sentences, args))
+            while len(pending) > 2 * args.jobs:
+                total_printed += print_oldest()
+        while pending:
+            total_printed += print_oldest()
+
+    sys.stderr.write(f"\nDone. Total printed: {total_printed}\n")
+
 # --------------------------
-# CSV merge (unchanged logic)
+# CSV merge
 # --------------------------
+# version 1.5: streaming merge with bounded memory. The codings are read from the meta lines of the
+# CoNLL-U (no Grew corpus), the table is joined row by row and written directly.
+
+def iter_item_codings(conllu_file: str) -> Iterable[Tuple[Optional[str], str]]:
+    """Yield (item_id, coding) of each sentence, from its '# item_id' and '# coding' lines."""
+    for sentence in iter_conllu_sentences(conllu_file):
+        item_id, coding = None, ''
+        for line in sentence.splitlines():
+            if not line.startswith('#'):
+                break   # meta lines come first
+            m = re.match(r'#\s*(item_id|coding)\s*=\s*(.*?)\s*$', line)
+            if m:
+                if m.group(1) == 'item_id':
+                    item_id = m.group(2)
+                else:
+                    coding = m.group(2)
+        yield item_id, coding
+
+def coding_targets(item_id: str, coding: str, code_head=False) -> Dict[str, List[Tuple[str, str]]]:
+    """Map utt_id of the table row (item_id + _w + node or head) -> [(attribute, value)] of a sentence's coding."""
+    targets = {}
+    for entry in [e.strip() for e in coding.split(';') if e.strip()]:
+        parts = re.split(r':', entry, maxsplit=1)
+        attr = parts[0].strip()
+        if not attr or len(parts) < 2: continue
+        val = parts[1].strip()
+
+        # Logic to find target word index
+        m = re.search(r'\((\d+)>(\d+)(?:_.*)?\)$', val)
+        node_id_str = m.group(1) if m else "1"
+        head_id_str = m.group(2) if m else "0"
+
+        # Fallback for root
+        if not m and re.search(r'\((\d+)>0\)$', val):
+             node_id_str = re.search(r'\((\d+)>0\)$', val).group(1)
+
+        target_node = head_id_str if code_head else node_id_str
+        targets.setdefault(f"{item_id}_w{target_node}", []).append((attr, val))
+    return targets
+
+def add_codings_to_row(row: dict, codings: List[Tuple[str, str]]):
+    for attr, val in codings:
+        current_val = row.get(attr, '')
+        row[attr] = f"{current_val};{val}" if current_val else val
+
+class NewlineCleaner:
+    """
+    Output file for the csv writer (QUOTE_NONE, escapechar \x1e): removes the escape characters,
+    so that =HYPERLINK() formulas keep their quotes, and writes line ends as a text file.
+    """
+    def __init__(self, file):
+        self.file = file
+
+    def write(self, line: str):
+        return self.file.write(line.replace('\r\n', '\n').replace('\r', '\n').replace('\x1e', ''))
 
 def merge_with_csv(conllu_file, csv_file, code_head=False):
-    # 1. Read the CoNLL-U data
-    corpus = Corpus(conllu_file)
-    draft_corpus = CorpusDraft(corpus)
+    """
+    Add the codings of the CoNLL-U file to the rows of the table (utt_id = item_id + _w + node).
+    version 1.5: table and corpus are read sentence by sentence and row by row (both are in the order
+    of the utterances) and joined in one forward pass; if the orders differ, a second pass joins with
+    a map utt_id -> codings of the coded sentences. The output is the same as before, except for repeated
+    utt_ids (a PID that comes back in the table): all rows are kept, each coded with the sentence at its
+    position in the corpus (with the second pass: the last sentence of the item_id); before, only one row
+    per utt_id was written.
+    """
     sys.stderr.write(f"Merge codings from {conllu_file} to {csv_file}\n")
-    
-    id_meta = {}
-    coded = 0
-    newly_encountered_attributes = set()
 
-    for sent_id, graph in draft_corpus.items():
-        coding = graph.meta.get('coding', '')
-        item_id = graph.meta.get('item_id')
-        if item_id is None: continue
-        
-        id_meta[item_id] = coding
-        if coding:
-            coded += 1
-            for entry in [e.strip() for e in coding.split(';') if e.strip()]:
-                # Extract attribute name (e.g. "subj" from "subj:clit(...)")
-                attr = entry.split(':', 1)[0].strip()
-                if attr: newly_encountered_attributes.add(attr)
-
-    sys.stderr.write(f"- Reading the corpus to map item_id -> coding...{len(draft_corpus)} graphs, {coded} codings\n")
-
-    # 2. Read the existing CSV
+    # 1. Read the codings of the CoNLL-U data (for the new columns)
+    graphs = coded = 0
+    newly_encountered_attributes = set()
+    for item_id, coding in iter_item_codings(conllu_file):
+        graphs += 1
+        if item_id is None or not coding: continue
+        coded += 1
+        for entry in [e.strip() for e in coding.split(';') if e.strip()]:
+            # Extract attribute name (e.g. "subj" from "subj:clit(...)")
+            attr = entry.split(':', 1)[0].strip()
+            if attr: newly_encountered_attributes.add(attr)
+
+    sys.stderr.write(f"- Reading the codings of the corpus...{graphs} graphs, {coded} codings\n")
+
+    # 2. Read the header of the existing CSV
     sys.stderr.write(f"Reading table {csv_file}...\n")
-    rows = []
     original_headers = []
-
     if os.path.exists(csv_file):
         with open(csv_file, mode='r', newline='', encoding='utf-8') as file:
             try:
-                # Read headers first to filter empty ones
-                header_reader = csv.reader(file, delimiter='\t')
-                original_headers = next(header_reader)
+                original_headers = next(csv.reader(file, delimiter='\t'))
                 original_headers = [h for h in original_headers if h] # Remove empty header strings
-                
-                file.seek(0)
-                # Use DictReader with refined headers
-                reader = csv.DictReader(file, fieldnames=original_headers, delimiter='\t')
-                next(reader) # skip header row
-                rows = list(reader)
             except Exception as e:
                  sys.stderr.write(f"ERROR: Could not read CSV {csv_file}. Error: {e}\n")
                  return
@@ -491,77 +914,87 @@ def merge_with_csv(conllu_file, csv_file, code_head=False):
          sys.stderr.write(f"ERROR: 'utt_id' column not found in CSV. Cannot merge.\n")
          return
 
-    # 3. Clean rows to avoid matching errors
-    # Remove 'None' key if present (caused by trailing tabs/extra columns in input)
-    for row in rows:
-        if None in row:
-            del row[None]
-
-    # Map rows by ID
-    row_dict = {}
-    sys.stderr.write("- Mapping CSV IDs to rows...\n")
-    for row in rows:
-        utt_id = row.get('utt_id')
-        if utt_id is not None:
-            row_dict[utt_id] = row
-
-    # 4. Determine Final Headers
+    # 3. Determine Final Headers
     final_headers = list(original_headers)
     for attr in sorted(list(newly_encountered_attributes)):
         if attr not in final_headers:
             sys.stderr.write(f"  Adding attribute as new column header: {attr}\n")
             final_headers.append(attr)
 
-    # 5. Merge Data
-    for sent_id, coding in id_meta.items():
-        if not coding: continue
-        coding_entries = [e.strip() for e in coding.split(';') if e.strip()]
-
-        for entry in coding_entries:
-            parts = re.split(r':', entry, maxsplit=1)
-            attr = parts[0].strip()
-            if not attr or len(parts) < 2: continue
-            val = parts[1].strip()
-
-            # Logic to find target word index
-            m = re.search(r'\((\d+)>(\d+)(?:_.*)?\)$', val)
-            node_id_str = m.group(1) if m else "1"
-            head_id_str = m.group(2) if m else "0"
-            
-            # Fallback for root
-            if not m and re.search(r'\((\d+)>0\)$', val):
-                 node_id_str = re.search(r'\((\d+)>0\)$', val).group(1)
-
-            target_node = head_id_str if code_head else node_id_str
-            this_id = f"{sent_id}_w{target_node}"
-
-            if this_id in row_dict:
-                row = row_dict[this_id]
-                current_val = row.get(attr, '')
-                row[attr] = f"{current_val};{val}" if current_val else val
-
-    # 6. Write Output
+    # 4. Merge and write
     merged_file = re.sub(r'(\.\w+)$', r'.coded\1', csv_file)
-    tmp_file = merged_file + ".tmp"
-    sys.stderr.write(f"Writing first output to {tmp_file}\n")
+    sys.stderr.write(f"Writing final output to {merged_file}\n")
+    try:
+        if not write_merged_csv(csv_file, merged_file, original_headers, final_headers,
+                                forward_join_codings(conllu_file, code_head)):
+            sys.stderr.write("- Order of table and corpus differ, joining by utt_id...\n")
+            id_meta = {}   # item_id -> coding (the last sentence wins)
+            for item_id, coding in iter_item_codings(conllu_file):
+                if item_id is not None:
+                    id_meta[item_id] = coding
+            row_codings = {}
+            for item_id, coding in id_meta.items():
+                if coding:
+                    row_codings.update(coding_targets(item_id, coding, code_head))
+            write_merged_csv(csv_file, merged_file, original_headers, final_headers, row_codings)
+    except (csv.Error, UnicodeDecodeError) as e:
+        sys.stderr.write(f"ERROR: Could not read CSV {csv_file}. Error: {e}\n")
+        if os.path.exists(merged_file):
+            os.unlink(merged_file)
+
+def forward_join_codings(conllu_file: str, code_head=False):
+    """
+    Sentences of the CoNLL-U file in order: (item_id, coding_targets()) for merge_with_csv(). Sentences
+    without coding are included (no targets), so that an item_id that comes back later is not taken for
+    the same sentence again.
+    """
+    for item_id, coding in iter_item_codings(conllu_file):
+        if item_id is not None:
+            yield item_id, coding_targets(item_id, coding, code_head)
 
-    with open(tmp_file, mode='w', newline='', encoding='utf-8') as file:
+def write_merged_csv(csv_file: str, merged_file: str, original_headers: List[str], final_headers: List[str],
+                     codings) -> bool:
+    """
+    Copy the rows of csv_file to merged_file, adding codings: a dict utt_id -> [(attribute, value)] (hash join),
+    or an iterator of the sentences (item_id, utt_id -> [(attribute, value)]) in the order of the table.
+    The iterator is joined in one forward pass; returns False if a sentence is left over (orders differ).
+    """
+    forward = not isinstance(codings, dict)
+    pending, seen = (next(codings, None), False) if forward else (None, False)
+    with open(csv_file, mode='r', newline='', encoding='utf-8') as file, \
+         open(merged_file, mode='w', encoding='utf-8') as outfile:
+        reader = csv.DictReader(file, fieldnames=original_headers, delimiter='\t')
+        next(reader) # skip header row
         # Added extrasaction='ignore' to prevent crashes on unknown keys
-        writer = csv.DictWriter(file, fieldnames=final_headers, delimiter='\t', 
-                                quoting=csv.QUOTE_NONE, escapechar='\x1e', 
+        writer = csv.DictWriter(NewlineCleaner(outfile), fieldnames=final_headers, delimiter='\t',
+                                quoting=csv.QUOTE_NONE, escapechar='\x1e',
                                 extrasaction='ignore')
         writer.writeheader()
-        writer.writerows(row_dict.values())
-
-    # Final cleanup of quotes
-    sys.stderr.write(f"  Cleaning quotes around =HYPERLINK() formulas\n")
-    with open(tmp_file, mode='r', encoding='utf-8') as infile, open(merged_file, mode='w', encoding='utf-8') as outfile:
-        for line in infile:
-            cleaned_line = re.sub(r"\x1e", "", line)
-            outfile.write(cleaned_line)
-            
-    sys.stderr.write(f"Writing final output to {merged_file}\n")
-    os.unlink(tmp_file)
+        for row in reader:
+            # Remove 'None' key if present (caused by trailing tabs/extra columns in input)
+            if None in row:
+                del row[None]
+            utt_id = row.get('utt_id')
+            if utt_id is None:
+                continue
+            if not forward:
+                add_codings_to_row(row, codings.get(utt_id, []))
+            elif pending:
+                item_id = utt_id.rsplit('_w', 1)[0]
+                if seen and item_id != pending[0]:
+                    # rows of the coded sentence done, next one (the same item_id again: orders differ)
+                    previous = pending[0]
+                    pending, seen = next(codings, None), False
+                    if pending and pending[0] == previous:
+                        return False
+                if pending and item_id == pending[0]:
+                    seen = True
+                    add_codings_to_row(row, pending[1].get(utt_id, []))
+            writer.writerow(row)
+    if not forward:
+        return True
+    # every coded sentence must have been joined: the last one seen and none left
+    return pending is None or (seen and next(codings, None) is None)
 
 # --------------------------
 # CLI
@@ -593,6 +1026,15 @@ def main_cli():
                         help='Print only sentence text (not CoNLL-U graphs)')
     parser.add_argument('--chunk-size', type=int, default=0,
                         help='Process the CoNLL-U in chunks of N sentences (streaming, avoids large memory).')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='Process chunks in N worker processes, each with its own Grew backend. '
+                             'Output keeps the order of the corpus. Without --chunk-size, chunks of 10000 sentences.')
+    parser.add_argument('--no_prefilter', action='store_true',
+                        help='Search every pattern in all graphs (default: only in graphs with the required '
+                             'node values and relations of the pattern)')
+    parser.add_argument('--profile', default='', type=str,
+                        help='Write time, matches and graphs searched per pattern, and the time of corpus load, '
+                             'coding and output, to this file (TSV, or JSON if it ends with .json), slowest patterns first.')
     parser.add_argument('--estimate', action='store_true',
                         help='Print a rough ETA by counting sentences first.')
 
@@ -607,18 +1049,25 @@ def main_cli():
     if not args.query_file:
         parser.error("Either 'query_file' must be specified or '--merge' must be used.")
 
-    query_text = read_grew_query(args.query_file)
+    # compile and check the query before reading the corpus
+    plan = QueryPlan(read_grew_query(args.query_file))
 
     if args.mark_coding and not args.print_text:
         sys.stderr.write("NOTE: --mark_coding implies --print_text.\n")
         args.print_text = True
 
-    if args.chunk_size and args.chunk_size > 0:
+    profile = Profile() if args.profile else None
+    if args.jobs > 1:
+        # PARALLEL STREAMING PATH: bounded memory per worker
+        process_in_chunks_parallel(args.conllu_file, plan, args.chunk_size if args.chunk_size > 0 else 10000, args, profile)
+    elif args.chunk_size and args.chunk_size > 0:
         # STREAMING PATH: bounded memory
-        process_in_chunks(args.conllu_file, query_text, args.chunk_size, args)
+        process_in_chunks(args.conllu_file, plan, args.chunk_size, args, profile)
     else:
         # SINGLE SHOT PATH (legacy, but faster for medium corpora)
-        process_one_corpus_file(args.conllu_file, query_text, args)
+        process_one_corpus_file(args.conllu_file, plan, args, profile=profile)
+    if profile:
+        profile.write(args.profile, plan)
 
 if __name__ == "__main__":
     main_cli()
\ No newline at end of file
@@ -0,0 +1,160 @@
+"""
+Shared helpers of the tests: childes.py is imported from the repository root, and a small
+UDPipe REST server (fake parse, deterministic) replaces the Lindat API.
+dql.py runs with the grewpy stub of tests/grewpy_stub (no Grew backend needed).
+Run the tests from the repository root with: python3 -m pytest tests
+"""
+import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+SNIPPET = os.path.join(REPO, 'test-snippet.cha')
+GREW_STUB = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'grewpy_stub')
+sys.path[:0] = [REPO, GREW_STUB]
+
+def fake_parse(data):
+    """Parses CoNLL-U input sentences: the first word is the root, the others depend on it."""
+    out = ["# generator = fake UDPipe\n# udpipe_model = fake\n"]
+    for block in data.strip().split('\n\n'):
+        if not block.strip(): continue
+        toks = []
+        for line in block.split('\n'):
+            if line.startswith('#'): out.append(line + '\n'); continue
+            cols = line.split('\t')
+            if len(cols) >= 2: toks.append(cols)
+        for i, cols in enumerate(toks, 1):
+            form = cols[1]
+            upos = 'PUNCT' if form in '.!?,' else ('VERB' if form.endswith(('er', 'ez', 'is', 'ait')) else
+                                                  ('PRON' if form.lower() in ('je', 'tu', 'il', 'on', "c'", 'ce') else 'NOUN'))
+            lemma = form.lower() if len(cols) < 3 or cols[2] in ('_', '') else cols[2]
+            head, deprel = (0, 'root') if i == 1 else (1, 'nsubj' if upos == 'PRON' else 'obj')
+            out.append(f"{i}\t{form}\t{lemma}\t{upos}\t{cols[4] if len(cols) > 4 else '_'}\t_\t{head}\t{deprel}\t_\t_\n")
+        out.append('\n')
+    return ''.join(out)
+
+class FakeUDPipeServer:
+    """
+    UDPipe REST server on a free local port, url is its process endpoint.
+    merge_sentences: in chunks of several sentences, the first two come back as one sentence
+    (the API returns fewer sentences than it was sent). requests: number of parse requests.
+    garbage_token: chunks with this word get a response that is not JSON (status 200).
+    reject_token: chunks with this word are rejected (status 400).
+    max_sentences: chunks of more sentences are too large (status 413).
+    delay: requests wait 0 to 3 times delay seconds, the first of every four the longest,
+    so that concurrent requests are answered out of order. max_in_flight: most requests at the same time.
+    """
+    def __init__(self):
+        self.merge_sentences = False
+        self.garbage_token = None
+        self.reject_token = None
+        self.max_sentences = None
+        self.delay = 0
+        self.in_flight = self.max_in_flight = 0
+        self.lock = threading.Lock()
+        self.requests = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args): pass
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers['content-length']))
+                message = BytesParser(policy=HTTP).parsebytes(
+                    f"Content-Type: {self.headers['content-type']}\r\n\r\n".encode() + body)
+                form = {part.get_param('name', header='content-disposition'): part.get_content()
+                        for part in message.iter_parts()}
+                data = form['data'] if isinstance(form['data'], str) else form['data'].decode('utf8')
+                with server.lock:
+                    server.requests += 1
+                    nr = server.requests
+                    server.in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server.in_flight)
+                try:
+                    self._answer(data, form, nr)
+                finally:
+                    with server.lock:
+                        server.in_flight -= 1
+
+            def _answer(self, data, form, nr):
+                time.sleep(server.delay * (3 - (nr - 1) % 4))
+                if server.max_sentences and len(data.strip().split('\n\n')) > server.max_sentences:
+                    self._send(413, 'Request Entity Too Large')
+                    return
+                if server.reject_token and f"\t{server.reject_token}\t" in data:
+                    self._send(400, 'Cannot read the input')
+                    return
+                if server.garbage_token and f"\t{server.garbage_token}\t" in data:
+                    self._send(200, '<html><body>Gateway says hello</body></html>')
+                    return
+                result = fake_parse(data)
+                if server.merge_sentences:
+                    blocks = result.split('\n\n')
+                    if len(blocks) > 3:
+                        second = '\n'.join(line for line in blocks[1].split('\n') if not line.startswith('#'))
+                        result = '\n\n'.join([blocks[0] + '\n' + second] + blocks[2:])
+                self._send(200, json.dumps({'model': form.get('model', '') + '-1.0', 'result': result}))
+
+            def _send(self, code, body):
+                data = body.encode('utf8')
+                self.send_response(code)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/process"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+@pytest.fixture
+def udpipe_server():
+    server = FakeUDPipeServer()
+    yield server
+    server.close()
+
+def run_childes(workdir, chat_file, *args):
+    """Runs childes.py on a copy of chat_file in workdir, returns the stderr output."""
+    target = os.path.join(workdir, os.path.basename(chat_file))
+    if os.path.abspath(chat_file) != os.path.abspath(target):
+        shutil.copy(chat_file, target)
+    proc = subprocess.run([sys.executable, os.path.join(REPO, 'childes.py'), os.path.basename(chat_file), *args],
+                          cwd=workdir, capture_output=True, text=True, timeout=300)
+    assert proc.returncode == 0, proc.stderr
+    return proc.stderr
+
+def run_dql(workdir, *args, returncode=0):
+    """Runs dql.py with the grewpy stub in workdir, returns (stdout, stderr)."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([GREW_STUB, os.environ.get('PYTHONPATH', '')]).rstrip(os.pathsep))
+    proc = subprocess.run([sys.executable, os.path.join(REPO, 'dql.py'), *map(str, args)],
+                          cwd=workdir, env=env, capture_output=True, text=True, timeout=300)
+    assert proc.returncode == returncode, proc.stderr
+    return proc.stdout, proc.stderr
+
+def write_chat(path, sessions):
+    """Writes a CHAT file of several sessions (pid, language or None for no @ID lines, utterances of CHI)."""
+    with open(path, 'w', encoding='utf8') as f:
+        for pid, language, utterances in sessions:
+            f.write(f"@UTF8\n@PID:\t11312/c-{pid:08d}-1\n@Begin\n@Participants:\tCHI Marie Target_Child\n")
+            if language: f.write(f"@ID:\t{language}|Geneva|CHI|2;06.10||||Target_Child|||\n")
+            f.writelines(f"*CHI:\t{utt}\n" for utt in utterances)
+            f.write("@End\n")
+    return str(path)
+
+def read(path):
+    with open(path, encoding='utf8', newline='') as f:
+        return f.read()
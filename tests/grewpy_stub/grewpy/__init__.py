@@ -0,0 +1,216 @@
+"""
+Stub of grewpy for the tests of dql.py: the classes and methods dql.py uses, with a small
+matcher in Python for the pattern syntax of the tests (no Grew backend is started).
+Node clauses: N [f=v, f="v"|"w", f=/re/i, f=re"re", f<>v, f!=v, f, !f]; edges: e: N -[l|1=l|^l|re"re"]-> M,
+N -> M; order: N < M, N << M; blocks: pattern, without (global is ignored).
+"""
+import copy
+import itertools
+import os
+import re
+
+def init(*args, **kwargs):
+    pass
+
+class GRS:
+    def __init__(self, *args, **kwargs):
+        raise NotImplementedError("GRS is not available in the grewpy stub")
+
+def _split_sentences(text):
+    sentences, lines = [], []
+    for line in text.split('\n'):
+        if line.strip():
+            lines.append(line)
+        elif lines:
+            sentences.append(lines)
+            lines = []
+    if lines: sentences.append(lines)
+    return sentences
+
+class Graph(dict):
+    """Nodes by ID (dicts of form, lemma, upos, xpos, features), meta, heads."""
+    def __init__(self, lines=None):
+        super().__init__()
+        self.meta, self.order, self.heads, self.columns = {}, [], {}, {}
+        for line in lines or []:
+            if line.startswith('#'):
+                key, _, value = line[1:].partition('=')
+                self.meta[key.strip()] = value.strip()
+                continue
+            cols = line.split('\t')
+            if not cols[0].isdigit(): continue
+            node = {'form': cols[1], 'lemma': cols[2], 'upos': cols[3], 'xpos': cols[4]}
+            feats = [kv.partition('=') for kv in cols[5].split('|')] if cols[5] != '_' else []
+            misc = [kv.partition('=') for kv in cols[9].split('|')] if cols[9] != '_' else []
+            node.update((k, v) for k, _, v in feats + misc)
+            self[cols[0]] = node
+            self.order.append(cols[0])
+            self.heads[cols[0]] = (cols[6], cols[7])
+            self.columns[cols[0]] = ([k for k, _, _ in feats], [k for k, _, _ in misc])
+
+    def copy_graph(self):
+        graph = Graph()
+        graph.update(copy.deepcopy(dict(self)))
+        graph.meta, graph.order, graph.heads, graph.columns = dict(self.meta), list(self.order), dict(self.heads), dict(self.columns)
+        return graph
+
+    def to_conll(self):
+        lines = [f"# {k} = {v}" for k, v in self.meta.items()]
+        for nid in self.order:
+            node = self[nid]
+            feats, misc = self.columns[nid]
+            misc = misc + [k for k in node if k not in ('form', 'lemma', 'upos', 'xpos') and k not in feats and k not in misc]
+            head, deprel = self.heads[nid]
+            lines.append('\t'.join([nid, node['form'], node['lemma'], node['upos'], node['xpos'],
+                                    '|'.join(f"{k}={node[k]}" for k in feats) or '_', head, deprel, '_',
+                                    '|'.join(f"{k}={node[k]}" for k in misc) or '_']))
+        return '\n'.join(lines) + '\n'
+
+VALUE = r'/(?:[^/\\]|\\.)*/i?|re"(?:[^"\\]|\\.)*"|"(?:[^"\\]|\\.)*"(?:\s*\|\s*"(?:[^"\\]|\\.)*")*|[\w|-]+'
+ITEM = re.compile(rf'\s*(!)?\s*([\w.-]+)\s*(?:(<>|!=|=)\s*({VALUE}))?\s*(?:,|$)')
+
+def _value_ok(spec, value):
+    if value is None: return False
+    if m := re.fullmatch(r'/(.*)/(i?)', spec) or re.fullmatch(r're"(.*)"()', spec):
+        return re.fullmatch(m.group(1), value, re.I if m.group(2) else 0) is not None
+    if spec.startswith('"'):
+        return value in [a.strip()[1:-1] for a in re.findall(r'"(?:[^"\\]|\\.)*"', spec)]
+    return value in spec.split('|')
+
+def _label_ok(spec, deprel):
+    spec = spec.strip()
+    if spec.startswith('re"'): return re.fullmatch(spec[3:-1], deprel) is not None
+    if spec.startswith('^'): return not _label_ok(spec[1:], deprel)
+    for alternative in spec.split('|'):
+        if alternative.startswith('1='):
+            if deprel.split(':')[0] == alternative[2:]: return True
+        elif deprel == alternative:
+            return True
+    return False
+
+def _parse_block(body):
+    nodes, edges, orders = {}, [], []
+    for clause in re.split(r'[;\n]', re.sub(r'%.*', '', body)):
+        clause = clause.strip()
+        if not clause: continue
+        if m := re.fullmatch(r'(?:\w+\s*:\s*)?(\w+)\s*-\[(.*)\]->\s*(\w+)', clause):
+            edges.append((m.group(1), m.group(2), m.group(3)))
+            names = m.group(1), m.group(3)
+        elif m := re.fullmatch(r'(\w+)\s*->\s*(\w+)', clause):
+            edges.append((m.group(1), None, m.group(2)))
+            names = m.group(1), m.group(2)
+        elif m := re.fullmatch(r'(\w+)\s*(<<|<)\s*(\w+)', clause):
+            orders.append((m.group(1), m.group(2), m.group(3)))
+            names = m.group(1), m.group(3)
+        elif m := re.fullmatch(r'(\w+)\s*\[(.*)\]', clause):
+            constraints, pos, features = nodes.setdefault(m.group(1), []), 0, m.group(2)
+            while pos < len(features):
+                item = ITEM.match(features, pos)
+                if not item or item.end() == pos: raise ValueError(f"cannot parse {clause}")
+                constraints.append(item.groups())
+                pos = item.end()
+            names = ()
+        else:
+            raise ValueError(f"cannot parse {clause}")
+        for name in names: nodes.setdefault(name, [])
+    return nodes, edges, orders
+
+class Request:
+    def __init__(self, pattern):
+        if not re.search(r'pattern\s*{', pattern, re.I) or pattern.count('{') != pattern.count('}'):
+            print("Could not parse the request")   # grewpy prints its errors to stdout
+            raise TypeError("'NoneType' object is not iterable")
+        self.pattern = pattern
+        self.blocks = [(kind.lower(), _parse_block(body))
+                       for kind, body in re.findall(r'\b(pattern|without)\s*{([^}]*)}', pattern, re.I)]
+
+def _node_ok(node, constraints):
+    for neg, name, op, spec in constraints:
+        value = node.get(name)
+        if neg:
+            if value is not None: return False
+        elif op is None:
+            if value is None: return False
+        elif op == '=':
+            if not _value_ok(spec, value): return False
+        elif value is not None and _value_ok(spec, value):
+            return False
+    return True
+
+def _match_graph(request, graph):
+    nodes, edges, orders, withouts = {}, [], [], []
+    for kind, (block_nodes, block_edges, block_orders) in request.blocks:
+        if kind == 'pattern':
+            for name, constraints in block_nodes.items(): nodes.setdefault(name, []).extend(constraints)
+            edges += block_edges
+            orders += block_orders
+        else:
+            withouts.append((block_nodes, block_edges, block_orders))
+
+    def ok(assign, nodes, edges, orders):
+        for name, constraints in nodes.items():
+            if name in assign and not _node_ok(graph[assign[name]], constraints): return False
+        for a, label, b in edges:
+            if a in assign and b in assign:
+                head, deprel = graph.heads[assign[b]]
+                if head != assign[a] or (label is not None and not _label_ok(label, deprel)): return False
+        for a, op, b in orders:
+            if a in assign and b in assign:
+                ia, ib = int(assign[a]), int(assign[b])
+                if (op == '<' and ib != ia + 1) or (op == '<<' and ib <= ia): return False
+        return True
+
+    names = list(nodes)
+    def assignments(i, assign):
+        if i == len(names):
+            yield dict(assign)
+            return
+        for nid in graph.order:
+            if nid in assign.values(): continue
+            assign[names[i]] = nid
+            if ok(assign, nodes, edges, orders):
+                yield from assignments(i + 1, assign)
+            del assign[names[i]]
+
+    matches = []
+    for assign in assignments(0, {}):
+        rest = [nid for nid in graph.order if nid not in assign.values()]
+        excluded = False
+        for block_nodes, block_edges, block_orders in withouts:
+            extra = [name for name in block_nodes if name not in assign]
+            if any(ok(dict(assign, **dict(zip(extra, ids))), block_nodes, block_edges, block_orders)
+                   for ids in itertools.permutations(rest, len(extra))):
+                excluded = True
+                break
+        if not excluded:
+            matches.append({'nodes': assign})
+    return matches
+
+class Corpus:
+    """Graphs by sent_id: the '# sent_id' of the sentence, else its position."""
+    def __init__(self, data):
+        self.graphs = {}
+        if isinstance(data, dict):
+            self.graphs = {sid: graph.copy_graph() for sid, graph in data.items()}
+            return
+        text = open(data, encoding='utf-8').read() if os.path.isfile(data) else data
+        for i, lines in enumerate(_split_sentences(text)):
+            graph = Graph(lines)
+            self.graphs[graph.meta.get('sent_id', f"{i}")] = graph
+
+    def clean(self):
+        self.graphs = {}
+
+    def get_sent_ids(self): return list(self.graphs)
+    def get_all(self): return {sid: graph.copy_graph() for sid, graph in self.graphs.items()}
+    def __len__(self): return len(self.graphs)
+    def __iter__(self): return iter(self.graphs)
+
+    def search(self, request, **kwargs):
+        return [{'sent_id': sid, 'matching': m} for sid, graph in self.graphs.items() for m in _match_graph(request, graph)]
+
+class CorpusDraft(dict):
+    def __init__(self, data=None):
+        super().__init__()
+        if isinstance(data, Corpus):
+            self.update(data.get_all())
@@ -0,0 +1,66 @@
+"""
+cleanUtt() and tokenise() as they were before the rules were precompiled (childes.py v5.3),
+the reference of test_cleanutt.py and benchmarks/bench_cleanutt.py.
+"""
+import re
+
+def cleanUtt(s):
+    """
+    cleans standard CHAT markup from utterances to prepare them for NLP tools
+    revised v4.4
+    """
+    s = re.sub(r' 0([\S+])', r' \1', s)           # 0word -> word
+    s = re.sub(r'0(faire|ne) ', '\1 ', s)           # Specific fix for 0faire, 0ne
+    s = re.sub(r'&=li ', ' ', s)                   # Remove non-canonical liaison markers (mostly in Lyon project)
+    s = re.sub(r'<[^>]+> \[//?\] ', '', s)        # Remove retracings <...> [//]
+    s = re.sub(r'\[\!\] ?', ' ', s)               # Remove stressing [!]
+    s = re.sub(r' ?\(\.+\) ', ' ', s)            # Pauses (.) (..) -> remove
+    s = re.sub(r'<([^>]+)>\s+\[%[^\]]+\]', r'\1', s) # Keep text before comment <text> [% comment]
+    s = re.sub(r'<(0|www|xxx|yyy)[^>]+> ?', '', s)   # Remove unintelligible marked with <>
+    s = re.sub(r'\+[<,]? ?', '', s)               # Remove +< and +,
+    s = re.sub(r'(0|www|xxx|yyy)\s', '', s)          # Remove unintelligible words
+    s = re.sub(r'\[.*?\] ?', '', s)               # Remove all other bracketed content [...]
+    s = re.sub(r'\(([A-Za-z]+)\)', r'\1', s)      # Keep text inside parentheses (word) -> word
+    s = re.sub(r' \+/+', ' ', s)                  # Remove +/
+    s = re.sub(r'[_=]', ' ', s)                   # Replace _ and = with space
+    # added v4.4
+    s = re.sub(r'@[a-z:0-9]+', '', s)             # Remove special CHAT suffixes like @c, @s:eng
+    s = re.sub(r'&[\S]+', '', s)                  # Remove phonological fragments like &mm
+    # final cleanups
+    s = re.sub(r'[<>]', '', s)                    # Remove remaining angle brackets
+    s = re.sub(r'\s+', ' ', s)                    # Normalize spaces
+    return(s.strip())
+
+def tokenise(s, language):
+    """ChatProcessor.tokenise() of v5.3, with the language of the session as argument."""
+    if re.search(r'fra|french', language):
+        reBeginChar = re.compile(r'([\|\{\(\/\´\`"»«°<])') 
+        reEndChar = re.compile(r'([\]\|\}\/\`\"\),\;\:\!\?\.\%»«>])(?=\s|$)')   # also if followed by end of line
+        reBeginString = re.compile(r'([dcjlmnstDCJLNMST]\'|[Qq]u\'|[Jj]usqu\'|[Ll]orsqu\')') 
+        reEndString = re.compile(r'(-t-elles?|-t-ils?|-t-on|-ce|-elles?|-ils?|-je|-la|-les?|-leur|-lui|-mêmes?|-m\'|-moi|-nous|-on|-toi|-tu|-t\'|-vous|-en|-y|-ci|-là)') 
+        s = re.sub(reBeginString, r'\1 ', s)
+        s = re.sub(reBeginChar, r'\1 ', s)
+        s = re.sub(reEndChar, r' \1', s)
+        s = re.sub(reEndString, r' \1', s)
+        s = re.sub(r'\s+', ' ', s)
+    # Add other languages here with 'elif self.args.language == "other_language":'
+    elif re.search(r'ita|italian', language):
+        # Punctuation and delimiters like French
+        s = re.sub(r'([\|\{\(\/\´\`"»«°<])', r'\1 ', s)
+        s = re.sub(r'([\]\|\}\/\`\"\),\;\:\!\?\.\%»«>])(?=\s|$)', r' \1', s)
+        # Split apostrophe preceding a letter: l', un', c', d', gl', dell', quest', etc.
+        #   but NOT split apocope like "po' " (followed by space)
+        s = re.sub(r"([a-zA-Z]+')(?=[a-zA-Zà-úÀ-Ú])", r"\1 ", s)
+        s = re.sub(r'\s+', ' ', s)
+    elif re.search(r'eng|english', language):
+        s = re.sub(r'n\'t', r" n't", s)  # haven't -> have n't
+        s = re.sub(r"I'm", r"I 'm", s)  # it's -> it 's, I've -> I 've
+        s = re.sub(r'(\S)\'(s|ve|ll|d|re)', r"\1 '\2", s)  # it's -> it 's, I've -> I 've etc.
+    elif re.search(r'deu|german', language):
+        pass
+    else:
+        # Default simple tokenization if no language is matched
+        s = re.sub(r'([,;?.!])(?=\s|$)', r' \1', s)
+        s = re.sub(r'\s+', ' ', s)
+    return s
+
@@ -0,0 +1,133 @@
+"""
+merge_with_csv() as it was before the streaming merge (dql.py version 1.4),
+the reference of test_dql_merge.py. Runs with the grewpy stub of tests/grewpy_stub.
+"""
+import csv
+import os
+import re
+import sys
+
+from grewpy import Corpus, CorpusDraft
+
+def merge_with_csv(conllu_file, csv_file, code_head=False):
+    # 1. Read the CoNLL-U data
+    corpus = Corpus(conllu_file)
+    draft_corpus = CorpusDraft(corpus)
+    sys.stderr.write(f"Merge codings from {conllu_file} to {csv_file}\n")
+    
+    id_meta = {}
+    coded = 0
+    newly_encountered_attributes = set()
+
+    for sent_id, graph in draft_corpus.items():
+        coding = graph.meta.get('coding', '')
+        item_id = graph.meta.get('item_id')
+        if item_id is None: continue
+        
+        id_meta[item_id] = coding
+        if coding:
+            coded += 1
+            for entry in [e.strip() for e in coding.split(';') if e.strip()]:
+                # Extract attribute name (e.g. "subj" from "subj:clit(...)")
+                attr = entry.split(':', 1)[0].strip()
+                if attr: newly_encountered_attributes.add(attr)
+
+    sys.stderr.write(f"- Reading the corpus to map item_id -> coding...{len(draft_corpus)} graphs, {coded} codings\n")
+
+    # 2. Read the existing CSV
+    sys.stderr.write(f"Reading table {csv_file}...\n")
+    rows = []
+    original_headers = []
+
+    if os.path.exists(csv_file):
+        with open(csv_file, mode='r', newline='', encoding='utf-8') as file:
+            try:
+                # Read headers first to filter empty ones
+                header_reader = csv.reader(file, delimiter='\t')
+                original_headers = next(header_reader)
+                original_headers = [h for h in original_headers if h] # Remove empty header strings
+                
+                file.seek(0)
+                # Use DictReader with refined headers
+                reader = csv.DictReader(file, fieldnames=original_headers, delimiter='\t')
+                next(reader) # skip header row
+                rows = list(reader)
+            except Exception as e:
+                 sys.stderr.write(f"ERROR: Could not read CSV {csv_file}. Error: {e}\n")
+                 return
+
+    if 'utt_id' not in original_headers:
+         sys.stderr.write(f"ERROR: 'utt_id' column not found in CSV. Cannot merge.\n")
+         return
+
+    # 3. Clean rows to avoid matching errors
+    # Remove 'None' key if present (caused by trailing tabs/extra columns in input)
+    for row in rows:
+        if None in row:
+            del row[None]
+
+    # Map rows by ID
+    row_dict = {}
+    sys.stderr.write("- Mapping CSV IDs to rows...\n")
+    for row in rows:
+        utt_id = row.get('utt_id')
+        if utt_id is not None:
+            row_dict[utt_id] = row
+
+    # 4. Determine Final Headers
+    final_headers = list(original_headers)
+    for attr in sorted(list(newly_encountered_attributes)):
+        if attr not in final_headers:
+            sys.stderr.write(f"  Adding attribute as new column header: {attr}\n")
+            final_headers.append(attr)
+
+    # 5. Merge Data
+    for sent_id, coding in id_meta.items():
+        if not coding: continue
+        coding_entries = [e.strip() for e in coding.split(';') if e.strip()]
+
+        for entry in coding_entries:
+            parts = re.split(r':', entry, maxsplit=1)
+            attr = parts[0].strip()
+            if not attr or len(parts) < 2: continue
+            val = parts[1].strip()
+
+            # Logic to find target word index
+            m = re.search(r'\((\d+)>(\d+)(?:_.*)?\)$', val)
+            node_id_str = m.group(1) if m else "1"
+            head_id_str = m.group(2) if m else "0"
+            
+            # Fallback for root
+            if not m and re.search(r'\((\d+)>0\)$', val):
+                 node_id_str = re.search(r'\((\d+)>0\)$', val).group(1)
+
+            target_node = head_id_str if code_head else node_id_str
+            this_id = f"{sent_id}_w{target_node}"
+
+            if this_id in row_dict:
+                row = row_dict[this_id]
+                current_val = row.get(attr, '')
+                row[attr] = f"{current_val};{val}" if current_val else val
+
+    # 6. Write Output
+    merged_file = re.sub(r'(\.\w+)$', r'.coded\1', csv_file)
+    tmp_file = merged_file + ".tmp"
+    sys.stderr.write(f"Writing first output to {tmp_file}\n")
+
+    with open(tmp_file, mode='w', newline='', encoding='utf-8') as file:
+        # Added extrasaction='ignore' to prevent crashes on unknown keys
+        writer = csv.DictWriter(file, fieldnames=final_headers, delimiter='\t', 
+                                quoting=csv.QUOTE_NONE, escapechar='\x1e', 
+                                extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(row_dict.values())
+
+    # Final cleanup of quotes
+    sys.stderr.write(f"  Cleaning quotes around =HYPERLINK() formulas\n")
+    with open(tmp_file, mode='r', encoding='utf-8') as infile, open(merged_file, mode='w', encoding='utf-8') as outfile:
+        for line in infile:
+            cleaned_line = re.sub(r"\x1e", "", line)
+            outfile.write(cleaned_line)
+            
+    sys.stderr.write(f"Writing final output to {merged_file}\n")
+    os.unlink(tmp_file)
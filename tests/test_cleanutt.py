@@ -0,0 +1,27 @@
+import os
+import re
+
+import pytest
+
+import reference_cleanutt as reference
+from childes import cleanUtt, tokenise
+from conftest import DATA, SNIPPET
+
+LANGUAGES = ['fra', 'ita', 'eng', 'deu', 'spa', '']
+
+def utterances():
+    with open(SNIPPET, encoding='utf8') as f:
+        chat = re.sub(r'\n\s+', ' ', f.read())
+    found = [m.group(1) for m in re.finditer(r'^\*[A-Z0-9]+:\s+(.*)$', chat, re.M)]
+    with open(os.path.join(DATA, 'utterances.txt'), encoding='utf8') as f:
+        return found + f.read().splitlines()
+
+@pytest.mark.parametrize('utt', utterances())
+def test_clean_as_before(utt):
+    assert cleanUtt(utt) == reference.cleanUtt(utt)
+
+@pytest.mark.parametrize('language', LANGUAGES)
+def test_tokenise_as_before(language):
+    for utt in utterances():
+        clean = reference.cleanUtt(utt)
+        assert tokenise(clean, language) == reference.tokenise(clean, language), utt
@@ -0,0 +1,24 @@
+"""dql.py --jobs: the chunks are coded in worker processes and printed in the order of the corpus."""
+import re
+
+import pytest
+
+from conftest import REPO, run_dql
+from test_dql_prefilter import write_corpus
+
+@pytest.mark.parametrize('options', [(), ('--coding_only',)])
+def test_jobs_keep_corpus_order(tmp_path, options):
+    corpus = write_corpus(tmp_path / 'corpus.conllu', 500)
+    query = f"{REPO}/childes-french.query"
+    serial, _ = run_dql(tmp_path, query, corpus, '--first_rule', '--jobs', 1, *options)
+    chunked, _ = run_dql(tmp_path, query, corpus, '--first_rule', '--chunk-size', 70, *options)
+    parallel, err = run_dql(tmp_path, query, corpus, '--first_rule', '--jobs', 3, '--chunk-size', 70, *options)
+    assert err.count('Processing chunk') == 8
+    assert parallel == serial
+    assert chunked == serial
+    # every chunk has coded sentences, and they come back in the order of the corpus
+    coded = [int(m.group(1)) for m in re.finditer(r'# item_id = 28167_u(\d+)\n(?:#.*\n)*?# coding = ', parallel)]
+    assert len({nr // 70 for nr in coded}) == 8
+    assert coded == sorted(coded)
+    if not options:
+        assert re.findall(r'# item_id = (\S+)', parallel) == [f"28167_u{i}" for i in range(500)]
@@ -0,0 +1,114 @@
+"""dql.py --merge (streaming join) must write the same table as the merge of version 1.4 (reference_merge.py)."""
+import csv
+import os
+
+import pytest
+
+import reference_merge as reference
+from conftest import read, run_dql
+
+HEADER = ['utt_id', 'pid', 'word', 'utterance', 'html', '']   # empty header of a trailing tab
+SENTENCES = {'1_u1': (['je', 'veux', 'ça'], 'subj:clit(1>2); obj:pro(3>2)'),
+             '1_u2': (['maman', 'est', 'là'], 'subj:noun(1>2); cop:aux(2>0)'),
+             '2_u1': (['non', '.', ''], ''),
+             '2_u2': (['il', 'tombe', '.'], 'subj:clit(1>2); subj:second(1>2); sent:decl'),
+             '3_u1': (['oui'], 'sent:yes')}   # not in the table
+
+def row(item_id, w, word, utterance='', **extra):
+    fields = {'utt_id': f"{item_id}_w{w}", 'pid': item_id.split('_')[0], 'word': word, 'utterance': utterance,
+              'html': f'=HYPERLINK("http://example.org/{item_id}.html";"{item_id}")'}
+    fields.update(extra)
+    return fields
+
+def write_table(path, item_ids, utterance=lambda item_id: ' '.join(SENTENCES[item_id][0])):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f, delimiter='\t', lineterminator='\n')
+        writer.writerow(HEADER)
+        for item_id in item_ids:
+            for w, word in enumerate(SENTENCES[item_id][0], 1):
+                if word:
+                    r = row(item_id, w, word, utterance(item_id) if w == 1 else '')
+                    writer.writerow([r[h] for h in HEADER[:-1]] + [''])
+    return str(path)
+
+def write_corpus(path, item_ids, codings=None):
+    codings = codings or [SENTENCES[item_id][1] for item_id in item_ids]
+    with open(path, 'w', encoding='utf-8') as f:
+        for item_id, coding in zip(item_ids, codings):
+            f.write(f"# item_id = {item_id}\n")
+            if coding: f.write(f"# coding = {coding}\n")
+            for w, word in enumerate(w for w in SENTENCES[item_id][0] if w):
+                f.write(f"{w + 1}\t{word}\t{word}\tX\t_\t_\t{0 if w == 0 else 1}\t{'root' if w == 0 else 'dep'}\t_\t_\n")
+            f.write('\n')
+    return str(path)
+
+def merge(workdir, table, corpus, *args):
+    """Runs dql.py --merge in workdir and the reference merge in workdir/reference, returns both tables and stderr."""
+    os.makedirs(workdir / 'reference')
+    for name, write, items in (('table.csv', write_table, table), ('corpus.conllu', write_corpus, corpus)):
+        write(workdir / name, *items)
+        write(workdir / 'reference' / name, *items)
+    _, err = run_dql(workdir, '--merge', 'table.csv', 'corpus.conllu', *args)
+    reference.merge_with_csv(str(workdir / 'reference' / 'corpus.conllu'), str(workdir / 'reference' / 'table.csv'),
+                             code_head='--code_head' in args)
+    return read(workdir / 'table.coded.csv'), read(workdir / 'reference' / 'table.coded.csv'), err
+
+ORDER = ['1_u1', '1_u2', '2_u1', '2_u2']
+
+@pytest.mark.parametrize('args', [(), ('--code_head',)])
+def test_merge_in_order(tmp_path, args):
+    merged, expected, err = merge(tmp_path, (ORDER,), (ORDER,), *args)
+    assert merged == expected
+    assert 'Order of table and corpus differ' not in err
+    codings = {r['utt_id']: {a: r[a] for a in ('cop', 'obj', 'sent', 'subj') if r[a]}
+               for r in csv.DictReader(merged.splitlines(), delimiter='\t')}
+    if args:
+        assert codings['1_u1_w2'] == {'obj': 'pro(3>2)', 'subj': 'clit(1>2)'}
+        assert codings['2_u2_w2'] == {'subj': 'clit(1>2);second(1>2)'}
+    else:
+        assert codings['1_u1_w3'] == {'obj': 'pro(3>2)'}
+        assert codings['2_u2_w1'] == {'sent': 'decl', 'subj': 'clit(1>2);second(1>2)'}
+    assert '=HYPERLINK("http://example.org/1_u1.html";"1_u1")' in merged
+
+@pytest.mark.parametrize('args', [(), ('--code_head',)])
+@pytest.mark.parametrize('corpus', [['1_u2', '1_u1', '2_u1', '2_u2'],   # sentence ahead of its rows
+                                    ['1_u1', '2_u2', '1_u2'],             # sentences missing
+                                    ['1_u1', '1_u2', '2_u1', '2_u2', '3_u1']])
+def test_merge_out_of_order(tmp_path, corpus, args):
+    merged, expected, err = merge(tmp_path, (ORDER,), (corpus,), *args)
+    assert 'Order of table and corpus differ' in err
+    assert merged == expected
+
+def test_merge_embedded_newlines(tmp_path):
+    utterances = {'1_u1': 'je veux\nça', '1_u2': 'maman\r\nest\rlà', '2_u1': 'non "\t" .', '2_u2': 'il tombe .'}
+    merged, expected, _ = merge(tmp_path, (ORDER, utterances.get), (ORDER,))
+    assert merged == expected
+    assert '\r' not in merged and 'je veux\nça' in merged
+
+def test_merge_keeps_duplicate_ids(tmp_path):
+    """
+    A PID that reappears in the table repeats its utt_ids: version 1.4 kept one row per utt_id,
+    now every row is written and coded with the sentence at its position in the corpus.
+    """
+    table = ['1_u1', '2_u1', '1_u1']
+    corpora = {'forward': (table, ['subj:clit(1>2)', '', 'obj:pro(3>2)']),
+               'unordered': (['1_u1', '1_u1', '2_u1'], ['subj:clit(1>2)', 'obj:pro(3>2)', ''])}
+    for name, (corpus, codings) in corpora.items():
+        workdir = tmp_path / name
+        os.makedirs(workdir)
+        write_table(workdir / 'table.csv', table)
+        write_corpus(workdir / 'corpus.conllu', corpus, codings)
+        _, err = run_dql(workdir, '--merge', 'table.csv', 'corpus.conllu')
+        with open(workdir / 'table.coded.csv', encoding='utf-8', newline='') as f:
+            rows = list(csv.DictReader(f, delimiter='\t'))
+        assert [r['utt_id'] for r in rows] == ['1_u1_w1', '1_u1_w2', '1_u1_w3', '2_u1_w1', '2_u1_w2',
+                                              '1_u1_w1', '1_u1_w2', '1_u1_w3']
+        coded = [(i, r['subj'], r['obj']) for i, r in enumerate(rows) if r['subj'] or r['obj']]
+        if name == 'forward':
+            # in order: each occurrence gets the coding of its own sentence
+            assert 'Order of table and corpus differ' not in err
+            assert coded == [(0, 'clit(1>2)', ''), (7, '', 'pro(3>2)')]
+        else:
+            # joined by utt_id: the last sentence with the id codes the rows of all occurrences
+            assert 'Order of table and corpus differ' in err
+            assert coded == [(2, '', 'pro(3>2)'), (7, '', 'pro(3>2)')]
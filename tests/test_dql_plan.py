@@ -0,0 +1,36 @@
+"""QueryPlan of dql.py: invalid patterns are reported once, with their rule number, before any corpus is read."""
+import pytest
+
+from conftest import run_dql
+from dql import QueryPlan
+from test_dql_prefilter import write_corpus
+
+QUERY = """% coding attribute=subj value=clit node=V
+pattern { V -[nsubj]-> S; S [upos=PRON] }
+
+% coding attribute=obj value=broken node=V
+pattern { V [upos=VERB]; V -[obj]-> O
+
+% coding attribute=obj value=noun node=V
+pattern { V -[obj]-> O; O [upos=NOUN] }
+"""
+
+def test_plan_reports_invalid_pattern(capsys):
+    with pytest.raises(SystemExit):
+        QueryPlan(QUERY)
+    captured = capsys.readouterr()
+    assert captured.out == ''   # grewpy's own messages go to stderr, not into the corpus output
+    assert captured.err.count('ERROR: Invalid Grew syntax') == 1
+    assert 'Invalid Grew syntax in pattern #2 (obj=broken)' in captured.err
+    assert 'FATAL ERROR: 1 of 3 patterns are invalid' in captured.err
+
+@pytest.mark.parametrize('options', [(), ('--chunk-size', 50), ('--jobs', 2, '--chunk-size', 50)])
+def test_invalid_pattern_stops_before_the_corpus(tmp_path, options):
+    corpus = write_corpus(tmp_path / 'corpus.conllu', 200)
+    (tmp_path / 'broken.query').write_text(QUERY, encoding='utf-8')
+    out, err = run_dql(tmp_path, 'broken.query', corpus, *options, returncode=1)
+    assert out == ''
+    assert err.count('ERROR: Invalid Grew syntax') == 1
+    assert 'pattern #2 (obj=broken)' in err
+    assert err.count('Parsing grew query') == 1
+    assert 'Processing chunk' not in err and 'Searching corpus' not in err
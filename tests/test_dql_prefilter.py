@@ -0,0 +1,127 @@
+"""The prefilter of dql.py (SentenceIndex) must find the same matches as a search in all graphs."""
+import random
+import re
+
+import pytest
+
+from conftest import REPO, run_dql
+from dql import SentenceIndex, iter_conllu_sentences
+from grewpy import Corpus, CorpusDraft
+
+WORDS = [('je', 'je', 'PRON', 'PRO:PER', 'Person=1|PronType=Prs'), ('le', 'le', 'PRON', 'PRO:PER', 'Person=3|PronType=Prs'),
+         ('la', 'le', 'DET', 'DET:ART', 'Definite=Def|Gender=Fem'), ('me', 'me', 'PRON', 'PRO:PER', 'PronType=Prs|Reflex=Yes'),
+         ('se', 'se', 'PRON', 'PRO:PER', 'PronType=Prs|Reflex=Yes'), ('y', 'y', 'PRON', 'PRO:PER', 'PronType=Prs'),
+         ('en', 'en', 'PRON', 'PRO:PER', 'PronType=Prs'), ('à', 'à', 'ADP', 'PRP', '_'), ('Marie', 'Marie', 'PROPN', 'NAM', '_'),
+         ('fait', 'faire', 'VERB', 'VER:pres', 'Mood=Ind|Tense=Pres'), ('donne', 'donner', 'VERB', 'VER:impe', 'Mood=Imp'),
+         ('prend', 'prendre', 'VERB', 'VER:pres', 'Mood=Ind|Tense=Pres'), ('manger', 'manger', 'VERB', 'VER:infi', 'VerbForm=Inf'),
+         ('tombée', 'tomber', 'VERB', 'VER:pper', 'Tense=Past|VerbForm=Part'), ('est', 'être', 'AUX', 'VER:pres', 'Mood=Ind'),
+         ('a', 'avoir', 'AUX', 'VER:pres', 'Mood=Ind'), ('chat', 'chat', 'NOUN', 'NOM', 'Gender=Masc'),
+         ('maman', 'maman', 'NOUN', 'NOM', 'Gender=Fem'), ('pas', 'pas', 'ADV', 'ADV', 'Polarity=Neg'),
+         ('ça', 'ça', 'PRON', 'PRO:DEM', 'PronType=Dem'), ('qui', 'qui', 'PRON', 'PRO:REL', 'PronType=Rel'), ('.', '.', 'PUNCT', 'SENT', '_')]
+DEPRELS = ['nsubj', 'nsubj:pass', 'obj', 'iobj', 'expl:subj', 'expl:comp', 'obl:arg', 'obl:mod', 'case', 'advmod',
+           'aux', 'aux:tense', 'aux:pass', 'cop', 'mark', 'ccomp', 'xcomp', 'det', 'punct']
+
+def write_corpus(path, n, ids='item_id', seed=7):
+    """Random graphs, with '# item_id' only as in the output of childes.py (ids: item_id, sent_id or None)."""
+    rnd = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(n):
+            if ids: f.write(f"# {ids} = 28167_u{i}\n")
+            length = rnd.randint(2, 7)
+            root = rnd.randint(1, length)
+            for w in range(1, length + 1):
+                form, lemma, upos, xpos, feats = rnd.choice(WORDS)
+                head, deprel = (0, 'root') if w == root else (rnd.choice([x for x in range(1, length + 1) if x != w]) if rnd.random() < 0.3 else root, rnd.choice(DEPRELS))
+                misc = 'SpaceAfter=No' if rnd.random() < 0.1 else '_'
+                f.write('\t'.join(map(str, [w, form, lemma, upos, xpos, feats, head, deprel, '_', misc])) + '\n')
+            f.write('\n')
+    return str(path)
+
+# one pattern per clause form understood (or deliberately ignored) by pattern_requirements()
+CLAUSES = {
+    'plain value':          'V [upos=VERB]',
+    'quoted value':         'V [lemma="faire"]',
+    'quoted alternatives':  'V [lemma="prendre"|"donner"]',
+    'bare alternatives':    'V [upos=AUX|VERB]',
+    'regex':                'V [upos=/AUX|VERB/]',
+    'regex ignoring case':  'V [form=/MA.*/i]',
+    're string':            'V [lemma=re"t.*r"]',
+    'quoted xpos':          'V [xpos="VER:impe"]',
+    'FEATS feature':        'V [Mood=Imp]',
+    'MISC feature':         'V [SpaceAfter=No]',
+    'feature present':      'V [upos=VERB, Tense]',
+    'feature absent':       'V [upos=PRON, !Reflex]',
+    'not equal <>':         'V [upos<>PUNCT, Gender=Fem]',
+    'not equal !=':         'V [upos=NOUN, Gender!=Fem]',
+    'edge label':           'V -[obj]-> O',
+    'edge alternatives':    'V -[nsubj|obj]-> O',
+    'edge 1=':              'V -[1=aux]-> O',
+    'edge subtype':         'V -[aux:tense]-> O',
+    'edge negation':        'V -[^punct]-> O; V [upos=VERB]',
+    'edge re string':       'V -[re"i?obj"]-> O',
+    'named edge':           'e: V -[nsubj]-> O; O [lemma="je"]',
+    'edge without label':   'V -> O; O [upos=PRON, PronType=Rel]',
+    'order':                'D [upos=DET]; V [upos=NOUN]; D < V',
+    'comment':              'V [upos=VERB];\n    % V [lemma="faire"]',
+}
+BLOCKS = {
+    'without':   'pattern { V [upos=VERB] } without { V -[obj]-> O }',
+    'global':    'pattern { V [upos=VERB]; V -[nsubj]-> S } global { is_projective }',
+    'PATTERN':   'PATTERN { V [lemma="être"] }',
+    'two blocks': 'pattern { V [upos=PRON] } pattern { V -[det]-> O; O [lemma="le"] }',
+}
+
+def query_text():
+    patterns = [f"pattern {{ {clause} }}" for clause in CLAUSES.values()] + list(BLOCKS.values())
+    return ''.join(f"% coding attribute=q{nr} value=v{nr} node=V\n{pattern}\n\n" for nr, pattern in enumerate(patterns, 1))
+
+def matches_per_pattern(stderr):
+    return {int(m.group(1)): int(m.group(2)) for m in re.finditer(r'Searching corpus query (\d+) .*?\.\.\. (\d+) matches', stderr)}
+
+def test_prefilter_finds_the_same_matches(tmp_path):
+    corpus = write_corpus(tmp_path / 'corpus.conllu', 600)
+    (tmp_path / 'forms.query').write_text(query_text(), encoding='utf-8')
+    filtered, err = run_dql(tmp_path, 'forms.query', corpus)
+    assert 'candidates' in err and 'prefilter not used' not in err
+    full, full_err = run_dql(tmp_path, 'forms.query', corpus, '--no_prefilter')
+    assert filtered == full
+    matches = matches_per_pattern(err)
+    assert matches == matches_per_pattern(full_err)
+    assert len(matches) == len(CLAUSES) + len(BLOCKS) and all(matches.values())
+
+@pytest.mark.parametrize('query', ['childes-french.query', 'clitics.dql.query', 'object-clitics.dql.query'])
+def test_prefilter_with_shipped_queries(tmp_path, query):
+    corpus = write_corpus(tmp_path / 'corpus.conllu', 600, seed=11)
+    filtered, err = run_dql(tmp_path, f"{REPO}/{query}", corpus, '--first_rule')
+    full, _ = run_dql(tmp_path, f"{REPO}/{query}", corpus, '--first_rule', '--no_prefilter')
+    assert filtered == full
+    assert 'prefilter not used' not in err
+
+def test_prefilter_not_used_without_ids(tmp_path):
+    corpus = write_corpus(tmp_path / 'corpus.conllu', 100, ids=None)
+    (tmp_path / 'forms.query').write_text(query_text(), encoding='utf-8')
+    filtered, err = run_dql(tmp_path, 'forms.query', corpus)
+    assert 'prefilter not used' in err
+    assert filtered == run_dql(tmp_path, 'forms.query', corpus, '--no_prefilter')[0]
+
+def test_bind_pairs_graphs_by_id(tmp_path):
+    corpus_file = write_corpus(tmp_path / 'corpus.conllu', 20)
+    index = SentenceIndex(iter_conllu_sentences(corpus_file))
+    draft = CorpusDraft(Corpus(corpus_file))
+    # the graphs in another order and under other sent_ids: pairing by position would be wrong
+    reordered = CorpusDraft()
+    for n, (sent_id, graph) in enumerate(reversed(list(draft.items()))):
+        reordered[f"g{n}"] = graph
+    assert index.bind(reordered)
+    requirements = [('lemma', frozenset(['faire']))]
+    expected = [n for n, sentence in enumerate(iter_conllu_sentences(corpus_file)) if '\tfaire\t' in sentence]
+    assert index.candidates(requirements) == [f"g{19 - n}" for n in expected]
+
+def test_bind_fails_on_missing_or_repeated_ids(tmp_path):
+    corpus_file = write_corpus(tmp_path / 'corpus.conllu', 10)
+    draft = CorpusDraft(Corpus(corpus_file))
+    assert not SentenceIndex(iter_conllu_sentences(write_corpus(tmp_path / 'noid.conllu', 10, ids=None))).bind(draft)
+    sentences = list(iter_conllu_sentences(corpus_file))
+    sentences[3] = sentences[2]   # id 28167_u2 twice
+    assert not SentenceIndex(sentences).bind(draft)
+    assert not SentenceIndex(sentences[:9]).bind(draft)
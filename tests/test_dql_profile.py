@@ -0,0 +1,43 @@
+"""The --profile report of dql.py (TSV and JSON)."""
+import csv
+import json
+
+from conftest import REPO, run_dql
+from dql import Profile, __version__
+from test_dql_prefilter import write_corpus
+
+QUERY = f"{REPO}/childes-french.query"
+
+def test_profile_tsv(tmp_path):
+    corpus = write_corpus(tmp_path / 'corpus.conllu', 300)
+    run_dql(tmp_path, QUERY, corpus, '--profile', 'profile.tsv')
+    with open(tmp_path / 'profile.tsv', encoding='utf-8', newline='') as f:
+        rows = list(csv.DictReader(f, delimiter='\t'))
+    assert list(rows[0]) == ['kind', 'pattern', 'phase', 'attribute', 'value', 'seconds', 'matches', 'candidates',
+                             'graphs', 'ms_per_1000_graphs']
+    patterns = [row for row in rows if row['kind'] == 'pattern']
+    phases = [row for row in rows if row['kind'] == 'phase']
+    assert len(patterns) + len(phases) == len(rows)
+    assert [row['phase'] for row in phases] == list(Profile.PHASES)
+    assert all(row['pattern'] == row['attribute'] == row['matches'] == '' for row in phases)
+    assert all(row['pattern'].isdigit() and row['phase'] == '' and row['attribute'] for row in patterns)
+    assert sorted(int(row['pattern']) for row in patterns) == list(range(1, len(patterns) + 1))
+    seconds = [float(row['seconds']) for row in patterns]
+    assert seconds == sorted(seconds, reverse=True)
+    assert all(int(row['candidates']) <= 300 and int(row['graphs']) <= 300 for row in patterns)
+
+def test_profile_json_sums_the_chunks(tmp_path):
+    corpus = write_corpus(tmp_path / 'corpus.conllu', 300)
+    run_dql(tmp_path, QUERY, corpus, '--profile', 'serial.json')
+    run_dql(tmp_path, QUERY, corpus, '--profile', 'jobs.json', '--jobs', 2, '--chunk-size', 100)
+    with open(tmp_path / 'serial.json', encoding='utf-8') as f:
+        serial = json.load(f)
+    with open(tmp_path / 'jobs.json', encoding='utf-8') as f:
+        jobs = json.load(f)
+    assert serial['version'] == jobs['version'] == __version__
+    assert (serial['chunks'], jobs['chunks']) == (1, 3)
+    assert list(jobs['phases']) == list(Profile.PHASES)
+    counts = lambda report: {row['pattern']: (row['attribute'], row['value'], row['matches'], row['candidates'])
+                             for row in report['patterns']}
+    assert counts(jobs) == counts(serial)
+    assert sum(row['matches'] for row in jobs['patterns']) > 0
@@ -0,0 +1,25 @@
+"""Output of the current code compared with files written by childes.py v5.3 (tests/data)."""
+import csv
+import os
+
+import pytest
+
+from childes import cleanUtt, tokenise
+from conftest import DATA, SNIPPET, run_childes, read
+
+def golden_tokenise():
+    with open(os.path.join(DATA, 'tokenise.golden.tsv'), encoding='utf8', newline='') as f:
+        return [(row['language'], row['utterance'], row['clean'], row['tokens'])
+                for row in csv.DictReader(f, delimiter='\t', quoting=csv.QUOTE_NONE)]
+
+@pytest.mark.parametrize('language,utt,clean,tokens', golden_tokenise())
+def test_clean_and_tokenise(language, utt, clean, tokens):
+    assert cleanUtt(utt) == clean
+    assert tokenise(clean, language) == tokens
+
+def test_parsed_and_light_tables(tmp_path, udpipe_server):
+    run_childes(tmp_path, SNIPPET, '--api_model', 'french', '--parser_backend', 'rest', '--api_url', udpipe_server.url,
+                '--utt_clean', '--html_dir', 'html', '--server_url', 'http://example.org/html',
+                '--pos_utterance', 'VERB', '--pos_output', 'VERB|NOUN|PRON')
+    for table in ('test-snippet.parsed.csv', 'test-snippet.light.csv'):
+        assert read(tmp_path / table) == read(os.path.join(DATA, table)), table
@@ -0,0 +1,16 @@
+import os
+
+from conftest import SNIPPET, run_childes, read
+
+def test_html_jobs_write_the_same_pages(tmp_path, udpipe_server):
+    outputs = {}
+    for html_jobs in ('1', '3'):
+        workdir = tmp_path / f"html_jobs{html_jobs}"
+        os.makedirs(workdir)
+        err = run_childes(workdir, SNIPPET, '--api_model', 'french', '--parser_backend', 'rest', '--api_url', udpipe_server.url,
+                          '--html_dir', 'html', '--chunk_html', '6', '--html_jobs', html_jobs)
+        assert err.count('Grew backend failed') <= 1  # the worker processes do not start Grew again
+        pages = sorted(name for name in os.listdir(workdir / 'html') if name.endswith('.html'))
+        outputs[html_jobs] = (read(workdir / 'test-snippet.parsed.csv'), {page: read(workdir / 'html' / page) for page in pages})
+    assert len(outputs['1'][1]) == 4
+    assert outputs['3'] == outputs['1']
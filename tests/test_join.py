@@ -0,0 +1,21 @@
+from childes import join_conllu_sentences
+
+def conllu(*ids):
+    return ''.join(f"# item_id = {utt_id}\n1\t{utt_id}\t_\tNOUN\t_\t_\t0\troot\t_\t_\n\n" for utt_id in ids)
+
+def forms(sentences):
+    return [tokens[0][1] if tokens else None for tokens in sentences]
+
+def test_in_order():
+    assert forms(join_conllu_sentences(conllu('a', 'b', 'c'), ['a', 'b', 'c'])) == ['a', 'b', 'c']
+
+def test_out_of_order_sentence_keeps_later_rows():
+    assert forms(join_conllu_sentences(conllu('b', 'a', 'c', 'd'), ['a', 'b', 'c', 'd'])) == ['a', 'b', 'c', 'd']
+    assert forms(join_conllu_sentences(conllu('a', 'c', 'd', 'b'), ['a', 'b', 'c', 'd'])) == ['a', 'b', 'c', 'd']
+
+def test_missing_and_unknown_sentences():
+    assert forms(join_conllu_sentences(conllu('x', 'a', 'c'), ['a', 'b', 'c'])) == ['a', None, 'c']
+
+def test_repeated_id_takes_next_sentence():
+    text = conllu('a', 'b', 'a').replace('1\ta\t', '1\tfirst\t', 1)
+    assert forms(join_conllu_sentences(text, ['a', 'b', 'a'])) == ['first', 'b', 'a']
@@ -0,0 +1,23 @@
+import os
+
+from conftest import SNIPPET, run_childes, read
+
+def parse(workdir, server, *args):
+    os.makedirs(workdir)
+    run_childes(workdir, SNIPPET, '--api_model', 'french', '--parser_backend', 'rest', '--api_url', server.url, *args)
+    return read(os.path.join(workdir, 'test-snippet.parsed.csv'))
+
+def test_cache_is_opt_in(tmp_path, udpipe_server):
+    parse(tmp_path / 'plain', udpipe_server, '--write_conllu')
+    assert read(tmp_path / 'plain' / 'test-snippet.conllu').startswith('# generator')
+
+def test_unaligned_chunk_is_parsed_per_utterance(tmp_path, udpipe_server):
+    expected = parse(tmp_path / 'plain', udpipe_server)
+    cache = str(tmp_path / 'cache')
+    udpipe_server.merge_sentences = True
+    assert parse(tmp_path / 'merged', udpipe_server, '--parse_cache', cache) == expected
+    # every utterance was cached under its own key: the second run only asks for the model version
+    udpipe_server.merge_sentences = False
+    requests = udpipe_server.requests
+    assert parse(tmp_path / 'cached', udpipe_server, '--parse_cache', cache) == expected
+    assert udpipe_server.requests == requests + 1
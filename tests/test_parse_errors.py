@@ -0,0 +1,15 @@
+from conftest import run_childes, write_chat, read
+from test_sessions import read_table
+
+def test_response_that_is_not_json_is_rejected(tmp_path, udpipe_server):
+    udpipe_server.garbage_token = 'zorglub'
+    utterances = ['je veux ça .', 'il est là .', 'zorglub encore !', 'oui maman .', 'non .']
+    chat = write_chat(tmp_path / 'garbage.cha', [(1, 'fra', utterances)])
+    err = run_childes(tmp_path, chat, '--api_model', 'french', '--parser_backend', 'rest', '--api_url', udpipe_server.url,
+                      '--chunk_parse', '5')
+    assert 'response is not the JSON of the API' in err
+    rejected = read(tmp_path / 'garbage.rejected.conllu')
+    assert '\tzorglub\t' in rejected and '\tmaman\t' not in rejected
+    parsed = {row['utt_id'] for row in read_table(tmp_path / 'garbage.parsed.csv') if row['conll_1']}
+    assert parsed == {f"1_u{nr}_w{w}" for nr, utt in enumerate(utterances, 1) if nr != 3
+                      for w in range(1, len(utt.split()) + 1)}
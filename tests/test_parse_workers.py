@@ -0,0 +1,54 @@
+"""--parse_workers N must give the same output as --parse_workers 1, whatever the order of the answers."""
+import os
+
+import pytest
+
+from conftest import run_childes, write_chat, read
+
+WORDS = 'je tu il on maman papa chat ça là encore veux prendre manger regardez fini dis'.split()
+
+def utterances(n):
+    return [' '.join(WORDS[(i * 7 + k * 3) % len(WORDS)] for k in range(2 + i % 5)) + ' .' for i in range(n)]
+
+def parse(workdir, server, workers, *args):
+    """Parses the same CHAT file with --parse_workers workers, returns the output files by name."""
+    os.makedirs(workdir)
+    chat = write_chat(workdir / 'workers.cha', [(1, 'fra', utterances(40)), (2, 'fra', utterances(23))])
+    err = run_childes(workdir, chat, '--api_model', 'french', '--parser_backend', 'rest', '--api_url', server.url,
+                      '--write_conllu', '--chunk_parse', '5', '--parse_workers', str(workers), *args)
+    return {name: read(workdir / name) for name in sorted(os.listdir(workdir)) if name != 'workers.cha'}, err
+
+@pytest.mark.parametrize('args', [(), ('--stream',)])
+def test_workers_keep_the_order_of_the_chunks(tmp_path, udpipe_server, args):
+    expected, _ = parse(tmp_path / 'serial', udpipe_server, 1, *args)
+    udpipe_server.delay = 0.05  # answers come back out of order
+    outputs, err = parse(tmp_path / 'parallel', udpipe_server, 4, *args)
+    assert udpipe_server.max_in_flight > 1
+    assert outputs == expected
+    if not args:   # --stream: the chunks are numbered per batch
+        assert 'Received chunk 13/13' in err
+
+def test_workers_halve_chunks_that_are_too_large(tmp_path, udpipe_server):
+    udpipe_server.max_sentences = 2
+    expected, _ = parse(tmp_path / 'serial', udpipe_server, 1)
+    udpipe_server.delay = 0.02
+    requests = udpipe_server.requests
+    outputs, err = parse(tmp_path / 'parallel', udpipe_server, 4)
+    assert outputs == expected
+    assert udpipe_server.max_in_flight > 1
+    assert 'too large for the API (413), sending chunks of 2' in err
+    assert 'sending chunks of 1' not in err   # the limit is lowered once to what the server accepts
+    # every chunk of 5 is answered 413 at most once, later chunks are split before they are sent
+    assert udpipe_server.requests - requests <= 13 + 32
+
+def test_workers_write_the_same_reject_file(tmp_path, udpipe_server):
+    udpipe_server.reject_token = 'regardez'
+    expected, err = parse(tmp_path / 'serial', udpipe_server, 1)
+    assert 'isolating the offending utterances' in err
+    udpipe_server.delay = 0.02
+    outputs, _ = parse(tmp_path / 'parallel', udpipe_server, 4)
+    assert outputs == expected
+    rejected = outputs['workers.rejected.conllu']
+    blocks = [block for block in rejected.split('\n\n') if block.strip()]
+    assert blocks and all('\tregardez\t' in block for block in blocks)
+    assert len(blocks) == sum('regardez' in utt for utt in utterances(40) + utterances(23))
@@ -0,0 +1,44 @@
+import threading
+
+import pytest
+
+from childes import Pipeline
+
+def test_items_pass_all_stages_in_order():
+    seen, done = [], []
+    pipeline = Pipeline([lambda item: seen.append(('a', item)), lambda item: seen.append(('b', item))], done=done.append)
+    for item in range(5): pipeline.put(item)
+    pipeline.close()
+    assert [item for stage, item in seen if stage == 'b'] == list(range(5))
+    assert done == list(range(5))
+
+def test_abort_drops_items_and_joins_threads():
+    started, release, done = threading.Event(), threading.Event(), []
+    def slow(item):
+        started.set()
+        release.wait()
+    pipeline = Pipeline([slow, lambda item: None], depth=3, done=done.append)
+    for item in range(3): pipeline.put(item)
+    started.wait()
+    threading.Timer(0.2, release.set).start()
+    pipeline.abort()  # waits for the running stage, then the others are dropped
+    assert not any(thread.is_alive() for thread in pipeline.threads)
+    assert sorted(done) == [0, 1, 2]
+
+def test_abort_after_close():
+    pipeline = Pipeline([lambda item: None])
+    pipeline.put(1)
+    pipeline.close()
+    pipeline.abort()
+    assert not any(thread.is_alive() for thread in pipeline.threads)
+
+def test_first_error_wins():
+    def fail(item):
+        raise ValueError(item)
+    pipeline = Pipeline([lambda item: None, fail])
+    pipeline.put(1)
+    pipeline.put(2)
+    with pytest.raises(ValueError, match='1'):
+        pipeline.close()
+    pipeline.abort()  # does not replace the error of the stage
+    assert isinstance(pipeline.error, ValueError)
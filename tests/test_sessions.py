@@ -0,0 +1,84 @@
+import csv
+import os
+import sys
+
+from conftest import run_childes, write_chat, read
+
+def read_table(path):
+    with open(path, encoding='utf8', newline='') as f:
+        return list(csv.DictReader(f, delimiter='\t', quoting=csv.QUOTE_NONE))
+
+def test_reappearing_pid_keeps_all_rows(tmp_path, udpipe_server):
+    chat = write_chat(tmp_path / 'pids.cha', [(1, 'fra', ['oui maman .', 'je veux ça .']),
+                                              (2, 'fra', ['non .']),
+                                              (1, 'fra', ['il est là .', 'encore !'])])
+    err = run_childes(tmp_path, chat, '--api_model', 'french', '--parser_backend', 'rest', '--api_url', udpipe_server.url)
+    assert 'used more than once' in err
+    rows = read_table(tmp_path / 'pids.parsed.csv')
+    assert [row['word'] for row in rows] == 'oui maman . je veux ça . non . il est là . encore !'.split()
+    assert all(row['lemma'] for row in rows)  # each utterance got its own parse
+    assert [row['utt_id'] for row in rows].count('1_u1_w1') == 2
+
+def test_reappearing_pid_is_reported_across_batches(tmp_path, udpipe_server):
+    chat = write_chat(tmp_path / 'pids.cha', [(1, 'fra', ['oui maman .', 'je veux ça .']),
+                                              (2, 'fra', ['non .', 'encore .']),
+                                              (1, 'fra', ['il est là .'])])
+    err = run_childes(tmp_path, chat, '--api_model', 'french', '--parser_backend', 'rest', '--api_url', udpipe_server.url,
+                      '--stream', '--chunk_parse', '2')
+    assert err.count('used more than once') == 1
+    assert 'utterance id 1_u1 ' in err
+
+def test_reappearing_pid_gets_its_own_html_header_and_link(tmp_path, udpipe_server):
+    chat = write_chat(tmp_path / 'pids.cha', [(1, 'fra', ['oui maman .', 'je veux ça .']),
+                                              (2, 'fra', ['non .']),
+                                              (1, 'fra', ['il est là .', 'encore !'])])
+    run_childes(tmp_path, chat, '--api_model', 'french', '--parser_backend', 'rest', '--api_url', udpipe_server.url,
+                '--html_dir', 'html', '--chunk_html', '3')
+    pages = [read(tmp_path / 'html' / name) for name in sorted(os.listdir(tmp_path / 'html')) if name.endswith('.html')]
+    assert len(pages) == 2
+    assert 'oui maman .' in pages[0] and 'il est là .' not in pages[0]
+    assert 'il est là .' in pages[1] and 'oui maman .' not in pages[1]
+    links = {(row['utt_id'], row['word']): row['URLloc'] for row in read_table(tmp_path / 'pids.parsed.csv')}
+    assert '0.html#1_u1' in links[('1_u1_w1', 'oui')] and '1.html#1_u1' in links[('1_u1_w1', 'il')]
+
+def test_jobs_use_the_language_of_each_session(tmp_path):
+    chat = write_chat(tmp_path / 'langs.cha', [(1, 'eng', ["I'm here ."]),
+                                               (2, None, ["I'm here ."]),
+                                               (3, 'fra', ["c'est là ."]),
+                                               (4, None, ["c'est là ."])])
+    tables = {}
+    for jobs in ('1', '2'):
+        err = run_childes(tmp_path, chat, '--jobs', jobs)
+        assert 'Initial parsing complete: 4 session(s).' in err   # counted while reading, not in a pass of its own
+        with open(tmp_path / 'langs.csv', encoding='utf8') as f:
+            tables[jobs] = f.read()
+    assert tables['2'] == tables['1']
+    words = [(row['utt_id'].split('_')[0], row['word']) for row in read_table(tmp_path / 'langs.csv')]
+    assert words == [('1', 'I'), ('1', "'m"), ('1', 'here'), ('1', '.'),
+                     ('2', "I'm"), ('2', 'here'), ('2', '.'),        # no @ID: default rules, as in the serial run
+                     ('3', "c'"), ('3', 'est'), ('3', 'là'), ('3', '.'),
+                     ('4', "c'est"), ('4', 'là'), ('4', '.')]
+
+FAKE_TAGGER = """#!/usr/bin/env python3
+import sys
+for line in sys.stdin:
+    t = line.rstrip('\\n')
+    if t.startswith('<s_'): print(t)
+    elif t == 'Marie': print('Marie\\tVER:pres\\tmarier')
+    elif t == '?': print('?\\tNAM\\t<unknown>')
+    else: print(f'{t}\\tNOM\\t{t.lower()}')
+"""
+
+def test_tagger_corrections_use_the_language_of_each_utterance(tmp_path):
+    tagger = tmp_path / 'tree-tagger'
+    tagger.write_text(FAKE_TAGGER.replace('/usr/bin/env python3', sys.executable), encoding='utf8')
+    tagger.chmod(0o755)
+    (tmp_path / 'fake.par').write_text('', encoding='utf8')
+    chat = write_chat(tmp_path / 'tagged.cha', [(1, 'fra', ['Marie est là ?']),
+                                                (2, 'eng', ['Marie is here ?'])])
+    run_childes(tmp_path, chat, '-p', 'fake.par', '--utt_tagged')
+    rows = read_table(tmp_path / 'tagged.parsed.csv')
+    tagged = [row['utt_tagged'] for row in rows if row['w_nr'] == '1']
+    # the French corrections apply to the French session only, not to the whole batch
+    assert tagged == ['Marie_NAM=Marie est_NOM=est là_NOM=là ?_PON=,',
+                      'Marie_VER:pres=marier is_NOM=is here_NOM=here ?_NAM=<unknown>']